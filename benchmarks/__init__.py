@@ -0,0 +1 @@
+"""Benchmarks for the IPP Printer Service integration."""
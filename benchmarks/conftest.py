@@ -0,0 +1,147 @@
+"""Fixtures for the IPP Printer Service benchmarks."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable, Coroutine
+import os
+import resource
+import sys
+from typing import Any, TypeVar
+
+import pytest
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from homeassistant.core import HomeAssistant
+
+from .fake_ipp_server import FakeIPPServer
+
+_T = TypeVar("_T")
+
+MIB = 1024 * 1024
+# Interval of the RSS samples taken while a round runs
+RSS_SAMPLE_INTERVAL = 0.005
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    """Add the options of the fake server and the document sizes."""
+    group = parser.getgroup("ipp_printer_service", "IPP Printer Service benchmarks")
+    group.addoption(
+        "--document-sizes",
+        type=float,
+        nargs="+",
+        default=[1, 10, 100],
+        help="document sizes in MiB (print, upload)",
+    )
+    group.addoption(
+        "--rounds", type=int, default=5, help="measured rounds of each benchmark"
+    )
+    group.addoption(
+        "--fake-latency",
+        type=float,
+        default=0.0,
+        help="fake server latency in seconds",
+    )
+    group.addoption(
+        "--fake-throughput",
+        type=float,
+        help="fake server throughput in bytes per second",
+    )
+
+
+def pytest_generate_tests(metafunc: pytest.Metafunc) -> None:
+    """Run the benchmarks taking a document size once for every size."""
+    if "size_mib" in metafunc.fixturenames:
+        sizes = metafunc.config.getoption("document_sizes")
+        metafunc.parametrize("size_mib", sizes, ids=[f"{size:g}MiB" for size in sizes])
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations: None) -> None:
+    """Enable loading the integration in every benchmark."""
+
+
+@pytest.fixture
+def printers() -> int:
+    """Return the number of queues of the fake server."""
+    return 1
+
+
+@pytest.fixture
+async def fake_server(
+    request: pytest.FixtureRequest, printers: int
+) -> AsyncIterator[FakeIPPServer]:
+    """Return a running fake CUPS server."""
+    async with FakeIPPServer(
+        printers=printers,
+        latency=request.config.getoption("fake_latency"),
+        throughput=request.config.getoption("fake_throughput"),
+    ) as server:
+        yield server
+
+
+@pytest.fixture
+def run(hass: HomeAssistant) -> Callable[[Coroutine[Any, Any, _T]], _T]:
+    """Return a function running a coroutine on the loop of Home Assistant.
+
+    The benchmarks are synchronous, as pytest-benchmark times plain calls,
+    so the loop only runs while a coroutine given to this function does.
+    """
+    return hass.loop.run_until_complete
+
+
+@pytest.fixture
+def bench(
+    request: pytest.FixtureRequest,
+    benchmark: BenchmarkFixture,
+    run: Callable[[Coroutine[Any, Any, Any]], Any],
+) -> Callable[[Callable[[], Awaitable[Any]]], None]:
+    """Return a function timing rounds of a coroutine function.
+
+    The peak RSS growth over the start of a round, the memory held because
+    of the document, is added to the extra info of the benchmark.
+    """
+    rounds = request.config.getoption("rounds")
+
+    def _bench(func: Callable[[], Awaitable[Any]]) -> None:
+        peak = 0
+
+        def _round() -> None:
+            nonlocal peak
+            peak = max(peak, run(_async_peak_rss(func)))
+
+        benchmark.pedantic(_round, rounds=rounds, warmup_rounds=1)
+        benchmark.extra_info["peak_rss_mib"] = round(peak / MIB, 2)
+
+    return _bench
+
+
+async def _async_peak_rss(func: Callable[[], Awaitable[Any]]) -> int:
+    """Run a coroutine function, returning the peak RSS growth in bytes."""
+    baseline = peak = _rss()
+    done = asyncio.Event()
+
+    async def _sample() -> None:
+        nonlocal peak
+        while not done.is_set():
+            peak = max(peak, _rss())
+            await asyncio.sleep(RSS_SAMPLE_INTERVAL)
+
+    sampler = asyncio.create_task(_sample())
+    try:
+        await func()
+    finally:
+        done.set()
+        await sampler
+    return peak - baseline
+
+
+def _rss() -> int:
+    """Return the resident set size of this process in bytes."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # Peak since the start of the process, in KiB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
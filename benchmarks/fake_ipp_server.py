@@ -0,0 +1,344 @@
+"""Local fake IPP/CUPS server for the IPP Printer Service benchmarks.
+
+Answers the operations used by the integration with canned attributes:
+Get-Printer-Attributes, CUPS-Get-Printers, Print-Job, Create-Job,
+Send-Document, Cancel-Job, Get-Jobs and Get-Job-Attributes. Every request is delayed
+by ``latency`` seconds and document data is read at most at ``throughput``
+bytes per second, without ever holding a whole document in memory.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from dataclasses import dataclass, field
+import struct
+import time
+from typing import Any
+
+from aiohttp import web
+from pyipp.enums import IppOperation, IppStatus, IppTag
+
+# Tags of the attributes sent in responses
+RESPONSE_TAGS = {
+    "attributes-charset": IppTag.CHARSET,
+    "attributes-natural-language": IppTag.LANGUAGE,
+    "compression-supported": IppTag.KEYWORD,
+    "copies-supported": IppTag.RANGE,
+    "document-format-supported": IppTag.MIME_TYPE,
+    "job-id": IppTag.INTEGER,
+    "job-state": IppTag.ENUM,
+    "job-state-message": IppTag.TEXT,
+    "job-state-reasons": IppTag.KEYWORD,
+    "job-uri": IppTag.URI,
+    "media-supported": IppTag.KEYWORD,
+    "multiple-document-jobs-supported": IppTag.BOOLEAN,
+    "operations-supported": IppTag.ENUM,
+    "printer-info": IppTag.TEXT,
+    "printer-is-accepting-jobs": IppTag.BOOLEAN,
+    "printer-make-and-model": IppTag.TEXT,
+    "printer-name": IppTag.NAME,
+    "printer-state": IppTag.ENUM,
+    "printer-state-message": IppTag.TEXT,
+    "printer-state-reasons": IppTag.KEYWORD,
+    "printer-up-time": IppTag.INTEGER,
+    "printer-uri-supported": IppTag.URI,
+    "sides-supported": IppTag.KEYWORD,
+}
+
+JOB_STATE_PROCESSING = 5
+JOB_STATE_CANCELED = 7
+JOB_STATE_COMPLETED = 9
+PRINTER_STATE_IDLE = 3
+
+# Size of the reads of document data
+READ_SIZE = 64 * 1024
+
+
+@dataclass
+class FakeJob:
+    """Job received by the fake server."""
+
+    job_id: int
+    printer: str
+    documents: int = 0
+    size: int = 0
+    open: bool = True
+    cancelled: bool = False
+
+
+@dataclass
+class FakeIPPServer:
+    """Fake IPP printer, or CUPS server with ``printers`` queues."""
+
+    printers: int = 1
+    latency: float = 0.0
+    throughput: float | None = None
+    host: str = "127.0.0.1"
+    port: int = 0
+    requests: Counter[str] = field(default_factory=Counter)
+    jobs: dict[int, FakeJob] = field(default_factory=dict)
+    bytes_received: int = 0
+    _started: float = field(default_factory=time.monotonic)
+    _runner: web.AppRunner | None = None
+
+    @property
+    def queue_names(self) -> list[str]:
+        """Return the names of the printer queues."""
+        return [f"printer{index}" for index in range(self.printers)]
+
+    async def start(self) -> None:
+        """Start listening, on a free port unless one was given."""
+        app = web.Application(client_max_size=0)
+        app.router.add_post("/{path:.*}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]  # noqa: SLF001
+
+    async def stop(self) -> None:
+        """Stop the server."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def __aenter__(self) -> FakeIPPServer:
+        """Start the server."""
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        """Stop the server."""
+        await self.stop()
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        """Answer one IPP request."""
+        stream = request.content
+        header = await stream.readexactly(8)
+        _, _, operation_id, request_id = struct.unpack(">bbhi", header)
+        attributes = await _read_attributes(stream)
+
+        try:
+            operation = IppOperation(operation_id)
+        except ValueError:
+            operation = None
+        name = operation.name if operation is not None else hex(operation_id)
+        self.requests[name] += 1
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        printer = request.match_info["path"].rpartition("/")[2] or "printer0"
+        groups: list[tuple[IppTag, dict[str, Any]]]
+        status = IppStatus.OK
+
+        if operation is IppOperation.GET_PRINTER_ATTRIBUTES:
+            groups = [(IppTag.PRINTER, self._printer_attributes(printer))]
+        elif operation is IppOperation.CUPS_GET_PRINTERS:
+            groups = [
+                (IppTag.PRINTER, self._printer_attributes(queue))
+                for queue in self.queue_names
+            ]
+        elif operation in (IppOperation.PRINT_JOB, IppOperation.CREATE_JOB):
+            job = FakeJob(len(self.jobs) + 1, printer)
+            self.jobs[job.job_id] = job
+            if operation is IppOperation.PRINT_JOB:
+                await self._receive_document(stream, job)
+                job.open = False
+            groups = [(IppTag.JOB, self._job_attributes(job))]
+        elif operation is IppOperation.SEND_DOCUMENT:
+            if (job := self.jobs.get(attributes.get("job-id", 0))) is None:
+                status = IppStatus.ERROR_NOT_FOUND
+                groups = []
+            else:
+                await self._receive_document(stream, job)
+                if attributes.get("last-document"):
+                    job.open = False
+                groups = [(IppTag.JOB, self._job_attributes(job))]
+        elif operation is IppOperation.CANCEL_JOB:
+            if (job := self.jobs.get(attributes.get("job-id", 0))) is None:
+                status = IppStatus.ERROR_NOT_FOUND
+            else:
+                job.open = False
+                job.cancelled = True
+            groups = []
+        elif operation is IppOperation.GET_JOB_ATTRIBUTES:
+            if (job := self.jobs.get(attributes.get("job-id", 0))) is None:
+                status = IppStatus.ERROR_NOT_FOUND
+                groups = []
+            else:
+                groups = [(IppTag.JOB, self._job_attributes(job))]
+        elif operation is IppOperation.GET_JOBS:
+            groups = [
+                (IppTag.JOB, self._job_attributes(job))
+                for job in self.jobs.values()
+                if job.open and job.printer == printer
+            ]
+        else:
+            status = IppStatus.ERROR_OPERATION_NOT_SUPPORTED
+            groups = []
+
+        # Drain whatever the client sent that this operation does not use
+        while await stream.read(READ_SIZE):
+            pass
+
+        return web.Response(
+            body=_encode_response(status, request_id, groups),
+            content_type="application/ipp",
+        )
+
+    async def _receive_document(self, stream: Any, job: FakeJob) -> None:
+        """Read document data, limited to the configured throughput."""
+        job.documents += 1
+        received = 0
+        start = time.monotonic()
+        while chunk := await stream.read(READ_SIZE):
+            received += len(chunk)
+            job.size += len(chunk)
+            self.bytes_received += len(chunk)
+            if self.throughput and (
+                delay := received / self.throughput - (time.monotonic() - start)
+            ) > 0:
+                await asyncio.sleep(delay)
+
+    def _printer_attributes(self, printer: str) -> dict[str, Any]:
+        """Return the attributes of a printer queue."""
+        return {
+            "printer-uri-supported": (
+                f"ipp://{self.host}:{self.port}/printers/{printer}"
+            ),
+            "printer-name": printer,
+            "printer-info": f"Fake printer {printer}",
+            "printer-make-and-model": "Fake IPP Printer",
+            "printer-state": PRINTER_STATE_IDLE,
+            "printer-state-message": "",
+            "printer-state-reasons": "none",
+            "printer-is-accepting-jobs": True,
+            "printer-up-time": int(time.monotonic() - self._started) + 1,
+            "operations-supported": [
+                IppOperation.PRINT_JOB.value,
+                IppOperation.CREATE_JOB.value,
+                IppOperation.SEND_DOCUMENT.value,
+                IppOperation.CANCEL_JOB.value,
+                IppOperation.GET_JOB_ATTRIBUTES.value,
+                IppOperation.GET_JOBS.value,
+                IppOperation.GET_PRINTER_ATTRIBUTES.value,
+            ],
+            "multiple-document-jobs-supported": True,
+            "compression-supported": ["none", "gzip"],
+            "document-format-supported": ["application/pdf"],
+            "copies-supported": (1, 99),
+            "sides-supported": ["one-sided", "two-sided-long-edge"],
+            "media-supported": ["iso_a4_210x297mm", "na_letter_8.5x11in"],
+        }
+
+    def _job_attributes(self, job: FakeJob) -> dict[str, Any]:
+        """Return the attributes of a job."""
+        if job.cancelled:
+            state, reasons = JOB_STATE_CANCELED, "job-canceled-by-user"
+        elif job.open:
+            state, reasons = JOB_STATE_PROCESSING, "job-incoming"
+        else:
+            state, reasons = JOB_STATE_COMPLETED, "job-completed"
+        return {
+            "job-uri": f"ipp://{self.host}:{self.port}/jobs/{job.job_id}",
+            "job-id": job.job_id,
+            "job-state": state,
+            "job-state-reasons": reasons,
+        }
+
+
+async def _read_attributes(stream: Any) -> dict[str, Any]:
+    """Read the attribute groups of a request, returning the decoded values.
+
+    Integers, enums and booleans are decoded, other values are kept as text.
+    """
+    attributes: dict[str, Any] = {}
+    name = ""
+    while (tag := (await stream.readexactly(1))[0]) != IppTag.END.value:
+        if tag < IppTag.UNSUPPORTED_VALUE.value:
+            continue
+        (length,) = struct.unpack(">h", await stream.readexactly(2))
+        if length:
+            name = (await stream.readexactly(length)).decode()
+        (length,) = struct.unpack(">h", await stream.readexactly(2))
+        raw = await stream.readexactly(length)
+        if tag in (IppTag.INTEGER.value, IppTag.ENUM.value):
+            value: Any = struct.unpack(">i", raw)[0]
+        elif tag == IppTag.BOOLEAN.value:
+            value = raw != b"\x00"
+        else:
+            value = raw.decode(errors="replace")
+        attributes[name] = value
+    return attributes
+
+
+def _encode_value(tag: IppTag, value: Any) -> bytes:
+    """Encode one attribute value with its length."""
+    if tag == IppTag.RANGE:
+        return struct.pack(">hii", 8, *value)
+    if tag in (IppTag.INTEGER, IppTag.ENUM):
+        return struct.pack(">hi", 4, value)
+    if tag == IppTag.BOOLEAN:
+        return struct.pack(">h?", 1, value)
+    encoded = str(value).encode()
+    return struct.pack(">h", len(encoded)) + encoded
+
+
+def _encode_attribute(name: str, value: Any) -> bytes:
+    """Encode an attribute, with additional values for lists."""
+    tag = RESPONSE_TAGS[name]
+    encoded = b""
+    for index, item in enumerate(value if isinstance(value, list) else [value]):
+        encoded += struct.pack(">b", tag.value)
+        encoded += struct.pack(">h", 0) if index else _encode_name(name)
+        encoded += _encode_value(tag, item)
+    return encoded
+
+
+def _encode_name(name: str) -> bytes:
+    """Encode an attribute name with its length."""
+    return struct.pack(">h", len(name)) + name.encode()
+
+
+def _encode_response(
+    status: IppStatus,
+    request_id: int,
+    groups: list[tuple[IppTag, dict[str, Any]]],
+) -> bytes:
+    """Encode an IPP response."""
+    encoded = struct.pack(">bbhi", 2, 0, status.value, request_id)
+    encoded += struct.pack(">b", IppTag.OPERATION.value)
+    encoded += _encode_attribute("attributes-charset", "utf-8")
+    encoded += _encode_attribute("attributes-natural-language", "en")
+    for group_tag, attributes in groups:
+        encoded += struct.pack(">b", group_tag.value)
+        for name, value in attributes.items():
+            encoded += _encode_attribute(name, value)
+    encoded += struct.pack(">b", IppTag.END.value)
+    return encoded
+
+
+async def _main() -> None:
+    """Run a fake server until interrupted."""
+    import argparse  # pylint: disable=import-outside-toplevel
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=6310)
+    parser.add_argument("--printers", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds")
+    parser.add_argument("--throughput", type=float, help="bytes per second")
+    args = parser.parse_args()
+
+    async with FakeIPPServer(
+        printers=args.printers,
+        latency=args.latency,
+        throughput=args.throughput,
+        port=args.port,
+    ) as server:
+        print(f"Fake IPP server listening on {server.host}:{server.port}")
+        await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
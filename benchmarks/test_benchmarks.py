@@ -0,0 +1,166 @@
+"""Benchmarks of the print, upload and poll paths against the fake IPP server.
+
+Run from the repository root::
+
+    pytest benchmarks
+    pytest benchmarks -k print --document-sizes 1 10 100 500
+    pytest benchmarks -k poll --fake-latency 0.005
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable, Coroutine
+import os
+from pathlib import Path
+from typing import Any
+
+from aiohttp import MultipartWriter
+import pytest
+from pytest_benchmark.fixture import BenchmarkFixture
+from pytest_homeassistant_custom_component.typing import ClientSessionGenerator
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.ipp_printer_service.const import (
+    CONF_COMPRESSION,
+    CONF_SHARED_POLLING,
+    DEFAULT_CHUNK_SIZE,
+    DOMAIN,
+)
+from tests.common import async_setup_printer, get_entity_id
+
+from .fake_ipp_server import FakeIPPServer
+
+Bench = Callable[[Callable[[], Awaitable[Any]]], None]
+Run = Callable[[Coroutine[Any, Any, Any]], Any]
+
+MIB = 1024 * 1024
+CHUNK_SIZE = DEFAULT_CHUNK_SIZE * 1024
+
+
+def _write_document(path: Path, size: int) -> None:
+    """Write size bytes of a fake PDF document."""
+    # Random data so that compression does not shrink it unrealistically
+    block = os.urandom(CHUNK_SIZE)
+    with open(path, "wb") as file:
+        for offset in range(0, size, CHUNK_SIZE):
+            file.write(block[: min(CHUNK_SIZE, size - offset)])
+
+
+async def _document(size: int) -> AsyncIterator[bytes]:
+    """Yield size bytes of a fake PDF document, one chunk at a time."""
+    block = os.urandom(CHUNK_SIZE)
+    for offset in range(0, size, CHUNK_SIZE):
+        yield block[: min(CHUNK_SIZE, size - offset)]
+
+
+@pytest.mark.parametrize("compression", [False, True], ids=["plain", "gzip"])
+def test_print(
+    benchmark: BenchmarkFixture,
+    bench: Bench,
+    run: Run,
+    hass: HomeAssistant,
+    fake_server: FakeIPPServer,
+    tmp_path: Path,
+    size_mib: float,
+    compression: bool,
+) -> None:
+    """Measure print_pdf sending a local document and waiting for the job id."""
+    hass.config.allowlist_external_dirs = {str(tmp_path)}
+    entry = run(
+        async_setup_printer(
+            hass,
+            fake_server,
+            fake_server.queue_names[0],
+            {CONF_COMPRESSION: compression},
+        )
+    )
+    entity_id = get_entity_id(hass, entry)
+    path = tmp_path / "document.pdf"
+    _write_document(path, int(size_mib * MIB))
+
+    async def _print() -> None:
+        response = await hass.services.async_call(
+            DOMAIN,
+            "print_pdf",
+            {"entity_id": entity_id, "file_path": str(path), "wait": True},
+            blocking=True,
+            return_response=True,
+        )
+        assert response["job_id"] is not None
+
+    bench(_print)
+    benchmark.extra_info["size_mib"] = size_mib
+
+
+@pytest.mark.parametrize("printers", [1, 10, 50])
+@pytest.mark.parametrize("shared", [False, True], ids=["separate", "shared"])
+def test_poll(
+    benchmark: BenchmarkFixture,
+    bench: Bench,
+    run: Run,
+    hass: HomeAssistant,
+    fake_server: FakeIPPServer,
+    printers: int,
+    shared: bool,
+) -> None:
+    """Measure one poll of every entry, each on its own or sharing requests."""
+    options = {CONF_SHARED_POLLING: shared}
+    coordinators = [
+        run(async_setup_printer(hass, fake_server, name, options)).runtime_data
+        for name in fake_server.queue_names
+    ]
+    rounds = 0
+
+    async def _poll() -> None:
+        nonlocal rounds
+        rounds += 1
+        for coordinator in coordinators:
+            if coordinator.server is not None:
+                # Every round fetches again instead of using the last response
+                coordinator.server.last_update = None
+        await asyncio.gather(
+            *(
+                coordinator._async_update_data()  # pylint: disable=protected-access
+                for coordinator in coordinators
+            )
+        )
+
+    # The first poll of an entry also fetches the printer capabilities
+    run(_poll())
+    rounds = 0
+    requests = sum(fake_server.requests.values())
+    bench(_poll)
+    benchmark.extra_info["server_requests_per_round"] = (
+        sum(fake_server.requests.values()) - requests
+    ) / rounds
+
+
+def test_upload(
+    benchmark: BenchmarkFixture,
+    bench: Bench,
+    run: Run,
+    hass: HomeAssistant,
+    hass_client: ClientSessionGenerator,
+    fake_server: FakeIPPServer,
+    size_mib: float,
+) -> None:
+    """Measure a card upload streamed through the view into a Print-Job request."""
+    entry = run(async_setup_printer(hass, fake_server, fake_server.queue_names[0]))
+    entity_id = get_entity_id(hass, entry)
+    client = run(hass_client())
+    size = int(size_mib * MIB)
+
+    async def _upload() -> None:
+        with MultipartWriter("form-data") as form:
+            part = form.append(_document(size), {"Content-Type": "application/pdf"})
+            part.set_content_disposition("form-data", name="file", filename="bench.pdf")
+            response = await client.post(
+                f"/api/ipp_printer_service/upload?entity_id={entity_id}", data=form
+            )
+        assert response.status == 200, await response.text()
+        assert (await response.json())["mode"] == "direct"
+
+    bench(_upload)
+    benchmark.extra_info["size_mib"] = size_mib
@@ -2,80 +2,168 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
+import random
+import time
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.typing import ConfigType
 
-from .const import DOMAIN
+try:
+    from homeassistant.components.http import StaticPathConfig
+except ImportError:
+    # Older HA versions register static paths one at a time
+    StaticPathConfig = None
+
+from .const import CONF_METRICS, DOMAIN
 from .coordinator import IPPPrinterServiceCoordinator
+from .jobs import async_remove_history
 from .services import async_setup_services
-from .views import IPPPrintUploadView
+from .views import (
+    IPPPrintUploadView,
+    IPPUploadChunkView,
+    IPPUploadCommitView,
+    IPPUploadSessionsView,
+    IPPUploadSessionView,
+    async_register_metrics_view,
+)
+from .websocket_api import async_register_websocket_commands
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.BINARY_SENSOR]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
 
-async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Set up IPP Printer Service from a config entry."""
-    _LOGGER.info("Setting up IPP Printer Service entry")
+FRONTEND_URL = "/hacsfiles/ipp_printer_service"
 
-    coordinator = IPPPrinterServiceCoordinator(hass, entry)
-    await coordinator.async_config_entry_first_refresh()
+# Setting up an entry should not take longer than this, in seconds
+SETUP_BUDGET = 0.5
+# First polls are spread over this many seconds per entry, up to the maximum
+FIRST_REFRESH_STAGGER = 0.5
+MAX_FIRST_REFRESH_DELAY = 15.0
 
-    entry.runtime_data = coordinator
 
-    # Register services (global)
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Register the services, views, commands and frontend files of all entries."""
     await async_setup_services(hass)
 
-    # Register view (global)
-    # Check if view is already registered to avoid duplicates on reload
-    # Note: hass.http.register_view doesn't have a check method, but it's safe to call multiple times
-    # if the view class handles it or if we just do it once.
-    # Ideally, views are registered once per HA lifetime, but here we do it on entry setup.
-    # A better place might be async_setup, but we want to ensure it's active when the integration is.
     hass.http.register_view(IPPPrintUploadView())
+    hass.http.register_view(IPPUploadSessionsView())
+    hass.http.register_view(IPPUploadSessionView())
+    hass.http.register_view(IPPUploadChunkView())
+    hass.http.register_view(IPPUploadCommitView())
+    async_register_websocket_commands(hass)
+
+    www_path = hass.config.path("custom_components/ipp_printer_service/www")
+    if StaticPathConfig is not None:
+        await hass.http.async_register_static_paths(
+            [StaticPathConfig(FRONTEND_URL, www_path, cache_headers=False)]
+        )
+    else:
+        hass.http.register_static_path(FRONTEND_URL, www_path, cache_headers=False)
 
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    # Note: Lovelace resources must be manually added by users
+    _LOGGER.info(
+        "IPP Printer Service frontend resources are available at %s/. "
+        "Please add the card manually to your Lovelace resources if needed.",
+        FRONTEND_URL,
+    )
+    return True
 
-    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
 
-    # Register frontend resources
-    try:
-        from homeassistant.components.http import StaticPathConfig
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Set up IPP Printer Service from a config entry.
 
-        # Register static path for frontend resources
-        www_path = hass.config.path("custom_components/ipp_printer_service/www")
-        await hass.http.async_register_static_paths(
-            [
-                StaticPathConfig(
-                    "/hacsfiles/ipp_printer_service", www_path, cache_headers=False
-                )
-            ]
-        )
+    The printer is not contacted here: its first poll runs in the background
+    so an unreachable printer does not hold up Home Assistant's startup.
+    """
+    _LOGGER.info("Setting up IPP Printer Service entry")
+    start = time.perf_counter()
 
-    except ImportError:
-        # Fallback for older HA versions
-        hass.http.register_static_path(
-            "/hacsfiles/ipp_printer_service",
-            hass.config.path("custom_components/ipp_printer_service/www"),
-            cache_headers=False,
-        )
+    coordinator = IPPPrinterServiceCoordinator(hass, entry)
+    try:
+        await _async_start(hass, entry, coordinator)
+    except Exception:
+        # Stop what was started and release the connections of the coordinator
+        await coordinator.async_close()
+        raise
 
-    # Note: Lovelace resources must be manually added by users
-    _LOGGER.info(
-        "IPP Printer Service frontend resources are available at /hacsfiles/ipp_printer_service/. "
-        "Please add the card manually to your Lovelace resources if needed."
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
+    # Spread the first polls so many entries don't all poll at the same instant
+    entries = len(hass.config_entries.async_entries(DOMAIN))
+    delay = random.uniform(
+        0, min(entries * FIRST_REFRESH_STAGGER, MAX_FIRST_REFRESH_DELAY)
+    )
+    entry.async_create_background_task(
+        hass,
+        _async_first_refresh(coordinator, delay),
+        f"{DOMAIN} first refresh {entry.title}",
     )
 
+    duration = time.perf_counter() - start
+    coordinator.metrics.observe("setup", duration)
+    if duration > SETUP_BUDGET:
+        _LOGGER.warning(
+            "Setting up %s took %.3f seconds, more than the %.1f second budget",
+            entry.title,
+            duration,
+            SETUP_BUDGET,
+        )
+    else:
+        _LOGGER.debug("Set up %s in %.3f seconds", entry.title, duration)
+
     return True
 
 
+async def _async_start(
+    hass: HomeAssistant, entry: ConfigEntry, coordinator: IPPPrinterServiceCoordinator
+) -> None:
+    """Start the background work of an entry and set up its platforms."""
+    await coordinator.async_load_history()
+
+    entry.runtime_data = coordinator
+    # Documents spooled before a crash or restart will never be printed
+    await coordinator.spool.async_setup()
+    coordinator.spool.async_start()
+    if coordinator.cache is not None:
+        # Start from an empty cache in case a previous run did not unload
+        await coordinator.cache.async_clear()
+    coordinator.queue.async_start()
+    coordinator.jobs.async_start()
+    if coordinator.subscription is not None:
+        coordinator.subscription.async_start()
+
+    if entry.options.get(CONF_METRICS, False):
+        async_register_metrics_view(hass)
+
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+
+
+async def _async_first_refresh(
+    coordinator: IPPPrinterServiceCoordinator, delay: float
+) -> None:
+    """Fetch the printer for the first time after a delay."""
+    await asyncio.sleep(delay)
+    await coordinator.async_refresh()
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
-    return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if unload_ok:
+        await entry.runtime_data.async_close()
+    return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the stored data of a config entry."""
+    await async_remove_history(hass, entry.entry_id)
 
 
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
@@ -2,17 +2,22 @@
 
 from __future__ import annotations
 
+from typing import Any
+
 from homeassistant.components.binary_sensor import (
+    BinarySensorDeviceClass,
     BinarySensorEntity,
     BinarySensorEntityDescription,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EntityCategory
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import CONF_SIMULATION_MODE, DOMAIN
 from .coordinator import IPPPrinterServiceCoordinator
+from .entity import IPPEntity
+from .resilience import STATE_CLOSED
 
 
 async def async_setup_entry(
@@ -22,12 +27,15 @@ async def async_setup_entry(
 ) -> None:
     """Set up the IPP Printer Service binary sensor."""
     coordinator: IPPPrinterServiceCoordinator = entry.runtime_data
-    async_add_entities([IPPSimulationModeSensor(coordinator, entry)])
+    async_add_entities(
+        [
+            IPPSimulationModeSensor(coordinator, entry),
+            IPPCircuitBreakerSensor(coordinator, entry),
+        ]
+    )
 
 
-class IPPSimulationModeSensor(
-    CoordinatorEntity[IPPPrinterServiceCoordinator], BinarySensorEntity
-):
+class IPPSimulationModeSensor(IPPEntity, BinarySensorEntity):
     """Representation of an IPP Simulation Mode Binary Sensor."""
 
     _attr_has_entity_name = True
@@ -54,3 +62,57 @@ class IPPSimulationModeSensor(
     def is_on(self) -> bool:
         """Return true if the binary sensor is on."""
         return self._entry.options.get(CONF_SIMULATION_MODE, False)
+
+
+class IPPCircuitBreakerSensor(IPPEntity, BinarySensorEntity):
+    """Representation of the Circuit Breaker Diagnostic Binary Sensor.
+
+    On while requests to the printer's host fail fast because it was
+    unreachable.
+    """
+
+    _attr_has_entity_name = True
+    _attr_name = "Circuit Breaker"
+    _attr_icon = "mdi:electric-switch"
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_device_class = BinarySensorDeviceClass.PROBLEM
+
+    def __init__(
+        self,
+        coordinator: IPPPrinterServiceCoordinator,
+        entry: ConfigEntry,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._breaker = coordinator.client.breaker
+        self._attr_unique_id = f"{entry.entry_id}_circuit_breaker"
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, entry.entry_id)},
+        }
+
+    async def async_added_to_hass(self) -> None:
+        """Follow the state of the breaker."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self._breaker.async_add_listener(self.async_write_ha_state)
+        )
+
+    @property
+    def available(self) -> bool:
+        """Return True, the breaker matters most while the printer is down."""
+        return True
+
+    @callback
+    def _state_fingerprint(self) -> Any:
+        """Return the breaker fields that change its state, not its countdown."""
+        return (self._breaker.state, self._breaker.failures, self._breaker.trips)
+
+    @property
+    def is_on(self) -> bool:
+        """Return true while requests to the host fail fast."""
+        return self._breaker.state != STATE_CLOSED
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the state attributes."""
+        return self._breaker.stats
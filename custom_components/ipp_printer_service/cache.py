@@ -0,0 +1,214 @@
+"""Document cache for IPP Printer Service."""
+
+from __future__ import annotations
+
+from collections import Counter, OrderedDict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+import hashlib
+import logging
+import os
+import shutil
+from typing import Any
+import uuid
+
+import aiofiles
+from aiohttp import ClientError, ClientResponse, ClientSession, hdrs
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+
+from .spool import remove_files
+from .streaming import async_iter_file, async_iter_response
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    """A cached document."""
+
+    digest: str
+    size: int
+    etag: str | None
+    last_modified: str | None
+
+
+class DocumentCache:
+    """Size-bounded, content-addressed on-disk cache of downloaded documents.
+
+    Documents are stored once per content hash and looked up by URL. Every
+    use revalidates the URL with the server through ETag/Last-Modified, so
+    an unchanged document is sent from disk instead of being downloaded
+    again. The least recently used URLs are evicted beyond ``max_size``.
+    """
+
+    def __init__(self, hass: HomeAssistant, directory: str, max_size: int) -> None:
+        """Initialize the cache."""
+        self.hass = hass
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._files: dict[str, int] = {}
+        self._in_use: Counter[str] = Counter()
+
+    @property
+    def size(self) -> int:
+        """Return the number of bytes stored on disk."""
+        return sum(self._files.values())
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return the cache counters."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "files": len(self._files),
+            "size": self.size,
+            "max_size": self.max_size,
+        }
+
+    async def async_clear(self) -> None:
+        """Remove every cached document."""
+        self._entries.clear()
+        self._files.clear()
+        await self.hass.async_add_executor_job(shutil.rmtree, self.directory, True)
+
+    @asynccontextmanager
+    async def async_open(
+        self, session: ClientSession, url: str, chunk_size: int
+    ) -> AsyncIterator[AsyncIterator[bytes]]:
+        """Open a URL through the cache and yield an iterator over its chunks."""
+        entry = self._entries.get(url)
+        headers = {}
+        if entry is not None:
+            # Keep the file while revalidating, a commit for another URL may
+            # evict the entry before the answer arrives
+            self._in_use[entry.digest] += 1
+            if entry.etag:
+                headers[hdrs.IF_NONE_MATCH] = entry.etag
+            if entry.last_modified:
+                headers[hdrs.IF_MODIFIED_SINCE] = entry.last_modified
+
+        try:
+            response = None
+            try:
+                response = await session.get(url, headers=headers)
+                if response.status != 304:
+                    response.raise_for_status()
+            except ClientError as err:
+                if response is not None:
+                    response.release()
+                raise HomeAssistantError(
+                    f"Failed to download file from {url}: {err}"
+                ) from err
+
+            if response.status == 304:
+                response.release()
+                if entry is None:
+                    raise HomeAssistantError(
+                        f"Failed to download file from {url}: "
+                        "not modified, but it is not cached"
+                    )
+                self.hits += 1
+                if url in self._entries:
+                    self._entries.move_to_end(url)
+                _LOGGER.debug("Cache hit for %s (%s)", url, entry.digest)
+                yield async_iter_file(
+                    os.path.join(self.directory, entry.digest), chunk_size
+                )
+                return
+
+            self.misses += 1
+            chunks = self._async_iter_and_store(url, response, chunk_size)
+            try:
+                yield chunks
+            finally:
+                await chunks.aclose()
+                response.release()
+        finally:
+            if entry is not None:
+                self._in_use[entry.digest] -= 1
+                await self._async_release(entry.digest)
+
+    async def _async_iter_and_store(
+        self, url: str, response: ClientResponse, chunk_size: int
+    ) -> AsyncIterator[bytes]:
+        """Yield a response body while writing it to the cache."""
+        etag = response.headers.get(hdrs.ETAG)
+        last_modified = response.headers.get(hdrs.LAST_MODIFIED)
+        length = response.content_length
+
+        if (not etag and not last_modified) or (length or 0) > self.max_size:
+            # Without validators the document could never be reused
+            async for chunk in async_iter_response(response, chunk_size):
+                yield chunk
+            return
+
+        await self.hass.async_add_executor_job(
+            lambda: os.makedirs(self.directory, exist_ok=True)
+        )
+        temp_path = os.path.join(self.directory, f".{uuid.uuid4().hex}.part")
+        digest = hashlib.sha256()
+        size = 0
+        storing = True
+        try:
+            async with aiofiles.open(temp_path, "wb") as file:
+                async for chunk in async_iter_response(response, chunk_size):
+                    size += len(chunk)
+                    if storing and size > self.max_size:
+                        storing = False
+                    if storing:
+                        await file.write(chunk)
+                        digest.update(chunk)
+                    yield chunk
+        except BaseException:
+            storing = False
+            raise
+        finally:
+            if storing:
+                await self._async_commit(
+                    url, temp_path, digest.hexdigest(), size, etag, last_modified
+                )
+            else:
+                await self.hass.async_add_executor_job(remove_files, temp_path)
+
+    async def _async_commit(
+        self,
+        url: str,
+        temp_path: str,
+        digest: str,
+        size: int,
+        etag: str | None,
+        last_modified: str | None,
+    ) -> None:
+        """Move a completely downloaded document into the cache."""
+        path = os.path.join(self.directory, digest)
+        await self.hass.async_add_executor_job(os.replace, temp_path, path)
+        self._files[digest] = size
+
+        previous = self._entries.pop(url, None)
+        self._entries[url] = CacheEntry(digest, size, etag, last_modified)
+        if previous is not None:
+            await self._async_release(previous.digest)
+        _LOGGER.debug("Cached %s as %s (%d bytes)", url, digest, size)
+
+        while self.size > self.max_size and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            await self._async_release(evicted.digest)
+
+    async def _async_release(self, digest: str) -> None:
+        """Remove a stored file once no URL refers to it anymore."""
+        if self._in_use[digest] or any(
+            entry.digest == digest for entry in self._entries.values()
+        ):
+            return
+        self._files.pop(digest, None)
+        await self.hass.async_add_executor_job(
+            remove_files, os.path.join(self.directory, digest)
+        )
+
@@ -0,0 +1,112 @@
+"""Printer capabilities for IPP Printer Service."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+from pyipp.enums import IppOperation
+
+from homeassistant.exceptions import HomeAssistantError
+
+DOCUMENT_FORMAT_PDF = "application/pdf"
+# Printers listing this format detect the format of the document themselves
+DOCUMENT_FORMAT_AUTO = "application/octet-stream"
+
+
+class UnsupportedOptionError(HomeAssistantError):
+    """Error raised when a printer does not support a requested option."""
+
+
+def _as_set(value: Any) -> frozenset[Any]:
+    """Return an attribute value that may hold one or several values as a set."""
+    if value is None:
+        return frozenset()
+    return frozenset(value if isinstance(value, (list, tuple)) else [value])
+
+
+def _copies_range(value: Any) -> tuple[int, int] | None:
+    """Return the copies-supported range, given as a range or its upper bound."""
+    if isinstance(value, (list, tuple)) and len(value) == 2:
+        return int(value[0]), int(value[1])
+    if isinstance(value, int) and not isinstance(value, bool):
+        return 1, value
+    return None
+
+
+@dataclass(frozen=True)
+class PrinterCapabilities:
+    """What a printer supports, as reported by Get-Printer-Attributes.
+
+    Empty values mean the printer did not report the attribute, and any
+    value is then accepted.
+    """
+
+    document_formats: frozenset[str] = frozenset()
+    copies: tuple[int, int] | None = None
+    sides: frozenset[str] = frozenset()
+    media: frozenset[str] = frozenset()
+    compression: frozenset[str] = frozenset()
+    multiple_documents: bool = False
+
+    @classmethod
+    def from_attributes(cls, attributes: dict[str, Any]) -> PrinterCapabilities:
+        """Return the capabilities described by printer attributes."""
+        operations = _as_set(attributes.get("operations-supported"))
+        return cls(
+            document_formats=_as_set(attributes.get("document-format-supported")),
+            copies=_copies_range(attributes.get("copies-supported")),
+            sides=_as_set(attributes.get("sides-supported")),
+            media=_as_set(attributes.get("media-supported")),
+            compression=_as_set(attributes.get("compression-supported")),
+            multiple_documents=(
+                IppOperation.CREATE_JOB in operations
+                and IppOperation.SEND_DOCUMENT in operations
+                and attributes.get("multiple-document-jobs-supported", False) is True
+            ),
+        )
+
+    def validate(
+        self,
+        copies: int = 1,
+        document_format: str = DOCUMENT_FORMAT_PDF,
+        sides: str | None = None,
+        media: str | None = None,
+    ) -> None:
+        """Raise UnsupportedOptionError if the printer cannot print a job."""
+        if self.document_formats and not self.document_formats & {
+            document_format,
+            DOCUMENT_FORMAT_AUTO,
+        }:
+            raise UnsupportedOptionError(
+                f"Printer does not accept {document_format} documents "
+                f"(supported: {', '.join(sorted(self.document_formats))})"
+            )
+        if self.copies is not None and not (
+            self.copies[0] <= copies <= self.copies[1]
+        ):
+            raise UnsupportedOptionError(
+                f"Printer supports {self.copies[0]} to {self.copies[1]} copies, "
+                f"not {copies}"
+            )
+        if sides and self.sides and sides not in self.sides:
+            raise UnsupportedOptionError(
+                f"Printer does not support sides {sides} "
+                f"(supported: {', '.join(sorted(self.sides))})"
+            )
+        if media and self.media and media not in self.media:
+            raise UnsupportedOptionError(
+                f"Printer does not support media {media} "
+                f"(supported: {', '.join(sorted(self.media))})"
+            )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the capabilities for diagnostics."""
+        return {
+            "document_formats": sorted(self.document_formats),
+            "copies": list(self.copies) if self.copies is not None else None,
+            "sides": sorted(self.sides),
+            "media": sorted(self.media),
+            "compression": sorted(self.compression),
+            "multiple_documents": self.multiple_documents,
+        }
@@ -0,0 +1,205 @@
+"""Long-lived IPP client for IPP Printer Service."""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator, Callable, Mapping
+import logging
+from typing import Any
+
+import aiohttp
+from pyipp import IPP
+from pyipp.enums import IppOperation
+
+from homeassistant.const import (
+    CONF_HOST,
+    CONF_PASSWORD,
+    CONF_PORT,
+    CONF_SSL,
+    CONF_USERNAME,
+    CONF_VERIFY_SSL,
+)
+from homeassistant.core import HomeAssistant
+from homeassistant.util.ssl import (
+    get_default_context,
+    get_default_no_verify_context,
+)
+
+from .const import CONF_BASE_PATH
+from .metrics import Metrics
+from .resilience import (
+    IDEMPOTENT_OPERATIONS,
+    async_call,
+    async_get_breaker,
+    is_retryable,
+    is_unprocessed,
+)
+from .streaming import async_execute, async_send_stream
+
+_LOGGER = logging.getLogger(__name__)
+
+# Maximum number of simultaneous connections to the printer host
+CONNECTION_LIMIT_PER_HOST = 4
+# Idle connections are kept open across polls so TLS handshakes are not repeated
+KEEPALIVE_TIMEOUT = 75
+
+
+class IPPPrinterServiceClient:
+    """IPP client owning a dedicated, keep-alive connection pool.
+
+    One instance is created per config entry and shared by the coordinator,
+    the services and the config flow, so polls and print jobs reuse the same
+    open (and, for IPPS, already negotiated) connections.
+
+    Every request goes through the circuit breaker of the host and is
+    retried with back-off when that cannot make the printer act twice.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        data: Mapping[str, Any],
+        metrics: Metrics | None = None,
+    ) -> None:
+        """Initialize the client.
+
+        With ``metrics``, DNS, connect and IPP encoding times are recorded.
+        """
+        self.hass = hass
+        self.metrics = metrics
+        self.host: str = data[CONF_HOST]
+        self.port: int = data[CONF_PORT]
+        self.tls: bool = data.get(CONF_SSL, False)
+        self.verify_ssl: bool = data.get(CONF_VERIFY_SSL, True)
+        self.username: str | None = data.get(CONF_USERNAME)
+        self.password: str | None = data.get(CONF_PASSWORD)
+        self.base_path: str = data.get(CONF_BASE_PATH) or "/"
+
+        # The shared SSL context lets every pooled connection reuse the same
+        # certificate store instead of loading it per request.
+        ssl_context = (
+            get_default_context() if self.verify_ssl else get_default_no_verify_context()
+        )
+        self._connector = aiohttp.TCPConnector(
+            limit_per_host=CONNECTION_LIMIT_PER_HOST,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+            ssl=ssl_context,
+        )
+        self.session = aiohttp.ClientSession(
+            connector=self._connector,
+            trace_configs=[metrics.trace_config()] if metrics is not None else None,
+        )
+        self.ipp = self.for_path(self.base_path)
+        self.breaker = async_get_breaker(hass, self.host, self.port)
+
+    @property
+    def connection_key(self) -> tuple[Any, ...]:
+        """Return the key identifying the server and credentials of this client."""
+        return (
+            self.host,
+            self.port,
+            self.tls,
+            self.verify_ssl,
+            self.username,
+            self.password,
+        )
+
+    @property
+    def closed(self) -> bool:
+        """Return True if the client was closed."""
+        return self.session.closed
+
+    def for_path(self, base_path: str) -> IPP:
+        """Return a pyipp client for another path on the same server and pool."""
+        return IPP(
+            host=self.host,
+            port=self.port,
+            base_path=base_path,
+            tls=self.tls,
+            verify_ssl=self.verify_ssl,
+            session=self.session,
+            username=self.username,
+            password=self.password,
+        )
+
+    async def printer_attributes(self, requested: list[str]) -> dict[str, Any]:
+        """Get only the requested printer attributes."""
+        response = await self.execute(
+            IppOperation.GET_PRINTER_ATTRIBUTES,
+            {
+                "operation-attributes-tag": {
+                    "requested-attributes": requested,
+                },
+            },
+        )
+        return next(iter(response["printers"]), {})
+
+    async def execute(
+        self,
+        operation: IppOperation,
+        message: dict[str, Any],
+        path: str | None = None,
+    ) -> dict[str, Any]:
+        """Send an IPP request to the printer, or to another path of the server."""
+        ipp = self.ipp if path is None else self.for_path(path)
+        return await async_call(
+            self.breaker,
+            lambda: ipp.execute(operation, message),
+            _retry_condition(operation),
+        )
+
+    async def execute_extended(
+        self,
+        operation: IppOperation,
+        message: dict[str, Any],
+        timeout: float | None = None,
+    ) -> dict[str, Any]:
+        """Send an IPP request using attributes or groups pyipp cannot encode."""
+        return await async_call(
+            self.breaker,
+            lambda: async_execute(self.ipp, operation, message, timeout, self.metrics),
+            _retry_condition(operation),
+        )
+
+    async def send_stream(
+        self,
+        operation: IppOperation,
+        message: dict[str, Any],
+        chunks: AsyncIterator[bytes],
+    ) -> dict[str, Any]:
+        """Send an IPP request with document data streamed from chunks.
+
+        The request is only sent again when no chunk was read yet, so a new
+        attempt sends the whole document, and the printer did not act on it.
+        """
+        started = False
+
+        async def _async_tracked() -> AsyncIterator[bytes]:
+            nonlocal started
+            started = True
+            async for chunk in chunks:
+                yield chunk
+
+        return await async_call(
+            self.breaker,
+            lambda: async_send_stream(
+                self.ipp, operation, message, _async_tracked(), self.metrics
+            ),
+            lambda err: not started and is_retryable(err) and is_unprocessed(err),
+        )
+
+    async def close(self) -> None:
+        """Close the connection pool."""
+        if not self.session.closed:
+            _LOGGER.debug("Closing IPP client for %s:%s", self.host, self.port)
+            await self.session.close()
+
+
+def _retry_condition(operation: IppOperation) -> Callable[[BaseException], bool]:
+    """Return whether a failed request of an operation may be sent again.
+
+    Requests changing the printer's state are only sent again when the
+    printer certainly did not act on them, so a job is never created twice.
+    """
+    if operation in IDEMPOTENT_OPERATIONS:
+        return is_retryable
+    return lambda err: is_retryable(err) and is_unprocessed(err)
@@ -3,10 +3,10 @@
 from __future__ import annotations
 
 import logging
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import voluptuous as vol
-from pyipp import IPP, IPPConnectionError, IPPError
+from pyipp import IPPConnectionError, IPPError
 
 from homeassistant import config_entries
 from homeassistant.const import (
@@ -19,16 +19,42 @@ from homeassistant.const import (
 )
 from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+import homeassistant.helpers.config_validation as cv
 
+from .client import IPPPrinterServiceClient
 from .const import (
     CONF_BASE_PATH,
+    CONF_CACHE_SIZE,
+    CONF_CHUNK_SIZE,
+    CONF_COMPRESSION,
+    CONF_METRICS,
+    CONF_NOTIFICATIONS,
     CONF_PRINTER_NAME,
+    CONF_QUEUE_SIZE,
+    CONF_QUEUE_WORKERS,
+    CONF_SHARED_POLLING,
     CONF_SIMULATION_MODE,
+    CONF_SPOOL_SIZE,
+    DEFAULT_CACHE_SIZE,
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_QUEUE_SIZE,
+    DEFAULT_QUEUE_WORKERS,
+    DEFAULT_SPOOL_SIZE,
     DOMAIN,
 )
+from .discovery import (
+    DATA_ZEROCONF_TARGETS,
+    DiscoveredPrinter,
+    DiscoveryTarget,
+    async_discover,
+    parse_hosts,
+    printer_unique_id,
+)
 from pyipp.enums import IppOperation
 
+if TYPE_CHECKING:
+    from homeassistant.helpers.service_info.zeroconf import ZeroconfServiceInfo
+
 _LOGGER = logging.getLogger(__name__)
 
 STEP_USER_DATA_SCHEMA = vol.Schema(
@@ -42,16 +68,41 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
     }
 )
 
+CONF_HOSTS = "hosts"
+CONF_PRINTERS = "printers"
+
+STEP_DISCOVER_DATA_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_HOSTS, default=""): str,
+        vol.Required(CONF_PORT, default=631): int,
+        vol.Optional(CONF_USERNAME): str,
+        vol.Optional(CONF_PASSWORD): str,
+        vol.Required(CONF_SSL, default=False): bool,
+        vol.Required(CONF_VERIFY_SSL, default=True): bool,
+    }
+)
+
 
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for IPP Printer Service."""
 
     VERSION = 1
 
+    def __init__(self) -> None:
+        """Initialize the flow."""
+        self._discovery_data: dict[str, Any] = {}
+        self._discovered: dict[str, DiscoveredPrinter] = {}
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
-        """Handle the initial step."""
+        """Let the user enter a server or discover printers."""
+        return self.async_show_menu(step_id="user", menu_options=["host", "discover"])
+
+    async def async_step_host(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Handle a server entered by the user."""
         errors: dict[str, str] = {}
         if user_input is not None:
             try:
@@ -72,7 +123,7 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     return await self.async_step_printer()
 
         return self.async_show_form(
-            step_id="user",
+            step_id="host",
             data_schema=STEP_USER_DATA_SCHEMA,
             errors=errors,
         )
@@ -90,6 +141,25 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             # Construct base path from printer name
             data[CONF_BASE_PATH] = f"/printers/{printer_name}"
 
+            if self.source != config_entries.SOURCE_RECONFIGURE:
+                printer = next(
+                    (
+                        printer
+                        for printer in self._printers
+                        if printer.get("printer-name") == printer_name
+                    ),
+                    {},
+                )
+                await self.async_set_unique_id(
+                    printer_unique_id(
+                        printer.get("printer-uuid"),
+                        data[CONF_HOST],
+                        data[CONF_PORT],
+                        data[CONF_BASE_PATH],
+                    )
+                )
+                self._abort_if_unique_id_configured()
+
             return self.async_create_entry(title=printer_name, data=data)
 
         printer_options = [p["printer-name"] for p in self._printers]
@@ -103,29 +173,31 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     async def _get_printers(self, data: dict[str, Any]) -> list[dict[str, Any]]:
         """Retrieve list of printers from CUPS."""
-        session = async_get_clientsession(self.hass)
-
-        # Connect to CUPS root to list printers
-        ipp = IPP(
-            host=data[CONF_HOST],
-            port=data[CONF_PORT],
-            base_path="/",  # Use root path for listing
-            tls=data[CONF_SSL],
-            verify_ssl=data[CONF_VERIFY_SSL],
-            session=session,
-            username=data.get(CONF_USERNAME),
-            password=data.get(CONF_PASSWORD),
-        )
+        # Reuse the connection pool of a loaded entry on the same server
+        client = self._async_get_loaded_client(data)
+        owns_client = client is None
+        if client is None:
+            client = IPPPrinterServiceClient(self.hass, data)
 
-        response = await ipp.execute(
-            IppOperation.CUPS_GET_PRINTERS,
-            {
-                "operation-attributes-tag": {
-                    "requesting-user-name": "Home Assistant",
-                    "requested-attributes": ["printer-name", "printer-uri-supported"],
-                }
-            },
-        )
+        try:
+            # Connect to CUPS root to list printers
+            response = await client.execute(
+                IppOperation.CUPS_GET_PRINTERS,
+                {
+                    "operation-attributes-tag": {
+                        "requesting-user-name": "Home Assistant",
+                        "requested-attributes": [
+                            "printer-name",
+                            "printer-uri-supported",
+                            "printer-uuid",
+                        ],
+                    }
+                },
+                path="/",
+            )
+        finally:
+            if owns_client:
+                await client.close()
 
         # The response structure for CUPS_GET_PRINTERS is a list of printer attributes
         # pyipp might parse it into 'printers' key or return raw attributes list
@@ -146,6 +218,27 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             "printer-attributes-tag", []
         )
 
+    @callback
+    def _async_get_loaded_client(
+        self, data: dict[str, Any]
+    ) -> IPPPrinterServiceClient | None:
+        """Return the client of a loaded entry connected with the same settings."""
+        key = (
+            data[CONF_HOST],
+            data[CONF_PORT],
+            data[CONF_SSL],
+            data[CONF_VERIFY_SSL],
+            data.get(CONF_USERNAME),
+            data.get(CONF_PASSWORD),
+        )
+        for entry in self.hass.config_entries.async_entries(DOMAIN):
+            if entry.state is not config_entries.ConfigEntryState.LOADED:
+                continue
+            client = entry.runtime_data.client
+            if client.connection_key == key and not client.closed:
+                return client
+        return None
+
     @staticmethod
     @callback
     def async_get_options_flow(
@@ -158,7 +251,189 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
         """Handle re-configuration."""
-        return await self.async_step_user(user_input)
+        return await self.async_step_host(user_input)
+
+    async def async_step_discover(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Probe a list of hosts and the printers announced over zeroconf."""
+        errors: dict[str, str] = {}
+        zeroconf_targets: dict[str, DiscoveryTarget] = self.hass.data.get(
+            DATA_ZEROCONF_TARGETS, {}
+        )
+        if user_input is not None:
+            try:
+                hosts = parse_hosts(user_input.get(CONF_HOSTS, ""))
+            except ValueError as err:
+                _LOGGER.debug("Invalid hosts: %s", err)
+                errors[CONF_HOSTS] = "invalid_hosts"
+            else:
+                targets = [
+                    DiscoveryTarget(host, user_input[CONF_PORT], user_input[CONF_SSL])
+                    for host in hosts
+                ]
+                targets.extend(zeroconf_targets.values())
+                if not targets:
+                    errors[CONF_HOSTS] = "invalid_hosts"
+                elif await self._async_discover(targets, user_input):
+                    return await self.async_step_discovered()
+                else:
+                    errors["base"] = "no_printers_found"
+
+        return self.async_show_form(
+            step_id="discover",
+            data_schema=STEP_DISCOVER_DATA_SCHEMA,
+            errors=errors,
+            description_placeholders={"zeroconf": str(len(zeroconf_targets))},
+        )
+
+    async def async_step_zeroconf(
+        self, discovery_info: ZeroconfServiceInfo
+    ) -> FlowResult:
+        """Handle a printer announced over zeroconf."""
+        resource = discovery_info.properties.get("rp")
+        target = DiscoveryTarget(
+            host=discovery_info.host,
+            port=discovery_info.port or 631,
+            tls=discovery_info.type.startswith("_ipps."),
+            base_path=f"/{resource.strip('/')}" if resource else None,
+        )
+        self.hass.data.setdefault(DATA_ZEROCONF_TARGETS, {})[
+            f"{target.host}:{target.port}"
+        ] = target
+        if target.base_path:
+            self._async_abort_entries_match(
+                {
+                    CONF_HOST: target.host,
+                    CONF_PORT: target.port,
+                    CONF_BASE_PATH: target.base_path,
+                }
+            )
+        if uuid := discovery_info.properties.get("UUID"):
+            # Follow the printer when its address changed
+            await self.async_set_unique_id(
+                printer_unique_id(uuid, target.host, target.port)
+            )
+            self._abort_if_unique_id_configured(
+                updates={CONF_HOST: target.host, CONF_PORT: target.port}
+            )
+
+        # A CUPS server announces every queue, one flow lists them all
+        if any(
+            flow["context"].get(CONF_HOST) == target.host
+            for flow in self._async_in_progress()
+        ):
+            return self.async_abort(reason="already_in_progress")
+        self.context[CONF_HOST] = target.host
+
+        # Printers announce themselves with self-signed certificates
+        printers = await self._async_discover([target], {CONF_VERIFY_SSL: False})
+        if not printers:
+            return self.async_abort(reason="no_printers_found")
+        if self.unique_id is None:
+            announced = next(
+                (
+                    printer
+                    for printer in printers
+                    if printer.base_path == target.base_path
+                ),
+                printers[0] if len(printers) == 1 else None,
+            )
+            await self.async_set_unique_id(
+                announced.unique_id
+                if announced is not None
+                else printer_unique_id(None, target.host, target.port)
+            )
+            self._abort_if_unique_id_configured()
+        self.context["title_placeholders"] = {"name": target.host}
+        return await self.async_step_discovered()
+
+    async def async_step_discovered(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Let the user pick the discovered printers to add."""
+        if user_input is not None:
+            selected = [
+                self._discovered[key]
+                for key in user_input[CONF_PRINTERS]
+                if key in self._discovered
+            ]
+            if not selected:
+                return self.async_abort(reason="no_printers_selected")
+            first = selected[0]
+            # The entry is for the first printer picked, not the announced one
+            await self.async_set_unique_id(first.unique_id, raise_on_progress=False)
+            self._abort_if_unique_id_configured()
+            # Every other printer gets its own entry through an import flow
+            for printer in selected[1:]:
+                self.hass.async_create_task(
+                    self.hass.config_entries.flow.async_init(
+                        DOMAIN,
+                        context={
+                            "source": config_entries.SOURCE_IMPORT,
+                            "unique_id": printer.unique_id,
+                        },
+                        data=printer.as_entry_data(self._discovery_data),
+                    )
+                )
+            return self.async_create_entry(
+                title=first.name, data=first.as_entry_data(self._discovery_data)
+            )
+
+        return self.async_show_form(
+            step_id="discovered",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_PRINTERS, default=list(self._discovered)
+                    ): cv.multi_select(
+                        {
+                            key: printer.label
+                            for key, printer in self._discovered.items()
+                        }
+                    )
+                }
+            ),
+            description_placeholders={"count": str(len(self._discovered))},
+        )
+
+    async def async_step_import(self, import_data: dict[str, Any]) -> FlowResult:
+        """Create an entry for a printer picked in a discovery."""
+        if self.unique_id is not None:
+            self._abort_if_unique_id_configured()
+        self._async_abort_entries_match(
+            {
+                CONF_HOST: import_data[CONF_HOST],
+                CONF_PORT: import_data[CONF_PORT],
+                CONF_BASE_PATH: import_data[CONF_BASE_PATH],
+            }
+        )
+        return self.async_create_entry(
+            title=import_data[CONF_PRINTER_NAME], data=import_data
+        )
+
+    async def _async_discover(
+        self, targets: list[DiscoveryTarget], data: dict[str, Any]
+    ) -> list[DiscoveredPrinter]:
+        """Probe targets, keeping the printers that are not configured yet."""
+        configured = {
+            (entry.data[CONF_HOST], entry.data[CONF_PORT], entry.data[CONF_BASE_PATH])
+            for entry in self._async_current_entries(include_ignore=False)
+        }
+        printers = await async_discover(self.hass, targets, data)
+        self._discovery_data = data
+        self._discovered = {
+            printer.key: printer
+            for printer in sorted(printers, key=lambda printer: printer.key)
+            if (printer.host, printer.port, printer.base_path) not in configured
+        }
+        _LOGGER.debug(
+            "Discovered %d printers on %d hosts, %d not configured yet",
+            len(printers),
+            len(targets),
+            len(self._discovered),
+        )
+        return list(self._discovered.values())
 
 
 class OptionsFlowHandler(config_entries.OptionsFlow):
@@ -180,7 +455,57 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                         default=self.config_entry.options.get(
                             CONF_SIMULATION_MODE, False
                         ),
-                    ): bool
+                    ): bool,
+                    vol.Optional(
+                        CONF_CHUNK_SIZE,
+                        default=self.config_entry.options.get(
+                            CONF_CHUNK_SIZE, DEFAULT_CHUNK_SIZE
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=4, max=4096)),
+                    vol.Optional(
+                        CONF_QUEUE_WORKERS,
+                        default=self.config_entry.options.get(
+                            CONF_QUEUE_WORKERS, DEFAULT_QUEUE_WORKERS
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=8)),
+                    vol.Optional(
+                        CONF_QUEUE_SIZE,
+                        default=self.config_entry.options.get(
+                            CONF_QUEUE_SIZE, DEFAULT_QUEUE_SIZE
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=1000)),
+                    vol.Optional(
+                        CONF_CACHE_SIZE,
+                        default=self.config_entry.options.get(
+                            CONF_CACHE_SIZE, DEFAULT_CACHE_SIZE
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=10240)),
+                    vol.Optional(
+                        CONF_SPOOL_SIZE,
+                        default=self.config_entry.options.get(
+                            CONF_SPOOL_SIZE, DEFAULT_SPOOL_SIZE
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=10, max=102400)),
+                    vol.Optional(
+                        CONF_NOTIFICATIONS,
+                        default=self.config_entry.options.get(
+                            CONF_NOTIFICATIONS, False
+                        ),
+                    ): bool,
+                    vol.Optional(
+                        CONF_COMPRESSION,
+                        default=self.config_entry.options.get(CONF_COMPRESSION, False),
+                    ): bool,
+                    vol.Optional(
+                        CONF_SHARED_POLLING,
+                        default=self.config_entry.options.get(
+                            CONF_SHARED_POLLING, True
+                        ),
+                    ): bool,
+                    vol.Optional(
+                        CONF_METRICS,
+                        default=self.config_entry.options.get(CONF_METRICS, False),
+                    ): bool,
                 }
             ),
         )
@@ -5,3 +5,24 @@ DOMAIN = "ipp_printer_service"
 CONF_PRINTER_NAME = "printer_name"
 CONF_BASE_PATH = "base_path"
 CONF_SIMULATION_MODE = "simulation_mode"
+CONF_CHUNK_SIZE = "chunk_size"
+
+# Size in KiB of the chunks streamed from the document source to the printer
+DEFAULT_CHUNK_SIZE = 64
+CONF_QUEUE_WORKERS = "queue_workers"
+CONF_QUEUE_SIZE = "queue_size"
+
+DEFAULT_QUEUE_WORKERS = 1
+DEFAULT_QUEUE_SIZE = 50
+CONF_CACHE_SIZE = "cache_size"
+
+# Size in MiB of the on-disk cache of downloaded documents, 0 disables it
+DEFAULT_CACHE_SIZE = 100
+CONF_NOTIFICATIONS = "notifications"
+CONF_SHARED_POLLING = "shared_polling"
+CONF_COMPRESSION = "compression"
+CONF_SPOOL_SIZE = "spool_size"
+
+# Size in MiB of the documents a printer may hold on disk waiting to be printed
+DEFAULT_SPOOL_SIZE = 500
+CONF_METRICS = "metrics"
@@ -2,19 +2,81 @@
 
 from __future__ import annotations
 
+from collections import Counter
 import logging
-from datetime import timedelta
+import time
+from datetime import datetime, timedelta
 from typing import Any
 from dataclasses import dataclass
 
+from pyipp import IPPError
+from pyipp.const import DEFAULT_PRINTER_ATTRIBUTES
+from pyipp.models import Printer
+
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN
+from .client import IPPPrinterServiceClient
+from .cache import DocumentCache
+from .capabilities import PrinterCapabilities
+from .const import (
+    CONF_CACHE_SIZE,
+    CONF_NOTIFICATIONS,
+    CONF_PRINTER_NAME,
+    CONF_QUEUE_SIZE,
+    CONF_QUEUE_WORKERS,
+    CONF_SHARED_POLLING,
+    CONF_SPOOL_SIZE,
+    DEFAULT_CACHE_SIZE,
+    DEFAULT_QUEUE_SIZE,
+    DEFAULT_QUEUE_WORKERS,
+    DEFAULT_SPOOL_SIZE,
+    DOMAIN,
+)
+from .jobs import JobTracker
+from .metrics import Metrics
+from .notifications import PrinterSubscription
+from .print_queue import STATUS_FAILED, PrintJob, PrintQueue
+from .server import CUPSServer, async_get_server, async_release_server, is_cups_queue
+from .spool import Spool
 
 _LOGGER = logging.getLogger(__name__)
 
+DEFAULT_UPDATE_INTERVAL = timedelta(seconds=30)
+# Used while jobs are queued or the printer is printing
+FAST_UPDATE_INTERVAL = timedelta(seconds=5)
+# Idle printers back off up to these intervals
+MAX_IDLE_UPDATE_INTERVAL = timedelta(minutes=5)
+MAX_SUBSCRIBED_UPDATE_INTERVAL = timedelta(minutes=15)
+MAX_ERROR_UPDATE_INTERVAL = timedelta(minutes=10)
+# Number of unchanged idle polls before the interval doubles
+IDLE_POLLS_PER_STEP = 4
+
+# Attributes the coordinator itself needs on every poll, entities add theirs
+STATUS_ATTRIBUTES = (
+    "printer-is-accepting-jobs",
+    "printer-name",
+    "printer-state",
+    "printer-up-time",
+)
+# Attributes describing the printer and what it supports, fetched rarely
+CAPABILITY_ATTRIBUTES = (
+    *DEFAULT_PRINTER_ATTRIBUTES,
+    "printer-state-reasons",
+    "compression-supported",
+    "copies-supported",
+    "document-format-supported",
+    "media-supported",
+    "multiple-document-jobs-supported",
+    "operations-supported",
+    "sides-supported",
+)
+CAPABILITY_UPDATE_INTERVAL = timedelta(hours=6)
+# Weight of the latest request in the average printer latency
+LATENCY_SMOOTHING = 0.3
+
 
 @dataclass
 class IPPPrinterServiceData:
@@ -33,47 +95,338 @@ class IPPPrinterServiceCoordinator(DataUpdateCoordinator[IPPPrinterServiceData])
             hass,
             _LOGGER,
             name=DOMAIN,
-            update_interval=timedelta(seconds=30),
+            update_interval=DEFAULT_UPDATE_INTERVAL,
             config_entry=entry,
         )
+        self.polls = 0
+        self.pushes = 0
+        self.latency: float | None = None
+        self.attributes: dict[str, Any] = {}
+        self.poll_failures = 0
+        self.state_writes = 0
+        self.state_writes_suppressed = 0
+        self.last_poll_success: datetime | None = None
+        self._consecutive_failures = 0
+        self._idle_polls = 0
+        self._last_state: str | None = None
+        self.metrics = Metrics()
+        self.client = IPPPrinterServiceClient(hass, entry.data, self.metrics)
+        self.queue = PrintQueue(
+            hass,
+            entry.title,
+            workers=entry.options.get(CONF_QUEUE_WORKERS, DEFAULT_QUEUE_WORKERS),
+            max_size=entry.options.get(CONF_QUEUE_SIZE, DEFAULT_QUEUE_SIZE),
+            on_change=self._async_queue_changed,
+        )
+        self.queue.async_add_listener(self._async_job_changed)
+        self.cache: DocumentCache | None = None
+        if cache_size := entry.options.get(CONF_CACHE_SIZE, DEFAULT_CACHE_SIZE):
+            self.cache = DocumentCache(
+                hass,
+                hass.config.path(DOMAIN, "cache", entry.entry_id),
+                cache_size * 1024 * 1024,
+            )
+        self.spool = Spool(
+            hass,
+            hass.config.path(DOMAIN, "spool", entry.entry_id),
+            entry.options.get(CONF_SPOOL_SIZE, DEFAULT_SPOOL_SIZE) * 1024 * 1024,
+            on_change=self.async_update_listeners,
+        )
+        self.subscription: PrinterSubscription | None = None
+        if entry.options.get(CONF_NOTIFICATIONS, False):
+            self.subscription = PrinterSubscription(
+                hass, self.client, self._async_handle_events
+            )
+        self.jobs = JobTracker(
+            hass, entry.entry_id, self.client, self.async_update_listeners
+        )
+        self._printer_name: str = entry.data[CONF_PRINTER_NAME]
+        self._printer: Printer | None = None
+        self._entity_attributes: Counter[str] = Counter()
+        self._capability_attributes: dict[str, Any] = {}
+        self.capabilities = PrinterCapabilities()
+        self.capabilities_updated: datetime | None = None
+        self.server: CUPSServer | None = None
+        if entry.options.get(CONF_SHARED_POLLING, True) and is_cups_queue(entry.data):
+            # Queues of the same CUPS server are all polled by one request
+            self.server = async_get_server(hass, self.client)
+            self.server.async_add_listener(
+                entry.entry_id, self._printer_name, self._async_handle_server_update
+            )
         self.data = IPPPrinterServiceData(printer=None)
 
-    async def _async_update_data(self) -> IPPPrinterServiceData:
-        """Update data via library."""
-        from pyipp import IPP, IPPError
-        from homeassistant.helpers.aiohttp_client import async_get_clientsession
-        from .const import CONF_BASE_PATH, CONF_PRINTER_NAME
-        from homeassistant.const import (
-            CONF_HOST,
-            CONF_PASSWORD,
-            CONF_PORT,
-            CONF_SSL,
-            CONF_USERNAME,
-            CONF_VERIFY_SSL,
+    @property
+    def busy(self) -> bool:
+        """Return True while jobs are queued, sent or printed."""
+        printer = self.data.printer if self.data else None
+        return bool(
+            self.queue.depth
+            or self.queue.active
+            or (printer is not None and printer.state.printer_state == "printing")
         )
 
-        data = self.config_entry.data
-        session = async_get_clientsession(self.hass)
-
-        ipp = IPP(
-            host=data[CONF_HOST],
-            port=data[CONF_PORT],
-            base_path=data[CONF_BASE_PATH],
-            tls=data[CONF_SSL],
-            verify_ssl=data[CONF_VERIFY_SSL],
-            session=session,
-            username=data.get(CONF_USERNAME),
-            password=data.get(CONF_PASSWORD),
+    @property
+    def load(self) -> int:
+        """Return the number of jobs waiting, being sent or on the printer."""
+        return self.queue.depth + self.queue.active + self.jobs.tracked
+
+    @property
+    def accepting(self) -> bool:
+        """Return True if the printer is reachable and accepts jobs."""
+        printer = self.data.printer if self.data else None
+        return (
+            self.last_update_success
+            and printer is not None
+            and printer.state.printer_state != "stopped"
+            and self.attributes.get("printer-is-accepting-jobs") is not False
         )
 
+    @callback
+    def async_record_latency(self, seconds: float) -> None:
+        """Add the duration of a request to the average printer latency."""
+        if self.latency is None:
+            self.latency = seconds
+        else:
+            self.latency += LATENCY_SMOOTHING * (seconds - self.latency)
+
+    @property
+    def requested_attributes(self) -> list[str]:
+        """Return the attributes fetched on every poll."""
+        return sorted({*STATUS_ATTRIBUTES, *self._entity_attributes})
+
+    @callback
+    def async_request_attributes(self, attributes: tuple[str, ...]) -> CALLBACK_TYPE:
+        """Poll printer attributes for an entity until the callback is called."""
+        self._entity_attributes.update(attributes)
+
+        @callback
+        def _async_remove() -> None:
+            self._entity_attributes.subtract(attributes)
+            self._entity_attributes += Counter()
+
+        return _async_remove
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return the polling counters."""
+        return {
+            "update_interval": self.update_interval.total_seconds()
+            if self.update_interval
+            else None,
+            "polls": self.polls,
+            "pushes": self.pushes,
+            "poll_failures": self.poll_failures,
+            "state_writes": self.state_writes,
+            "state_writes_suppressed": self.state_writes_suppressed,
+            "last_poll_success": self.last_poll_success.isoformat()
+            if self.last_poll_success
+            else None,
+            "staleness": (dt_util.utcnow() - self.last_poll_success).total_seconds()
+            if self.last_poll_success
+            else None,
+            "subscription": self.subscription.stats if self.subscription else None,
+            "server": self.server.stats if self.server else None,
+            "latency": round(self.latency, 3) if self.latency is not None else None,
+            "requested_attributes": self.requested_attributes,
+            "capabilities_updated": self.capabilities_updated.isoformat()
+            if self.capabilities_updated
+            else None,
+        }
+
+    @callback
+    def async_record_state_write(self, suppressed: bool) -> None:
+        """Count an entity update, written or skipped as unchanged."""
+        if suppressed:
+            self.state_writes_suppressed += 1
+            self.metrics.increment("state_writes_suppressed")
+        else:
+            self.state_writes += 1
+            self.metrics.increment("state_writes")
+
+    @callback
+    def async_invalidate_capabilities(self) -> None:
+        """Fetch the capabilities again on the next poll."""
+        self.capabilities_updated = None
+
+    async def async_load_history(self) -> None:
+        """Restore the job history, showing its latest job as the last job."""
+        await self.jobs.async_load()
+        if self.jobs.history:
+            self.data.last_print_job = self.jobs.history[-1]
+
+    async def async_close(self) -> None:
+        """Stop the background work and release the connections."""
+        await self.queue.async_stop()
+        await self.jobs.async_stop()
+        if self.subscription is not None:
+            await self.subscription.async_stop()
+        if self.server is not None:
+            self.server.async_remove_listener(self.config_entry.entry_id)
+            await async_release_server(self.hass, self.server)
+            self.server = None
+        if self.cache is not None:
+            await self.cache.async_clear()
+        await self.spool.async_stop()
+        await self.spool.async_clear()
+        await self.client.close()
+
+    async def _async_update_data(self) -> IPPPrinterServiceData:
+        """Update data via library."""
+        self.polls += 1
+        start = time.monotonic()
         try:
-            printer = await ipp.printer()
-            # Preserve last print job if it exists
-            last_job = self.data.last_print_job if self.data else None
-            return IPPPrinterServiceData(printer=printer, last_print_job=last_job)
+            with self.metrics.span("poll"):
+                printer = await self._async_fetch_printer()
         except IPPError as error:
+            self.poll_failures += 1
+            self.metrics.increment("poll_failures")
+            self._consecutive_failures += 1
+            self._idle_polls = 0
+            self.update_interval = min(
+                DEFAULT_UPDATE_INTERVAL * 2**self._consecutive_failures,
+                MAX_ERROR_UPDATE_INTERVAL,
+            )
             raise UpdateFailed(error) from error
 
+        self.async_record_latency(time.monotonic() - start)
+        return self._async_process_printer(printer)
+
+    async def _async_fetch_printer(self) -> Printer:
+        """Fetch the printer, through the shared server when possible."""
+        if (
+            self.capabilities_updated is None
+            or dt_util.utcnow() - self.capabilities_updated
+            > CAPABILITY_UPDATE_INTERVAL
+        ):
+            attributes = await self.client.printer_attributes(
+                sorted({*CAPABILITY_ATTRIBUTES, *self.requested_attributes})
+            )
+            self._capability_attributes = attributes
+            self.capabilities = PrinterCapabilities.from_attributes(attributes)
+            self.capabilities_updated = dt_util.utcnow()
+            return self._async_parse_printer(attributes)
+
+        if self.server is None:
+            attributes = await self.client.printer_attributes(
+                self.requested_attributes
+            )
+            return self._async_parse_printer(attributes)
+
+        # Data pushed by another entry within half an interval is fresh enough
+        shared = await self.server.async_get_printer(
+            self.config_entry.entry_id,
+            self._printer_name,
+            max_age=(self.update_interval or DEFAULT_UPDATE_INTERVAL) / 2,
+            attributes=self.requested_attributes,
+        )
+        if shared is None:
+            raise IPPError(f"Printer {self._printer_name} not found on server")
+        return self._async_parse_printer(shared)
+
+    @callback
+    def _async_parse_printer(self, attributes: dict[str, Any]) -> Printer:
+        """Build or update the printer model from its attributes.
+
+        Polls only return the requested attributes, the others are taken
+        from the cached capabilities.
+        """
+        requested = self.requested_attributes
+        attributes = {
+            **{
+                name: value
+                for name, value in self._capability_attributes.items()
+                if name not in requested
+            },
+            **attributes,
+        }
+        self.attributes = attributes
+        if self._printer is None:
+            self._printer = Printer.from_dict(attributes)
+        else:
+            uptime = self._printer.info.uptime
+            self._printer.update_from_dict(attributes)
+            if self._printer.info.uptime < uptime:
+                # The printer restarted and may have changed its capabilities
+                self.async_invalidate_capabilities()
+        return self._printer
+
+    @callback
+    def _async_process_printer(self, printer: Printer) -> IPPPrinterServiceData:
+        """Return the new data and adapt the interval to the printer state."""
+        self._consecutive_failures = 0
+        self.last_poll_success = dt_util.utcnow()
+        # Preserve last print job if it exists
+        last_job = self.data.last_print_job if self.data else None
+        data = IPPPrinterServiceData(printer=printer, last_print_job=last_job)
+
+        state = printer.state.printer_state
+        if state != self._last_state:
+            self._idle_polls = 0
+        self._last_state = state
+        self.update_interval = self._async_next_interval(state)
+        return data
+
+    @callback
+    def _async_handle_server_update(self, attributes: dict[str, Any]) -> None:
+        """Use the printer attributes fetched for another entry of the server."""
+        self.pushes += 1
+        printer = self._async_parse_printer(attributes)
+        self.async_set_updated_data(self._async_process_printer(printer))
+
+    @callback
+    def _async_next_interval(self, state: str) -> timedelta:
+        """Return the poll interval matching the printer activity."""
+        if self.queue.depth or self.queue.active or state == "printing":
+            self._idle_polls = 0
+            return FAST_UPDATE_INTERVAL
+
+        # Back off while nothing changes, faster when events report changes
+        self._idle_polls += 1
+        max_interval = MAX_IDLE_UPDATE_INTERVAL
+        if self.subscription is not None and self.subscription.active:
+            max_interval = MAX_SUBSCRIBED_UPDATE_INTERVAL
+        return min(
+            DEFAULT_UPDATE_INTERVAL * 2 ** (self._idle_polls // IDLE_POLLS_PER_STEP),
+            max_interval,
+        )
+
+    @callback
+    def _async_queue_changed(self) -> None:
+        """Poll quickly as soon as jobs are submitted."""
+        self.async_update_listeners()
+        if self.busy and (
+            self.update_interval is None or self.update_interval > FAST_UPDATE_INTERVAL
+        ):
+            self._idle_polls = 0
+            self.update_interval = FAST_UPDATE_INTERVAL
+            self._schedule_refresh()
+
+    @callback
+    def _async_job_changed(self, job: PrintJob) -> None:
+        """Record jobs that failed before reaching the printer in the history."""
+        if job.status != STATUS_FAILED:
+            return
+        self.async_set_last_job(
+            self.jobs.async_add(
+                {
+                    "file_path": job.description,
+                    "timestamp": str(datetime.now()),
+                    "status": "failed",
+                    "state": "failed",
+                    "error": str(job.error),
+                    "job_handle": job.handle,
+                }
+            )
+        )
+
+    @callback
+    def _async_handle_events(self, events: list[dict[str, Any]]) -> None:
+        """Refresh the printer state when the printer reports events."""
+        _LOGGER.debug("Received %d events from %s", len(events), self.client.host)
+        self._idle_polls = 0
+        self.jobs.async_poke()
+        self.hass.async_create_task(self.async_request_refresh())
+
     @callback
     def async_set_last_job(self, job_details: dict[str, Any]) -> None:
         """Update the last print job details."""
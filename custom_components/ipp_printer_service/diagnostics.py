@@ -0,0 +1,46 @@
+"""Diagnostics support for IPP Printer Service."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from .coordinator import IPPPrinterServiceCoordinator
+from .render import async_get_renderer
+
+TO_REDACT = {CONF_PASSWORD, CONF_USERNAME}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: IPPPrinterServiceCoordinator = entry.runtime_data
+
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "polling": coordinator.stats,
+        "capabilities": coordinator.capabilities.as_dict(),
+        "metrics": coordinator.metrics.as_dict(),
+        "circuit_breaker": coordinator.client.breaker.stats,
+        "queue": {
+            "depth": coordinator.queue.depth,
+            "active": coordinator.queue.active,
+            "workers": coordinator.queue.workers,
+            "max_size": coordinator.queue.max_size,
+        },
+        "cache": coordinator.cache.stats if coordinator.cache is not None else None,
+        "spool": coordinator.spool.stats,
+        "renderer": async_get_renderer(hass).stats,
+        "jobs": {
+            **coordinator.jobs.stats,
+            "records": list(coordinator.jobs.history),
+        },
+    }
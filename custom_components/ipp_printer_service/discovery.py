@@ -0,0 +1,259 @@
+"""Printer discovery for IPP Printer Service."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterable
+from dataclasses import dataclass
+import ipaddress
+import logging
+import re
+from typing import Any
+
+from aiohttp import ClientSession
+from pyipp import IPP, IPPConnectionError, IPPError
+from pyipp.enums import IppOperation
+
+from homeassistant.const import (
+    CONF_HOST,
+    CONF_PASSWORD,
+    CONF_PORT,
+    CONF_SSL,
+    CONF_USERNAME,
+    CONF_VERIFY_SSL,
+)
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from .const import CONF_BASE_PATH, CONF_PRINTER_NAME, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+# Printers announced over zeroconf, offered again by the discovery step
+DATA_ZEROCONF_TARGETS = f"{DOMAIN}_zeroconf_targets"
+
+# Number of hosts probed at the same time
+DISCOVERY_CONCURRENCY = 64
+# Time a host gets to answer all probes before it is skipped
+HOST_TIMEOUT = 3.0
+# Largest number of hosts a discovery may probe, a /22 network
+MAX_HOSTS = 1024
+# Path of the print queue of most standalone printers (IPP Everywhere)
+STANDALONE_BASE_PATH = "/ipp/print"
+
+PRINTER_ATTRIBUTES = [
+    "printer-name",
+    "printer-info",
+    "printer-make-and-model",
+    "printer-uuid",
+]
+
+
+def printer_unique_id(
+    uuid: str | None, host: str, port: int, base_path: str | None = None
+) -> str:
+    """Return the unique id of a printer queue.
+
+    That is the printer's UUID, from its printer-uuid attribute or the
+    ``UUID`` TXT record it announces, and the address of the queue for
+    printers that don't report one.
+    """
+    if uuid:
+        uuid = uuid.strip().lower().removeprefix("urn:uuid:")
+    return uuid or f"{host}:{port}{base_path or ''}"
+
+
+@dataclass(frozen=True)
+class DiscoveryTarget:
+    """Host to probe for printers.
+
+    Without ``base_path``, the host is asked for its CUPS queues first and
+    probed as a standalone printer otherwise.
+    """
+
+    host: str
+    port: int
+    tls: bool = False
+    base_path: str | None = None
+
+
+@dataclass(frozen=True)
+class DiscoveredPrinter:
+    """Printer queue found by a discovery."""
+
+    host: str
+    port: int
+    tls: bool
+    base_path: str
+    name: str
+    info: str | None = None
+    uuid: str | None = None
+
+    @property
+    def key(self) -> str:
+        """Return a key identifying the queue."""
+        return f"{self.host}:{self.port}{self.base_path}"
+
+    @property
+    def unique_id(self) -> str:
+        """Return the unique id of the entry of the queue."""
+        return printer_unique_id(self.uuid, self.host, self.port, self.base_path)
+
+    @property
+    def label(self) -> str:
+        """Return the name shown when picking printers."""
+        return f"{self.info or self.name} ({self.host}{self.base_path})"
+
+    def as_entry_data(self, data: dict[str, Any]) -> dict[str, Any]:
+        """Return the config entry data of the queue, with the given credentials."""
+        return {
+            CONF_HOST: self.host,
+            CONF_PORT: self.port,
+            CONF_SSL: self.tls,
+            CONF_VERIFY_SSL: data.get(CONF_VERIFY_SSL, True),
+            **{
+                key: data[key]
+                for key in (CONF_USERNAME, CONF_PASSWORD)
+                if data.get(key)
+            },
+            CONF_PRINTER_NAME: self.name,
+            CONF_BASE_PATH: self.base_path,
+        }
+
+
+def parse_hosts(text: str) -> list[str]:
+    """Return the hosts of a list of host names, addresses and CIDR networks.
+
+    Raises ValueError for invalid networks or more than MAX_HOSTS hosts.
+    """
+    hosts: dict[str, None] = {}
+    for item in re.split(r"[\s,;]+", text.strip()):
+        if not item:
+            continue
+        if "/" in item:
+            network = ipaddress.ip_network(item, strict=False)
+            if network.num_addresses > MAX_HOSTS + 2:
+                raise ValueError(f"Network {item} has more than {MAX_HOSTS} hosts")
+            hosts.update(dict.fromkeys(str(address) for address in network.hosts()))
+        else:
+            hosts[item] = None
+        if len(hosts) > MAX_HOSTS:
+            raise ValueError(f"More than {MAX_HOSTS} hosts")
+    return list(hosts)
+
+
+async def async_discover(
+    hass: HomeAssistant,
+    targets: Iterable[DiscoveryTarget],
+    data: dict[str, Any],
+    concurrency: int = DISCOVERY_CONCURRENCY,
+    timeout: float = HOST_TIMEOUT,
+) -> list[DiscoveredPrinter]:
+    """Probe hosts concurrently and return the printers they offer.
+
+    ``data`` holds the credentials and certificate verification setting.
+    Hosts that don't answer within ``timeout`` seconds are skipped.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    session = async_get_clientsession(hass, data.get(CONF_VERIFY_SSL, True))
+
+    async def _async_probe_target(target: DiscoveryTarget) -> list[DiscoveredPrinter]:
+        async with semaphore:
+            try:
+                async with asyncio.timeout(timeout):
+                    return await _async_probe(session, target, data, timeout)
+            except (TimeoutError, IPPError) as err:
+                _LOGGER.debug("No printer found on %s: %s", target.host, err)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Unexpected error probing %s", target.host)
+            return []
+
+    results = await asyncio.gather(
+        *(_async_probe_target(target) for target in dict.fromkeys(targets))
+    )
+    printers = {printer.key: printer for found in results for printer in found}
+    return list(printers.values())
+
+
+async def _async_probe(
+    session: ClientSession,
+    target: DiscoveryTarget,
+    data: dict[str, Any],
+    timeout: float,
+) -> list[DiscoveredPrinter]:
+    """Return the CUPS queues of a host, or the host itself if it is a printer."""
+
+    def _ipp(base_path: str) -> IPP:
+        return IPP(
+            host=target.host,
+            port=target.port,
+            base_path=base_path,
+            tls=target.tls,
+            verify_ssl=data.get(CONF_VERIFY_SSL, True),
+            request_timeout=int(timeout) or 1,
+            session=session,
+            username=data.get(CONF_USERNAME),
+            password=data.get(CONF_PASSWORD),
+        )
+
+    if target.base_path is None or target.base_path.startswith(
+        ("/printers/", "/classes/")
+    ):
+        try:
+            response = await _ipp("/").execute(
+                IppOperation.CUPS_GET_PRINTERS,
+                {
+                    "operation-attributes-tag": {
+                        "requesting-user-name": "Home Assistant",
+                        "requested-attributes": PRINTER_ATTRIBUTES,
+                    }
+                },
+            )
+        except IPPConnectionError:
+            # Nothing listens there, don't probe it as a printer too
+            raise
+        except IPPError as err:
+            # Standalone printers don't implement CUPS operations
+            _LOGGER.debug("%s is not a CUPS server: %s", target.host, err)
+        else:
+            queues = response.get("printers", [])
+            if queues:
+                return [
+                    DiscoveredPrinter(
+                        host=target.host,
+                        port=target.port,
+                        tls=target.tls,
+                        base_path=f"/printers/{queue['printer-name']}",
+                        name=queue["printer-name"],
+                        info=queue.get("printer-info") or None,
+                        uuid=queue.get("printer-uuid"),
+                    )
+                    for queue in queues
+                    if queue.get("printer-name")
+                ]
+
+    base_path = target.base_path or STANDALONE_BASE_PATH
+    response = await _ipp(base_path).execute(
+        IppOperation.GET_PRINTER_ATTRIBUTES,
+        {
+            "operation-attributes-tag": {
+                "requested-attributes": PRINTER_ATTRIBUTES,
+            },
+        },
+    )
+    attributes = next(iter(response.get("printers", [])), {})
+    if not attributes:
+        return []
+    return [
+        DiscoveredPrinter(
+            host=target.host,
+            port=target.port,
+            tls=target.tls,
+            base_path=base_path,
+            name=attributes.get("printer-name") or target.host,
+            info=attributes.get("printer-make-and-model")
+            or attributes.get("printer-info")
+            or None,
+            uuid=attributes.get("printer-uuid"),
+        )
+    ]
@@ -0,0 +1,53 @@
+"""Base entity for IPP Printer Service."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .coordinator import IPPPrinterServiceCoordinator
+
+# Fingerprint of an entity whose state was not written yet
+_UNWRITTEN = object()
+
+
+class IPPEntity(CoordinatorEntity[IPPPrinterServiceCoordinator]):
+    """Entity writing its state only when the data it shows changed.
+
+    Every coordinator update compares a fingerprint of the entity's inputs
+    with the one of the last written state, so polls returning the same
+    printer state don't write identical states and recorder rows.
+    """
+
+    _fingerprint: Any = _UNWRITTEN
+
+    @callback
+    def _state_fingerprint(self) -> Any:
+        """Return the values the state of the entity is built from.
+
+        Defaults to the whole state and attributes, entities override it
+        with the few fields they read.
+        """
+        return (self.state, _freeze(self.extra_state_attributes))
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state if the entity's inputs changed."""
+        fingerprint = (self.available, self._state_fingerprint())
+        if fingerprint == self._fingerprint:
+            self.coordinator.async_record_state_write(suppressed=True)
+            return
+        self._fingerprint = fingerprint
+        self.coordinator.async_record_state_write(suppressed=False)
+        super()._handle_coordinator_update()
+
+
+def _freeze(value: Any) -> Any:
+    """Return a copy of a value that later changes to it don't affect."""
+    if isinstance(value, dict):
+        return tuple((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(_freeze(item) for item in value)
+    return value
@@ -0,0 +1,109 @@
+"""Printer groups for IPP Printer Service."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+import logging
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry, ConfigEntryState
+from homeassistant.core import callback
+from homeassistant.exceptions import HomeAssistantError
+
+from .print_queue import PrintJob
+
+_LOGGER = logging.getLogger(__name__)
+
+# Preferred printer states when the load is equal
+STATE_RANK = {"idle": 0, "printing": 1}
+
+
+class PrinterError(HomeAssistantError):
+    """Error raised when a printer failed to take a job.
+
+    Unlike errors of the document source, another printer may succeed.
+    """
+
+
+@callback
+def async_rank_members(
+    members: list[tuple[str, ConfigEntry]],
+) -> list[tuple[str, ConfigEntry]]:
+    """Order the printers of a group from the best to the worst candidate.
+
+    Printers accepting jobs come first, then the least loaded, idle before
+    printing, and the fastest to respond.
+    """
+
+    def _key(member: tuple[str, ConfigEntry]) -> tuple[Any, ...]:
+        coordinator = member[1].runtime_data
+        printer = coordinator.data.printer if coordinator.data else None
+        state = printer.state.printer_state if printer is not None else None
+        return (
+            not coordinator.accepting,
+            coordinator.load,
+            STATE_RANK.get(state, len(STATE_RANK)),
+            coordinator.latency if coordinator.latency is not None else float("inf"),
+        )
+
+    loaded = [
+        member for member in members if member[1].state is ConfigEntryState.LOADED
+    ]
+    return sorted(loaded, key=_key)
+
+
+class GroupDispatch:
+    """Send a job to the best printer of a group, retrying on the others."""
+
+    def __init__(
+        self,
+        members: list[tuple[str, ConfigEntry]],
+        submit: Callable[[str, ConfigEntry], PrintJob],
+    ) -> None:
+        """Initialize the dispatch."""
+        self.members = members
+        self.attempts: list[dict[str, Any]] = []
+        self.entity_id: str | None = None
+        self.config_entry: ConfigEntry | None = None
+        self.job: PrintJob | None = None
+        self._submit = submit
+        self._tried: set[str] = set()
+
+    @callback
+    def async_submit(self) -> PrintJob:
+        """Queue the job on the best printer not tried yet."""
+        candidates = [
+            member for member in self.members if member[0] not in self._tried
+        ]
+        for entity_id, config_entry in async_rank_members(candidates):
+            self._tried.add(entity_id)
+            try:
+                self.job = self._submit(entity_id, config_entry)
+            except HomeAssistantError as err:
+                # The queue of this printer is full
+                self.attempts.append({"entity_id": entity_id, "error": str(err)})
+                continue
+            self.entity_id = entity_id
+            self.config_entry = config_entry
+            _LOGGER.debug("Dispatched %s to %s", self.job.description, entity_id)
+            return self.job
+
+        raise HomeAssistantError("No printer of the group accepted the job")
+
+    async def async_wait(self) -> Any:
+        """Wait for the job, moving it to another printer when one fails."""
+        job = self.job or self.async_submit()
+        while True:
+            try:
+                return await job.async_wait()
+            except PrinterError as err:
+                self.attempts.append({"entity_id": self.entity_id, "error": str(err)})
+                _LOGGER.warning(
+                    "Printing on %s failed, trying another printer: %s",
+                    self.entity_id,
+                    err,
+                )
+                try:
+                    job = self.async_submit()
+                except HomeAssistantError:
+                    raise err from None
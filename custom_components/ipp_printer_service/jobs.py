@@ -0,0 +1,294 @@
+"""Print job tracking and history for IPP Printer Service."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from datetime import timedelta
+import logging
+from typing import Any
+
+from pyipp import IPPConnectionError, IPPError, IPPResponseError
+from pyipp.enums import IppJobState, IppOperation
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .client import IPPPrinterServiceClient
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+EVENT_JOB_STATE_CHANGED = f"{DOMAIN}_job_state_changed"
+
+STORAGE_VERSION = 1
+# Writes are coalesced, so bursts of jobs cause a single write
+SAVE_DELAY = 30
+
+HISTORY_SIZE = 200
+JOB_POLL_INTERVAL = 5
+# Jobs still not finished after this long (e.g. held jobs) are no longer polled
+MAX_TRACKING_TIME = timedelta(hours=24)
+
+JOB_ATTRIBUTES = ["job-id", "job-state", "job-state-reasons", "job-state-message"]
+
+# States after which a job is no longer followed, "simulated" and "failed"
+# jobs never reached the printer
+TERMINAL_STATES = {
+    "canceled",
+    "aborted",
+    "completed",
+    "unknown",
+    "simulated",
+    "failed",
+}
+
+
+def _job_state(value: Any) -> str:
+    """Return the keyword of an IPP job-state value."""
+    try:
+        return IppJobState(value).name.lower()
+    except ValueError:
+        return "unknown"
+
+
+class JobTracker:
+    """Follow submitted jobs until they finish and keep a bounded history.
+
+    Jobs that are not finished are polled with one Get-Jobs request for the
+    jobs still active on the printer, plus one Get-Job-Attributes request per
+    job that left that list to learn how it ended. The history is a ring
+    buffer persisted with a delayed save.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry_id: str,
+        client: IPPPrinterServiceClient,
+        on_change: CALLBACK_TYPE,
+    ) -> None:
+        """Initialize the tracker."""
+        self.hass = hass
+        self.entry_id = entry_id
+        self.client = client
+        self.history: deque[dict[str, Any]] = deque(maxlen=HISTORY_SIZE)
+        self.requests = 0
+        self._on_change = on_change
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.jobs"
+        )
+        self._tracked: dict[int, dict[str, Any]] = {}
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def tracked(self) -> int:
+        """Return the number of jobs followed on the printer."""
+        return len(self._tracked)
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return the tracker counters."""
+        return {
+            "history": len(self.history),
+            "tracked": self.tracked,
+            "requests": self.requests,
+        }
+
+    async def async_load(self) -> None:
+        """Restore the history and resume tracking unfinished jobs."""
+        if (data := await self._store.async_load()) is None:
+            return
+        self.history.extend(data.get("jobs", []))
+        for record in self.history:
+            if record.get("job_id") is not None and record["state"] not in (
+                TERMINAL_STATES
+            ):
+                self._tracked[record["job_id"]] = record
+
+    @callback
+    def async_start(self) -> None:
+        """Start following jobs."""
+        self._task = self.hass.async_create_background_task(
+            self._async_run(), f"{DOMAIN} {self.client.base_path} job tracker"
+        )
+        if self._tracked:
+            self._wakeup.set()
+
+    async def async_stop(self) -> None:
+        """Stop following jobs and write the history."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self._store.async_save(self._data_to_save())
+
+    @callback
+    def async_add(self, record: dict[str, Any]) -> dict[str, Any]:
+        """Add a submitted job to the history and follow it if it has a job id.
+
+        Returns the stored record, which is updated as the job progresses.
+        """
+        now = dt_util.utcnow().isoformat()
+        record = {"state": "pending", "reasons": None, **record}
+        record.setdefault("submitted", now)
+        record["updated"] = now
+
+        if len(self.history) == self.history.maxlen:
+            # The oldest record falls out of the ring buffer
+            self._tracked.pop(self.history[0].get("job_id"), None)
+        self.history.append(record)
+
+        if record["state"] not in TERMINAL_STATES and (
+            job_id := record.get("job_id")
+        ) is not None:
+            self._tracked[job_id] = record
+            self._wakeup.set()
+        self._async_changed()
+        return record
+
+    async def async_cancel(self, job_id: int) -> None:
+        """Cancel a job on the printer and poll its state right away."""
+        await self.client.execute(
+            IppOperation.CANCEL_JOB,
+            {
+                "operation-attributes-tag": {
+                    "requesting-user-name": "Home Assistant",
+                    "job-id": job_id,
+                },
+            },
+        )
+        self.async_poke()
+
+    @callback
+    def async_poke(self) -> None:
+        """Poll the tracked jobs right away, e.g. after a printer event."""
+        if self._tracked:
+            self._wakeup.set()
+
+    async def _async_run(self) -> None:
+        """Poll the tracked jobs until they all finished."""
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self._tracked:
+                try:
+                    await self._async_update()
+                except IPPError as err:
+                    _LOGGER.debug(
+                        "Failed to update jobs of %s: %s", self.client.host, err
+                    )
+                if not self._tracked:
+                    break
+                try:
+                    async with asyncio.timeout(JOB_POLL_INTERVAL):
+                        await self._wakeup.wait()
+                except TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+    async def _async_update(self) -> None:
+        """Update the state of every tracked job."""
+        self.requests += 1
+        response = await self.client.execute(
+            IppOperation.GET_JOBS,
+            {
+                "operation-attributes-tag": {
+                    "requesting-user-name": "Home Assistant",
+                    "which-jobs": "not-completed",
+                    "requested-attributes": JOB_ATTRIBUTES,
+                },
+            },
+        )
+        active = {job.get("job-id"): job for job in response["jobs"]}
+
+        for job_id in list(self._tracked):
+            if (attributes := active.get(job_id)) is None:
+                # The job left the active list, ask how it ended
+                attributes = await self._async_get_job(job_id)
+            self._async_update_job(job_id, attributes)
+
+    async def _async_get_job(self, job_id: int) -> dict[str, Any]:
+        """Return the attributes of a single job."""
+        self.requests += 1
+        try:
+            response = await self.client.execute(
+                IppOperation.GET_JOB_ATTRIBUTES,
+                {
+                    "operation-attributes-tag": {
+                        "requesting-user-name": "Home Assistant",
+                        "job-id": job_id,
+                        "requested-attributes": JOB_ATTRIBUTES,
+                    },
+                },
+            )
+        except (IPPConnectionError, IPPResponseError):
+            raise
+        except IPPError as err:
+            # Printers forget finished jobs, don't poll them forever
+            _LOGGER.debug("Job %s is gone from %s: %s", job_id, self.client.host, err)
+            return {}
+        return next(iter(response["jobs"]), {})
+
+    @callback
+    def _async_update_job(self, job_id: int, attributes: dict[str, Any]) -> None:
+        """Record the state of a job and fire an event when it changed."""
+        record = self._tracked[job_id]
+        state = _job_state(attributes.get("job-state"))
+        reasons = attributes.get("job-state-reasons")
+        now = dt_util.utcnow()
+
+        if state not in TERMINAL_STATES and now - dt_util.parse_datetime(
+            record["submitted"]
+        ) > MAX_TRACKING_TIME:
+            _LOGGER.debug("Giving up tracking job %s in state %s", job_id, state)
+            del self._tracked[job_id]
+
+        if state == record["state"] and reasons == record["reasons"]:
+            return
+
+        previous = record["state"]
+        record.update(
+            state=state,
+            reasons=reasons,
+            message=attributes.get("job-state-message"),
+            updated=now.isoformat(),
+        )
+        if state in TERMINAL_STATES:
+            record["finished"] = now.isoformat()
+            self._tracked.pop(job_id, None)
+
+        self.hass.bus.async_fire(
+            EVENT_JOB_STATE_CHANGED,
+            {
+                "entry_id": self.entry_id,
+                "entity_id": record.get("entity_id"),
+                "job_id": job_id,
+                "job_handle": record.get("job_handle"),
+                "job_name": record.get("job_name"),
+                "state": state,
+                "previous_state": previous,
+                "reasons": reasons,
+                "message": record["message"],
+            },
+        )
+        self._async_changed()
+
+    @callback
+    def _async_changed(self) -> None:
+        """Notify listeners and schedule writing the history."""
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+        self._on_change()
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the history to store."""
+        # Copies, as records keep changing while the data is written
+        return {"jobs": [dict(record) for record in self.history]}
+
+
+async def async_remove_history(hass: HomeAssistant, entry_id: str) -> None:
+    """Remove the stored job history of a config entry."""
+    await Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.jobs").async_remove()
@@ -0,0 +1,263 @@
+"""Timing metrics for IPP Printer Service."""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections import Counter
+from collections.abc import AsyncIterator, Iterator, Mapping
+from contextlib import contextmanager
+import math
+import time
+from types import SimpleNamespace
+from typing import Any
+
+from aiohttp import ClientSession, TraceConfig
+
+from .const import DOMAIN
+
+# Upper bounds in seconds of the histogram buckets, the last bucket is +Inf
+BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+    300.0,
+)
+
+# Stages timed in the print path, in the order they happen
+STAGES = (
+    "setup",
+    "dns",
+    "connect",
+    "poll",
+    "upload",
+    "spool_write",
+    "download",
+    "file_read",
+    "render",
+    "ipp_encode",
+    "print_job",
+    "print",
+)
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+GAUGE_HELP = {
+    "up": "Whether the last poll of the printer succeeded",
+    "queue_depth": "Number of jobs waiting in the print queue",
+    "tracked_jobs": "Number of jobs followed on the printer",
+    "spool_bytes": "Size of the documents waiting on disk",
+    "circuit_open": "Whether requests to the printer's host fail fast",
+}
+
+
+class Histogram:
+    """Fixed-bucket histogram, cheap enough to update on every request."""
+
+    __slots__ = ("counts", "count", "sum")
+
+    def __init__(self) -> None:
+        """Initialize the histogram."""
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Add a value."""
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, quantile: float) -> float | None:
+        """Return an estimate of a quantile, interpolating within its bucket."""
+        if not self.count:
+            return None
+        rank = quantile * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = BUCKETS[index - 1] if index else 0.0
+                if index == len(BUCKETS):
+                    # Nothing is known above the last bound
+                    return lower
+                return lower + (BUCKETS[index] - lower) * (rank - seen) / count
+            seen += count
+        return BUCKETS[-1]
+
+    def cumulative(self) -> Iterator[tuple[float, int]]:
+        """Yield the upper bound and cumulative count of every bucket."""
+        total = 0
+        for bound, count in zip((*BUCKETS, math.inf), self.counts):
+            total += count
+            yield bound, total
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the count, sum and estimated quantiles."""
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            **{
+                f"p{round(quantile * 100)}": (
+                    round(value, 6)
+                    if (value := self.quantile(quantile)) is not None
+                    else None
+                )
+                for quantile in QUANTILES
+            },
+        }
+
+
+class Metrics:
+    """Timing histograms per stage and counters of a printer."""
+
+    def __init__(self) -> None:
+        """Initialize the metrics."""
+        self.histograms: dict[str, Histogram] = {}
+        self.counters: Counter[str] = Counter()
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """Record the duration of a stage."""
+        if (histogram := self.histograms.get(stage)) is None:
+            histogram = self.histograms[stage] = Histogram()
+        histogram.observe(seconds)
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        """Time the enclosed block, also when it fails."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def increment(self, counter: str, value: int = 1) -> None:
+        """Increment a counter."""
+        self.counters[counter] += value
+
+    async def async_iter_timed(
+        self, chunks: AsyncIterator[bytes], stage: str
+    ) -> AsyncIterator[bytes]:
+        """Yield chunks, recording the total time spent waiting for them."""
+        waited = 0.0
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    chunk = await anext(chunks)
+                except StopAsyncIteration:
+                    break
+                finally:
+                    waited += time.perf_counter() - start
+                yield chunk
+        finally:
+            self.observe(stage, waited)
+
+    def trace_config(self) -> TraceConfig:
+        """Return a trace config recording DNS and connect times of a session."""
+        trace_config = TraceConfig()
+
+        def _start(stage: str) -> Any:
+            async def _on_start(
+                session: ClientSession, context: SimpleNamespace, params: Any
+            ) -> None:
+                setattr(context, stage, time.perf_counter())
+
+            return _on_start
+
+        def _end(stage: str) -> Any:
+            async def _on_end(
+                session: ClientSession, context: SimpleNamespace, params: Any
+            ) -> None:
+                if (start := getattr(context, stage, None)) is not None:
+                    self.observe(stage, time.perf_counter() - start)
+
+            return _on_end
+
+        trace_config.on_dns_resolvehost_start.append(_start("dns"))
+        trace_config.on_dns_resolvehost_end.append(_end("dns"))
+        trace_config.on_connection_create_start.append(_start("connect"))
+        trace_config.on_connection_create_end.append(_end("connect"))
+        return trace_config
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the stage timings and counters."""
+        return {
+            "stages": {
+                stage: self.histograms[stage].as_dict()
+                for stage in sorted(self.histograms, key=_stage_order)
+            },
+            "counters": dict(self.counters),
+        }
+
+
+def _stage_order(stage: str) -> int:
+    """Return the position of a stage in the print path."""
+    return STAGES.index(stage) if stage in STAGES else len(STAGES)
+
+
+def render_prometheus(
+    printers: list[tuple[Mapping[str, str], Metrics, Mapping[str, float]]],
+) -> str:
+    """Render the metrics of printers in the Prometheus text format.
+
+    Every printer is given as its labels, its metrics and its gauge values.
+    """
+    families: dict[str, tuple[str, str, list[str]]] = {}
+
+    def _family(name: str, kind: str, help_text: str) -> list[str]:
+        return families.setdefault(f"{DOMAIN}_{name}", (kind, help_text, []))[2]
+
+    for labels, metrics, gauges in printers:
+        for stage, histogram in metrics.histograms.items():
+            samples = _family(
+                "stage_duration_seconds", "histogram", "Duration of a print stage"
+            )
+            stage_labels = {**labels, "stage": stage}
+            for bound, count in histogram.cumulative():
+                bucket_labels = {**stage_labels, "le": _format_bound(bound)}
+                samples.append(f"_bucket{_labels(bucket_labels)} {count}")
+            samples.append(f"_sum{_labels(stage_labels)} {histogram.sum}")
+            samples.append(f"_count{_labels(stage_labels)} {histogram.count}")
+        for counter, value in metrics.counters.items():
+            _family(
+                f"{counter}_total", "counter", f"Number of {counter.replace('_', ' ')}"
+            ).append(f"{_labels(labels)} {value}")
+        for gauge, value in gauges.items():
+            _family(gauge, "gauge", GAUGE_HELP.get(gauge, gauge)).append(
+                f"{_labels(labels)} {value}"
+            )
+
+    lines = []
+    for name, (kind, help_text, samples) in families.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(f"{name}{sample}" for sample in samples)
+    return "\n".join(lines) + "\n"
+
+
+def _format_bound(bound: float) -> str:
+    """Format a bucket bound like Prometheus client libraries."""
+    return "+Inf" if bound == math.inf else repr(bound)
+
+
+def _labels(labels: Mapping[str, str]) -> str:
+    """Format Prometheus labels."""
+    pairs = (f'{name}="{_escape(value)}"' for name, value in labels.items())
+    return "{" + ",".join(pairs) + "}"
+
+
+def _escape(value: str) -> str:
+    """Escape a Prometheus label value."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,231 @@
+"""IPP event notifications for IPP Printer Service."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from datetime import datetime, timedelta
+import logging
+from typing import Any
+
+from pyipp import IPPError
+from pyipp.enums import IppOperation, IppStatus
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .client import IPPPrinterServiceClient
+from .const import DOMAIN
+from .resilience import error_status
+
+_LOGGER = logging.getLogger(__name__)
+
+NOTIFY_EVENTS = [
+    "printer-state-changed",
+    "printer-stopped",
+    "job-created",
+    "job-completed",
+    "job-state-changed",
+]
+LEASE_DURATION = 3600
+# Renew the subscription this many seconds before its lease expires
+LEASE_RENEW_MARGIN = 300
+# How long the printer may hold a Get-Notifications request open
+LONG_POLL_TIMEOUT = 90
+# Extra time allowed to the request itself, so the long poll deadline comes first
+LONG_POLL_REQUEST_MARGIN = 10
+DEFAULT_GET_INTERVAL = 30
+MAX_RETRY_DELAY = 600
+
+
+class PrinterSubscription:
+    """Pull-based printer subscription using Get-Notifications long polling.
+
+    Every batch of events received calls ``on_events``, which lets the
+    coordinator refresh right away instead of waiting for its next poll.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        client: IPPPrinterServiceClient,
+        on_events: Callable[[list[dict[str, Any]]], None],
+    ) -> None:
+        """Initialize the subscription."""
+        self.hass = hass
+        self.client = client
+        self.subscription_id: int | None = None
+        self.events_received = 0
+        self.requests = 0
+        self.last_event: datetime | None = None
+        self._on_events = on_events
+        self._sequence = 1
+        self._lease_expires: datetime | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def active(self) -> bool:
+        """Return True while a subscription exists on the printer."""
+        return self.subscription_id is not None
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return the subscription counters."""
+        return {
+            "active": self.active,
+            "subscription_id": self.subscription_id,
+            "requests": self.requests,
+            "events_received": self.events_received,
+            "last_event": self.last_event.isoformat() if self.last_event else None,
+        }
+
+    def async_start(self) -> None:
+        """Start listening for events."""
+        self._task = self.hass.async_create_background_task(
+            self._async_run(), f"{DOMAIN} {self.client.base_path} notifications"
+        )
+
+    async def async_stop(self) -> None:
+        """Stop listening and cancel the subscription on the printer."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+        if self.subscription_id is not None and not self.client.closed:
+            try:
+                await self._async_execute(
+                    IppOperation.CANCEL_SUBSCRIPTION,
+                    {"notify-subscription-id": self.subscription_id},
+                )
+            except IPPError as err:
+                _LOGGER.debug("Failed to cancel subscription: %s", err)
+            self.subscription_id = None
+
+    async def _async_run(self) -> None:
+        """Keep a subscription alive and pull its events."""
+        failures = 0
+        while True:
+            try:
+                if self.subscription_id is None:
+                    await self._async_subscribe()
+                elif self._lease_expires and dt_util.utcnow() >= self._lease_expires:
+                    await self._async_renew()
+                delay = await self._async_get_notifications()
+                failures = 0
+            except IPPError as err:
+                failures += 1
+                delay = min(DEFAULT_GET_INTERVAL * 2**failures, MAX_RETRY_DELAY)
+                _LOGGER.debug(
+                    "Notifications from %s failed, retrying in %ss: %s",
+                    self.client.host,
+                    delay,
+                    err,
+                )
+                if error_status(err) == IppStatus.ERROR_NOT_FOUND:
+                    # The printer dropped the subscription (e.g. restart)
+                    self.subscription_id = None
+            await asyncio.sleep(delay)
+
+    async def _async_subscribe(self) -> None:
+        """Create a printer subscription."""
+        response = await self._async_execute(
+            IppOperation.CREATE_PRINTER_SUBSCRIPTIONS,
+            {},
+            {
+                "notify-events": NOTIFY_EVENTS,
+                "notify-pull-method": "ippget",
+                "notify-lease-duration": LEASE_DURATION,
+            },
+        )
+        subscription = next(iter(response["subscriptions"]), {})
+        if (subscription_id := subscription.get("notify-subscription-id")) is None:
+            raise IPPError("Printer did not return a subscription id")
+
+        self.subscription_id = subscription_id
+        self._sequence = 1
+        self._set_lease(subscription.get("notify-lease-duration", LEASE_DURATION))
+        _LOGGER.debug(
+            "Subscribed to %s notifications (%s)", self.client.host, subscription_id
+        )
+
+    async def _async_renew(self) -> None:
+        """Extend the lease of the subscription."""
+        response = await self._async_execute(
+            IppOperation.RENEW_SUBSCRIPTION,
+            {"notify-subscription-id": self.subscription_id},
+            {"notify-lease-duration": LEASE_DURATION},
+        )
+        self._set_lease(
+            response["operation-attributes"].get(
+                "notify-lease-duration", LEASE_DURATION
+            )
+        )
+
+    async def _async_get_notifications(self) -> float:
+        """Wait for events and return the delay before asking again.
+
+        A printer holding the request open until LONG_POLL_TIMEOUT without
+        events is an empty answer, not a failure: the request is cancelled,
+        which neither counts against the host's breaker nor sends it again.
+        """
+        try:
+            async with asyncio.timeout(LONG_POLL_TIMEOUT):
+                response = await self._async_execute(
+                    IppOperation.GET_NOTIFICATIONS,
+                    {
+                        "notify-subscription-ids": self.subscription_id,
+                        "notify-sequence-numbers": self._sequence,
+                        "notify-wait": True,
+                    },
+                    timeout=LONG_POLL_TIMEOUT + LONG_POLL_REQUEST_MARGIN,
+                )
+        except TimeoutError:
+            return 0
+        events = [
+            event
+            for event in response["events"]
+            if event.get("notify-subscription-id", self.subscription_id)
+            == self.subscription_id
+        ]
+        if events:
+            self._sequence = (
+                max(event.get("notify-sequence-number", 0) for event in events) + 1
+            )
+            self.events_received += len(events)
+            self.last_event = dt_util.utcnow()
+            self._on_events(events)
+            return 0
+
+        return response["operation-attributes"].get(
+            "notify-get-interval", DEFAULT_GET_INTERVAL
+        )
+
+    async def _async_execute(
+        self,
+        operation: IppOperation,
+        attributes: dict[str, Any],
+        subscription_attributes: dict[str, Any] | None = None,
+        timeout: float | None = None,
+    ) -> dict[str, Any]:
+        """Send a subscription related request."""
+        self.requests += 1
+        message: dict[str, Any] = {
+            "operation-attributes-tag": {
+                "requesting-user-name": "Home Assistant",
+                **attributes,
+            }
+        }
+        if subscription_attributes is not None:
+            message["subscription-attributes-tag"] = subscription_attributes
+        return await self.client.execute_extended(operation, message, timeout)
+
+    def _set_lease(self, duration: int) -> None:
+        """Remember when the subscription has to be renewed."""
+        if not duration:
+            # A lease duration of 0 means the subscription never expires
+            self._lease_expires = None
+            return
+        self._lease_expires = dt_util.utcnow() + timedelta(
+            seconds=max(duration - LEASE_RENEW_MARGIN, duration // 2)
+        )
@@ -0,0 +1,137 @@
+"""PDF preprocessing for IPP Printer Service."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+import importlib.util
+import logging
+import multiprocessing
+import os
+import site
+import sys
+from types import ModuleType
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import DOMAIN
+from .spool import Spool
+from .streaming import async_iter_file
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_PROCESS_POOL = f"{DOMAIN}_process_pool"
+PROCESS_POOL_WORKERS = 2
+
+# Modules run in the worker processes, see import_worker_module
+WORKER_PATH = os.path.join(os.path.dirname(__file__), "workers")
+
+
+def import_worker_module(name: str) -> ModuleType:
+    """Import a module of WORKER_PATH under its top-level name.
+
+    Functions sent to the worker processes are pickled as references to
+    their module. Loading the module from its file, rather than importing
+    it from this package, names it without the package, so the workers
+    import it from WORKER_PATH without running the integration's
+    ``__init__`` and the Home Assistant imports that come with it.
+    """
+    if (module := sys.modules.get(name)) is not None:
+        return module
+    spec = importlib.util.spec_from_file_location(
+        name, os.path.join(WORKER_PATH, f"{name}.py")
+    )
+    if spec is None or spec.loader is None:
+        raise ImportError(f"No worker module {name} in {WORKER_PATH}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[name]
+        raise
+    return module
+
+
+_pdf = import_worker_module("ipp_printer_service_pdf")
+
+PAGES_PER_SHEET = _pdf.PAGES_PER_SHEET
+PreprocessOptions = _pdf.PreprocessOptions
+parse_page_ranges = _pdf.parse_page_ranges
+preprocess_pdf = _pdf.preprocess_pdf
+
+
+@callback
+def async_get_process_pool(hass: HomeAssistant) -> ProcessPoolExecutor:
+    """Return the process pool shared by all entries, creating it on first use."""
+    if (pool := hass.data.get(DATA_PROCESS_POOL)) is not None:
+        return pool
+
+    # Forking the multi-threaded Home Assistant process is not safe. The
+    # workers find the worker modules on their path, outside of this package
+    pool = ProcessPoolExecutor(
+        max_workers=PROCESS_POOL_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=site.addsitedir,
+        initargs=(WORKER_PATH,),
+    )
+    hass.data[DATA_PROCESS_POOL] = pool
+
+    @callback
+    def _async_shutdown(event: Event) -> None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_shutdown)
+    return pool
+
+
+@asynccontextmanager
+async def async_preprocess(
+    hass: HomeAssistant,
+    spool: Spool,
+    chunks: AsyncIterator[bytes],
+    options: PreprocessOptions,
+    chunk_size: int,
+) -> AsyncIterator[AsyncIterator[bytes]]:
+    """Preprocess a document and yield an iterator over the result.
+
+    The document is written to a spool file, since the worker process needs
+    random access to it, and the result is streamed from disk.
+    """
+    source = destination = None
+    try:
+        source = await spool.async_write(chunks, "document.pdf")
+        destination = spool.path("processed.pdf")
+
+        try:
+            # Submitting may start the worker processes, keep that off the loop
+            future = await hass.async_add_executor_job(
+                async_get_process_pool(hass).submit,
+                preprocess_pdf,
+                source,
+                destination,
+                options,
+            )
+            stats = await asyncio.wrap_future(future)
+        except Exception as err:
+            _LOGGER.debug("Preprocessing failed", exc_info=True)
+            raise HomeAssistantError(f"Failed to preprocess document: {err}") from err
+
+        _LOGGER.info(
+            "Preprocessed document: %d of %d pages on %d sheets, %d images "
+            "recompressed, %d -> %d bytes",
+            stats["selected_pages"],
+            stats["pages"],
+            stats["sheets"],
+            stats["images_recompressed"],
+            stats["size"],
+            stats["processed_size"],
+        )
+        spool.async_track(destination, stats["processed_size"])
+        yield async_iter_file(destination, chunk_size)
+    finally:
+        await spool.async_remove(*(path for path in (source, destination) if path))
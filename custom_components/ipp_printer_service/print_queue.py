@@ -0,0 +1,324 @@
+"""Print job queue for IPP Printer Service."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+import itertools
+import logging
+import time
+from typing import Any
+import uuid
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+PRIORITY_HIGH = "high"
+PRIORITY_NORMAL = "normal"
+PRIORITY_LOW = "low"
+
+PRIORITIES = {PRIORITY_HIGH: 0, PRIORITY_NORMAL: 1, PRIORITY_LOW: 2}
+
+STATUS_QUEUED = "queued"
+STATUS_PRINTING = "printing"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+STATUS_CANCELLED = "cancelled"
+
+# Minimum time between two progress updates of a job sent to the listeners
+PROGRESS_INTERVAL = 0.5
+
+
+@dataclass
+class PrintJob:
+    """A print job submitted to the queue."""
+
+    handle: str
+    description: str
+    priority: str
+    run: Callable[[], Awaitable[Any]]
+    created: datetime = field(default_factory=datetime.now)
+    status: str = STATUS_QUEUED
+    result: Any = None
+    error: Exception | None = None
+    bytes_sent: int = 0
+    job_id: int | None = None
+    task: asyncio.Task[Any] | None = field(default=None, repr=False)
+    _finished: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    async def async_wait(self) -> Any:
+        """Wait until the job finished and return its result."""
+        await self._finished.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a summary of the job."""
+        return {
+            "job_handle": self.handle,
+            "file_path": self.description,
+            "priority": self.priority,
+            "status": self.status,
+            "created": self.created.isoformat(),
+            "bytes_sent": self.bytes_sent,
+            "job_id": self.job_id,
+            "error": str(self.error) if self.error is not None else None,
+        }
+
+
+# Queue and job run by the current task, so the print path can report to it
+_current_job: ContextVar[tuple[PrintQueue, PrintJob] | None] = ContextVar(
+    f"{DOMAIN}_current_job", default=None
+)
+
+
+def current_job() -> PrintJob | None:
+    """Return the print job the current task runs, if any."""
+    if (current := _current_job.get()) is None:
+        return None
+    return current[1]
+
+
+async def async_iter_progress(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Yield chunks unchanged, adding their size to the bytes sent of the job."""
+    current = _current_job.get()
+    async for chunk in chunks:
+        if current is not None:
+            queue, job = current
+            job.bytes_sent += len(chunk)
+            queue.async_report_progress(job)
+        yield chunk
+
+
+class PrintQueue:
+    """Bounded priority queue processed by a fixed number of workers.
+
+    Jobs are rejected once the queue holds ``max_size`` waiting jobs, which
+    keeps bursts of service calls from opening unbounded uploads to one
+    printer. Each job runs in its own task so it can be cancelled, and
+    listeners are told about every change of a job, with the progress of
+    its upload throttled to one update per PROGRESS_INTERVAL.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        name: str,
+        workers: int,
+        max_size: int,
+        on_change: CALLBACK_TYPE,
+    ) -> None:
+        """Initialize the queue."""
+        self.hass = hass
+        self.name = name
+        self.workers = workers
+        self.max_size = max_size
+        self.jobs: dict[str, PrintJob] = {}
+        self._on_change = on_change
+        self._queue: asyncio.PriorityQueue[tuple[int, int, PrintJob]] = (
+            asyncio.PriorityQueue()
+        )
+        self._counter = itertools.count()
+        self._tasks: list[asyncio.Task[None]] = []
+        self._listeners: list[Callable[[PrintJob], None]] = []
+        # Cancelled jobs still in the priority queue, skipped by the workers
+        self._stale = 0
+        self._notified: dict[str, float] = {}
+        self._progress_timers: dict[str, asyncio.TimerHandle] = {}
+
+    @property
+    def depth(self) -> int:
+        """Return the number of jobs waiting for a worker."""
+        return self._queue.qsize() - self._stale
+
+    @property
+    def active(self) -> int:
+        """Return the number of jobs being printed."""
+        return sum(1 for job in self.jobs.values() if job.status == STATUS_PRINTING)
+
+    @callback
+    def async_start(self) -> None:
+        """Start the queue workers."""
+        for index in range(self.workers):
+            self._tasks.append(
+                self.hass.async_create_background_task(
+                    self._async_worker(),
+                    f"{DOMAIN} {self.name} print worker {index}",
+                )
+            )
+
+    async def async_stop(self) -> None:
+        """Stop the workers and fail every job that did not finish."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+        for job in list(self.jobs.values()):
+            self._async_finish(job, error=HomeAssistantError("Print queue stopped"))
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self._stale = 0
+
+    @callback
+    def async_add_listener(
+        self, listener: Callable[[PrintJob], None]
+    ) -> CALLBACK_TYPE:
+        """Call a listener with every job that changed, returning its remover."""
+        self._listeners.append(listener)
+
+        @callback
+        def _remove() -> None:
+            self._listeners.remove(listener)
+
+        return _remove
+
+    @callback
+    def async_cancel(self, handle: str) -> bool:
+        """Cancel a job waiting in the queue or being printed.
+
+        Returns False if the job is not in the queue, e.g. because it
+        already finished.
+        """
+        if (job := self.jobs.get(handle)) is None:
+            return False
+        _LOGGER.debug("Cancelling %s on %s", job.description, self.name)
+        if job.task is not None:
+            # The worker records the outcome once the task ended
+            job.task.cancel()
+        else:
+            self._stale += 1
+            self._async_finish(
+                job, error=HomeAssistantError("Print job cancelled"), cancelled=True
+            )
+        return True
+
+    @callback
+    def async_report_progress(self, job: PrintJob) -> None:
+        """Tell the listeners about the bytes sent of a job, throttled."""
+        if job.handle in self._progress_timers:
+            # An update is already scheduled and will hold the latest count
+            return
+        delay = self._notified.get(job.handle, 0) + PROGRESS_INTERVAL - time.monotonic()
+        if delay <= 0:
+            self._async_notify(job)
+        else:
+            self._progress_timers[job.handle] = self.hass.loop.call_later(
+                delay, self._async_notify, job
+            )
+
+    @callback
+    def async_submit(
+        self,
+        description: str,
+        run: Callable[[], Awaitable[Any]],
+        priority: str = PRIORITY_NORMAL,
+    ) -> PrintJob:
+        """Add a job to the queue and return it without waiting."""
+        if self.depth >= self.max_size:
+            raise HomeAssistantError(
+                f"Print queue for {self.name} is full ({self.max_size} jobs waiting)"
+            )
+
+        job = PrintJob(
+            handle=uuid.uuid4().hex,
+            description=description,
+            priority=priority,
+            run=run,
+        )
+        self.jobs[job.handle] = job
+        self._queue.put_nowait((PRIORITIES[priority], next(self._counter), job))
+        _LOGGER.debug(
+            "Queued %s for %s (%d waiting)", description, self.name, self.depth
+        )
+        self._on_change()
+        self._async_notify(job)
+        return job
+
+    async def _async_worker(self) -> None:
+        """Process jobs until cancelled."""
+        while True:
+            _, _, job = await self._queue.get()
+            if job.handle not in self.jobs:
+                self._stale -= 1
+                continue
+
+            job.status = STATUS_PRINTING
+            self._on_change()
+            self._async_notify(job)
+            # The print path finds the job it runs for through the context
+            token = _current_job.set((self, job))
+            try:
+                job.task = self.hass.async_create_background_task(
+                    job.run(), f"{DOMAIN} {self.name} print job {job.handle}"
+                )
+            finally:
+                _current_job.reset(token)
+            try:
+                result = await job.task
+            except asyncio.CancelledError:
+                current = asyncio.current_task()
+                stopping = current is not None and current.cancelling() > 0
+                self._async_finish(
+                    job,
+                    error=HomeAssistantError("Print job cancelled"),
+                    cancelled=not stopping,
+                )
+                if stopping:
+                    job.task.cancel()
+                    raise
+            except HomeAssistantError as err:
+                # Nobody may wait for the job, the log is its only trace
+                _LOGGER.warning(
+                    "Print job %s for %s failed: %s", job.description, self.name, err
+                )
+                self._async_finish(job, error=err)
+            except Exception as err:  # pylint: disable=broad-except
+                _LOGGER.exception(
+                    "Print job %s for %s failed", job.description, self.name
+                )
+                self._async_finish(job, error=err)
+            else:
+                self._async_finish(job, result=result)
+
+    @callback
+    def _async_finish(
+        self,
+        job: PrintJob,
+        result: Any = None,
+        error: Exception | None = None,
+        cancelled: bool = False,
+    ) -> None:
+        """Record the outcome of a job and release its waiters."""
+        if job.handle not in self.jobs:
+            return
+        job.result = result
+        job.error = error
+        if cancelled:
+            job.status = STATUS_CANCELLED
+        elif error is not None:
+            job.status = STATUS_FAILED
+        else:
+            job.status = STATUS_DONE
+        job._finished.set()  # pylint: disable=protected-access
+        self.jobs.pop(job.handle, None)
+        self._on_change()
+        self._async_notify(job)
+        self._notified.pop(job.handle, None)
+
+    @callback
+    def _async_notify(self, job: PrintJob) -> None:
+        """Tell the listeners that a job changed."""
+        if (timer := self._progress_timers.pop(job.handle, None)) is not None:
+            timer.cancel()
+        self._notified[job.handle] = time.monotonic()
+        for listener in list(self._listeners):
+            listener(job)
@@ -0,0 +1,210 @@
+"""Template rendering to PDF for IPP Printer Service."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+import hashlib
+import logging
+import os
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError, TemplateError
+from homeassistant.helpers import template
+
+from .const import DOMAIN
+from .preprocess import async_get_process_pool, import_worker_module
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_RENDERER = f"{DOMAIN}_renderer"
+
+_layout = import_worker_module("ipp_printer_service_layout")
+
+# Number of compiled templates kept, templates are usually few and reused
+TEMPLATE_CACHE_SIZE = 32
+# Total size of the rendered documents kept for identical renders
+DOCUMENT_CACHE_SIZE = 32 * 1024 * 1024
+# Largest template file or image read
+MAX_FILE_SIZE = 16 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class RenderedDocument:
+    """A template rendered to PDF."""
+
+    pdf: bytes
+    pages: int
+    digest: str
+    cached: bool = False
+
+
+class TemplateRenderer:
+    """Render templates written in the layout language to PDF documents.
+
+    Shared by all entries. Compiled templates are kept by source, template
+    files and images by path until their modification time changes, and
+    documents by a hash of the rendered text and the images it shows. The
+    hash is taken after rendering, so templates reading entity states are
+    laid out again when a state they show changed. Laying out runs in the
+    process pool also used to preprocess documents.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the renderer."""
+        self.hass = hass
+        self.hits = 0
+        self.misses = 0
+        self._templates: OrderedDict[str, template.Template] = OrderedDict()
+        self._files: dict[str, tuple[float, bytes]] = {}
+        self._documents: OrderedDict[str, RenderedDocument] = OrderedDict()
+        self._documents_size = 0
+        self._rendering: dict[str, asyncio.Future[RenderedDocument]] = {}
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return the cache counters."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "templates": len(self._templates),
+            "files": len(self._files),
+            "documents": len(self._documents),
+            "size": self._documents_size,
+            "max_size": DOCUMENT_CACHE_SIZE,
+        }
+
+    async def async_render(
+        self,
+        source: str | None = None,
+        template_file: str | None = None,
+        variables: dict[str, Any] | None = None,
+    ) -> RenderedDocument:
+        """Render a template, given as source or as a file, to PDF."""
+        if template_file:
+            source = (await self._async_read_file(template_file)).decode()
+        if not source:
+            raise HomeAssistantError("A template or a template file is required")
+
+        try:
+            text = self._async_get_template(source).async_render(
+                variables, parse_result=False
+            )
+        except TemplateError as err:
+            raise HomeAssistantError(f"Failed to render template: {err}") from err
+
+        assets = {
+            path: await self._async_read_file(path)
+            for path in _layout.image_paths(text)
+        }
+        digest = _digest(text, assets)
+
+        if (document := self._documents.get(digest)) is not None:
+            self._documents.move_to_end(digest)
+            self.hits += 1
+            return RenderedDocument(document.pdf, document.pages, digest, cached=True)
+        if (rendering := self._rendering.get(digest)) is not None:
+            # The same document is already being laid out for another call
+            self.hits += 1
+            document = await asyncio.shield(rendering)
+            return RenderedDocument(document.pdf, document.pages, digest, cached=True)
+
+        self.misses += 1
+        rendering = self._rendering[digest] = self.hass.loop.create_future()
+        try:
+            # Submitting may start the worker processes, keep that off the loop
+            future = await self.hass.async_add_executor_job(
+                async_get_process_pool(self.hass).submit,
+                _layout.layout_pdf,
+                text,
+                assets,
+            )
+            result = await asyncio.wrap_future(future)
+        except Exception as err:
+            _LOGGER.debug("Laying out document failed", exc_info=True)
+            error = HomeAssistantError(f"Failed to lay out document: {err}")
+            rendering.set_exception(error)
+            rendering.exception()  # mark retrieved, the caller raises it
+            raise error from err
+        finally:
+            del self._rendering[digest]
+
+        document = RenderedDocument(result["pdf"], result["pages"], digest)
+        rendering.set_result(document)
+        self._async_store(document)
+        _LOGGER.debug(
+            "Rendered template to %d pages (%d bytes)", document.pages, len(document.pdf)
+        )
+        return document
+
+    @callback
+    def _async_get_template(self, source: str) -> template.Template:
+        """Return a compiled template."""
+        if (tpl := self._templates.get(source)) is not None:
+            self._templates.move_to_end(source)
+            return tpl
+        tpl = template.Template(source, self.hass)
+        try:
+            tpl.ensure_valid()
+        except TemplateError as err:
+            raise HomeAssistantError(f"Invalid template: {err}") from err
+        self._templates[source] = tpl
+        if len(self._templates) > TEMPLATE_CACHE_SIZE:
+            self._templates.popitem(last=False)
+        return tpl
+
+    @callback
+    def _async_store(self, document: RenderedDocument) -> None:
+        """Keep a document, evicting the least recently used ones."""
+        if len(document.pdf) > DOCUMENT_CACHE_SIZE:
+            return
+        self._documents[document.digest] = document
+        self._documents_size += len(document.pdf)
+        while self._documents_size > DOCUMENT_CACHE_SIZE:
+            _, evicted = self._documents.popitem(last=False)
+            self._documents_size -= len(evicted.pdf)
+
+    async def _async_read_file(self, path: str) -> bytes:
+        """Return the content of a file, read again only once it changed."""
+        cached = self._files.get(path)
+        try:
+            mtime, content = await self.hass.async_add_executor_job(
+                self._read_file, path, cached
+            )
+        except OSError as err:
+            raise HomeAssistantError(f"Failed to read {path}: {err}") from err
+        self._files[path] = (mtime, content)
+        return content
+
+    def _read_file(
+        self, path: str, cached: tuple[float, bytes] | None
+    ) -> tuple[float, bytes]:
+        """Read a file allowed to Home Assistant unless the cached copy is current."""
+        if not self.hass.config.is_allowed_path(path):
+            raise HomeAssistantError(f"Access to {path} is not allowed")
+        stat = os.stat(path)
+        if cached and cached[0] == stat.st_mtime:
+            return cached
+        if stat.st_size > MAX_FILE_SIZE:
+            raise HomeAssistantError(f"{path} is larger than {MAX_FILE_SIZE} bytes")
+        with open(path, "rb") as file:
+            return stat.st_mtime, file.read()
+
+
+def _digest(text: str, assets: dict[str, bytes]) -> str:
+    """Return the hash identifying a rendered document."""
+    digest = hashlib.sha256(text.encode())
+    for path, content in sorted(assets.items()):
+        digest.update(path.encode())
+        digest.update(hashlib.sha256(content).digest())
+    return digest.hexdigest()
+
+
+@callback
+def async_get_renderer(hass: HomeAssistant) -> TemplateRenderer:
+    """Return the renderer shared by all entries."""
+    if (renderer := hass.data.get(DATA_RENDERER)) is None:
+        renderer = hass.data[DATA_RENDERER] = TemplateRenderer(hass)
+    return renderer
@@ -0,0 +1,303 @@
+"""Retries and circuit breakers for IPP Printer Service."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+import logging
+import random
+import socket
+import time
+from typing import Any, TypeVar
+
+from aiohttp import ClientConnectorError
+from pyipp import IPPConnectionError, IPPError
+from pyipp.enums import IppOperation, IppStatus
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+DATA_BREAKERS = f"{DOMAIN}_breakers"
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+# Consecutive failures after which requests to a host fail fast
+FAILURE_THRESHOLD = 3
+# Time a breaker stays open before a probe request is let through, doubled
+# after every failed probe
+OPEN_DURATION = 30.0
+MAX_OPEN_DURATION = 600.0
+
+# Operations that can be sent again without side effects on the printer
+IDEMPOTENT_OPERATIONS = frozenset(
+    {
+        IppOperation.CUPS_GET_PRINTERS,
+        IppOperation.GET_JOB_ATTRIBUTES,
+        IppOperation.GET_JOBS,
+        IppOperation.GET_NOTIFICATIONS,
+        IppOperation.GET_PRINTER_ATTRIBUTES,
+    }
+)
+# Statuses of a printer refusing a request for now, before acting on it
+RETRYABLE_IPP_STATUSES = frozenset(
+    {
+        IppStatus.ERROR_BUSY,
+        IppStatus.ERROR_SERVICE_UNAVAILABLE,
+        IppStatus.ERROR_TEMPORARY,
+    }
+)
+RETRYABLE_HTTP_STATUSES = frozenset({429, 502, 503, 504})
+
+
+class CircuitOpenError(IPPConnectionError):
+    """Error raised instead of contacting a host known to be unreachable."""
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How often and how long to wait before sending a request again."""
+
+    attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 10.0
+
+    def delay(self, attempt: int) -> float:
+        """Return a random delay before an attempt, growing exponentially."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+
+def error_status(err: BaseException) -> int | None:
+    """Return the IPP or HTTP status code carried by an IPP error."""
+    if len(err.args) > 1 and isinstance(err.args[1], dict):
+        return err.args[1].get("status-code")
+    return None
+
+
+def is_host_failure(err: BaseException) -> bool:
+    """Return True if an error means the host could not be reached."""
+    return isinstance(err, IPPConnectionError) and not isinstance(
+        err, CircuitOpenError
+    )
+
+
+def is_retryable(err: BaseException) -> bool:
+    """Return True if a request may succeed when sent again."""
+    if isinstance(err, CircuitOpenError):
+        return False
+    if isinstance(err, IPPConnectionError):
+        return True
+    if isinstance(err, IPPError):
+        return error_status(err) in RETRYABLE_IPP_STATUSES | RETRYABLE_HTTP_STATUSES
+    return False
+
+
+def is_unprocessed(err: BaseException) -> bool:
+    """Return True if the printer certainly did not act on a failed request.
+
+    That is the case when no connection could be established, or when the
+    printer refused the request because it is busy.
+    """
+    if isinstance(err, CircuitOpenError):
+        return True
+    if isinstance(err, IPPError) and not isinstance(err, IPPConnectionError):
+        return error_status(err) in RETRYABLE_IPP_STATUSES | RETRYABLE_HTTP_STATUSES
+    cause: BaseException | None = err
+    while cause is not None:
+        if isinstance(cause, (ClientConnectorError, socket.gaierror)):
+            return True
+        cause = cause.__cause__
+    return False
+
+
+class CircuitBreaker:
+    """Fail fast on requests to a host after repeated connection failures.
+
+    Shared by every entry and flow talking to the same host. After
+    FAILURE_THRESHOLD consecutive failures the breaker opens and requests
+    fail right away. Once the open duration elapsed a single probe request
+    is let through: it closes the breaker when it succeeds and opens it
+    again, for twice as long, when it fails.
+    """
+
+    def __init__(self, host: str, port: int) -> None:
+        """Initialize the breaker."""
+        self.host = host
+        self.port = port
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.rejected = 0
+        self.open_duration = OPEN_DURATION
+        self.opened_at: float | None = None
+        self.last_error: str | None = None
+        self._probing = False
+        self._listeners: list[CALLBACK_TYPE] = []
+
+    @property
+    def retry_in(self) -> float | None:
+        """Return the seconds left before a probe is let through."""
+        if self.state != STATE_OPEN or self.opened_at is None:
+            return None
+        return max(0.0, self.opened_at + self.open_duration - time.monotonic())
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return the breaker state and counters."""
+        return {
+            "host": self.host,
+            "port": self.port,
+            "state": self.state,
+            "failures": self.failures,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "retry_in": round(retry_in, 1)
+            if (retry_in := self.retry_in) is not None
+            else None,
+            "last_error": self.last_error,
+        }
+
+    @callback
+    def async_add_listener(self, listener: CALLBACK_TYPE) -> CALLBACK_TYPE:
+        """Call a listener when the state changes, returning its remover."""
+        self._listeners.append(listener)
+
+        @callback
+        def _remove() -> None:
+            self._listeners.remove(listener)
+
+        return _remove
+
+    @callback
+    def async_before_request(self) -> None:
+        """Raise CircuitOpenError unless a request may be sent."""
+        if self.state == STATE_CLOSED:
+            return
+        if self.state == STATE_OPEN and not self.retry_in:
+            self._async_set_state(STATE_HALF_OPEN)
+        if self.state == STATE_HALF_OPEN and not self._probing:
+            self._probing = True
+            return
+        self.rejected += 1
+        raise CircuitOpenError(
+            f"{self.host}:{self.port} is unreachable, not retrying for "
+            f"{self.retry_in or 0:.0f} seconds ({self.last_error})"
+        )
+
+    @callback
+    def async_record_success(self) -> None:
+        """Record a request the host answered."""
+        self._probing = False
+        self.failures = 0
+        if self.state != STATE_CLOSED:
+            _LOGGER.info("%s:%s is reachable again", self.host, self.port)
+            self.open_duration = OPEN_DURATION
+            self._async_set_state(STATE_CLOSED)
+
+    @callback
+    def async_record_failure(self, err: BaseException) -> None:
+        """Record a request that could not reach the host."""
+        self.failures += 1
+        self.last_error = str(err)
+        if self.state == STATE_HALF_OPEN:
+            self._probing = False
+            self.open_duration = min(self.open_duration * 2, MAX_OPEN_DURATION)
+            self._async_open()
+        elif self.state == STATE_CLOSED and self.failures >= FAILURE_THRESHOLD:
+            _LOGGER.warning(
+                "%s:%s failed %d times in a row, pausing requests for %.0f seconds: %s",
+                self.host,
+                self.port,
+                self.failures,
+                self.open_duration,
+                err,
+            )
+            self.trips += 1
+            self._async_open()
+
+    @callback
+    def async_release_probe(self) -> None:
+        """Let another probe through after one ended without an answer."""
+        self._probing = False
+
+    @callback
+    def _async_open(self) -> None:
+        """Open the breaker."""
+        self.opened_at = time.monotonic()
+        self._async_set_state(STATE_OPEN)
+
+    @callback
+    def _async_set_state(self, state: str) -> None:
+        """Change the state and notify the listeners."""
+        if state == self.state:
+            return
+        self.state = state
+        for listener in list(self._listeners):
+            listener()
+
+
+@callback
+def async_get_breaker(hass: HomeAssistant, host: str, port: int) -> CircuitBreaker:
+    """Return the circuit breaker of a host."""
+    breakers: dict[tuple[str, int], CircuitBreaker] = hass.data.setdefault(
+        DATA_BREAKERS, {}
+    )
+    if (breaker := breakers.get((host, port))) is None:
+        breaker = breakers[host, port] = CircuitBreaker(host, port)
+    return breaker
+
+
+async def async_call(
+    breaker: CircuitBreaker,
+    request: Callable[[], Awaitable[_T]],
+    retry: Callable[[BaseException], bool] = is_retryable,
+    policy: RetryPolicy = DEFAULT_RETRY_POLICY,
+) -> _T:
+    """Send a request through a host's breaker, retrying with back-off.
+
+    ``retry`` decides whether a failed request may be sent again. Only
+    connection errors count as failures of the host, errors raised by the
+    request itself, such as DocumentSourceError, leave the breaker as is.
+    """
+    attempt = 0
+    while True:
+        breaker.async_before_request()
+        try:
+            result = await request()
+        except asyncio.CancelledError:
+            breaker.async_release_probe()
+            raise
+        except Exception as err:
+            if is_host_failure(err):
+                breaker.async_record_failure(err)
+            elif isinstance(err, IPPError):
+                # The host answered, even if with an error
+                breaker.async_record_success()
+            else:
+                # The document source failed, that says nothing about the host
+                breaker.async_release_probe()
+            attempt += 1
+            if attempt >= policy.attempts or not retry(err):
+                raise
+            delay = policy.delay(attempt)
+            _LOGGER.debug(
+                "Request to %s:%s failed (%s), retrying in %.2f seconds",
+                breaker.host,
+                breaker.port,
+                err,
+                delay,
+            )
+            await asyncio.sleep(delay)
+        else:
+            breaker.async_record_success()
+            return result
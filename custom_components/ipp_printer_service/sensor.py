@@ -4,23 +4,30 @@ from __future__ import annotations
 
 from typing import Any
 
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import DOMAIN
 from .coordinator import IPPPrinterServiceCoordinator
+from .entity import IPPEntity
 
 
-from homeassistant.const import EntityCategory
+from homeassistant.const import EntityCategory, UnitOfInformation
 from homeassistant.const import (
     CONF_HOST,
     CONF_PORT,
 )
 from .const import CONF_PRINTER_NAME
 
+# Number of most recent jobs listed in the Last Print Job attributes
+HISTORY_ATTRIBUTE_SIZE = 10
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -33,17 +40,26 @@ async def async_setup_entry(
         [
             IPPPrinterSensor(coordinator, entry),
             IPPLastJobSensor(coordinator, entry),
+            IPPQueueDepthSensor(coordinator, entry),
+            IPPSpoolSensor(coordinator, entry),
         ]
     )
 
 
-class IPPPrinterSensor(CoordinatorEntity[IPPPrinterServiceCoordinator], SensorEntity):
+class IPPPrinterSensor(IPPEntity, SensorEntity):
     """Representation of an IPP Printer Sensor."""
 
     _attr_has_entity_name = True
     _attr_name = "Status"
     _attr_icon = "mdi:printer"
 
+    # Printer attributes read by this entity, polled while it is enabled
+    _ipp_attributes = (
+        "printer-state",
+        "printer-state-message",
+        "printer-state-reasons",
+    )
+
     def __init__(
         self,
         coordinator: IPPPrinterServiceCoordinator,
@@ -69,6 +85,21 @@ class IPPPrinterSensor(CoordinatorEntity[IPPPrinterServiceCoordinator], SensorEn
             "via_device": (DOMAIN, entry.entry_id),
         }
 
+    async def async_added_to_hass(self) -> None:
+        """Request the printer attributes of this entity."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_request_attributes(self._ipp_attributes)
+        )
+
+    @callback
+    def _state_fingerprint(self) -> Any:
+        """Return the printer state fields shown by the sensor."""
+        if self.coordinator.data and self.coordinator.data.printer:
+            state = self.coordinator.data.printer.state
+            return (state.printer_state, state.message, str(state.reasons))
+        return None
+
     @property
     def native_value(self) -> str | None:
         """Return the state of the sensor."""
@@ -87,13 +118,15 @@ class IPPPrinterSensor(CoordinatorEntity[IPPPrinterServiceCoordinator], SensorEn
         return {}
 
 
-class IPPLastJobSensor(CoordinatorEntity[IPPPrinterServiceCoordinator], SensorEntity):
+class IPPLastJobSensor(IPPEntity, SensorEntity):
     """Representation of the Last Print Job Diagnostic Sensor."""
 
     _attr_has_entity_name = True
     _attr_name = "Last Print Job"
     _attr_icon = "mdi:file-document-outline"
     _attr_entity_category = EntityCategory.DIAGNOSTIC
+    # The history changes with every job, keep it out of the recorder
+    _unrecorded_attributes = frozenset({"history"})
 
     def __init__(
         self,
@@ -119,6 +152,89 @@ class IPPLastJobSensor(CoordinatorEntity[IPPPrinterServiceCoordinator], SensorEn
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
         """Return the state attributes."""
+        attributes: dict[str, Any] = {}
         if self.coordinator.data and self.coordinator.data.last_print_job:
-            return self.coordinator.data.last_print_job
-        return {}
+            attributes.update(self.coordinator.data.last_print_job)
+        attributes["history"] = list(self.coordinator.jobs.history)[
+            -HISTORY_ATTRIBUTE_SIZE:
+        ]
+        return attributes
+
+
+class IPPQueueDepthSensor(IPPEntity, SensorEntity):
+    """Representation of the Print Queue Depth Diagnostic Sensor."""
+
+    _attr_has_entity_name = True
+    _attr_name = "Print Queue"
+    _attr_icon = "mdi:tray-full"
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_native_unit_of_measurement = "jobs"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(
+        self,
+        coordinator: IPPPrinterServiceCoordinator,
+        entry: ConfigEntry,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._entry = entry
+        self._attr_unique_id = f"{entry.entry_id}_print_queue"
+
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, entry.entry_id)},
+        }
+
+    @property
+    def native_value(self) -> int:
+        """Return the number of jobs waiting in the queue."""
+        return self.coordinator.queue.depth
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the state attributes."""
+        queue = self.coordinator.queue
+        return {
+            "active": queue.active,
+            "workers": queue.workers,
+            "max_size": queue.max_size,
+            "jobs": [job.as_dict() for job in queue.jobs.values()],
+        }
+
+
+class IPPSpoolSensor(IPPEntity, SensorEntity):
+    """Representation of the Spool Size Diagnostic Sensor."""
+
+    _attr_has_entity_name = True
+    _attr_name = "Spool"
+    _attr_icon = "mdi:folder-file"
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_device_class = SensorDeviceClass.DATA_SIZE
+    _attr_native_unit_of_measurement = UnitOfInformation.BYTES
+    _attr_suggested_unit_of_measurement = UnitOfInformation.MEBIBYTES
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(
+        self,
+        coordinator: IPPPrinterServiceCoordinator,
+        entry: ConfigEntry,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._entry = entry
+        self._attr_unique_id = f"{entry.entry_id}_spool"
+
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, entry.entry_id)},
+        }
+
+    @property
+    def native_value(self) -> int:
+        """Return the number of bytes waiting on disk."""
+        return self.coordinator.spool.size
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the state attributes."""
+        stats = self.coordinator.spool.stats
+        return {key: value for key, value in stats.items() if key != "size"}
@@ -0,0 +1,193 @@
+"""Shared CUPS server polling for IPP Printer Service."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable, Iterable
+from datetime import datetime, timedelta
+import logging
+from typing import Any
+
+from pyipp.enums import IppOperation
+
+from homeassistant.const import (
+    CONF_HOST,
+    CONF_PASSWORD,
+    CONF_PORT,
+    CONF_SSL,
+    CONF_USERNAME,
+    CONF_VERIFY_SSL,
+)
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from .client import IPPPrinterServiceClient
+from .const import CONF_BASE_PATH, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_SERVERS = f"{DOMAIN}_servers"
+
+PrinterListener = Callable[[dict[str, Any]], None]
+
+
+class CUPSServer:
+    """Fetch the state of every queue of a CUPS server in one request.
+
+    Entries of printers on the same server share one instance. Whenever one
+    of them needs fresh data a single CUPS-Get-Printers request is sent and
+    the result is pushed to all the other entries, so N queues cost one
+    request per poll interval instead of N.
+    """
+
+    def __init__(self, hass: HomeAssistant, client: IPPPrinterServiceClient) -> None:
+        """Initialize the server."""
+        self.hass = hass
+        self.client = client
+        self.requests = 0
+        self.printers: dict[str, dict[str, Any]] = {}
+        self.last_update: datetime | None = None
+        # Keyed by entry id, as several entries may poll the same queue
+        self._listeners: dict[str, tuple[str, PrinterListener]] = {}
+        self._requested: dict[str, set[str]] = {}
+        self._refs = 0
+        self._fetch: asyncio.Task[dict[str, dict[str, Any]]] | None = None
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return the server counters."""
+        return {
+            "host": self.client.host,
+            "port": self.client.port,
+            "printers": len(self.printers),
+            "entries": self._refs,
+            "requests": self.requests,
+            "last_update": self.last_update.isoformat() if self.last_update else None,
+        }
+
+    @callback
+    def async_acquire(self) -> None:
+        """Register an entry using the server."""
+        self._refs += 1
+
+    @callback
+    def async_release(self) -> bool:
+        """Unregister an entry, returning True once no entry uses the server."""
+        self._refs -= 1
+        return self._refs <= 0
+
+    async def async_close(self) -> None:
+        """Stop fetching and close the connection pool."""
+        if self._fetch is not None and not self._fetch.done():
+            self._fetch.cancel()
+        await self.client.close()
+
+    @callback
+    def async_add_listener(
+        self, entry_id: str, printer_name: str, listener: PrinterListener
+    ) -> None:
+        """Push the attributes of an entry's printer to a listener after every fetch."""
+        self._listeners[entry_id] = (printer_name, listener)
+
+    @callback
+    def async_remove_listener(self, entry_id: str) -> None:
+        """Stop pushing the attributes of an entry's printer."""
+        self._listeners.pop(entry_id, None)
+        self._requested.pop(entry_id, None)
+
+    async def async_get_printer(
+        self,
+        entry_id: str,
+        printer_name: str,
+        max_age: timedelta,
+        attributes: Iterable[str],
+    ) -> dict[str, Any] | None:
+        """Return the attributes of a printer, fetching them if older than max_age.
+
+        Only the union of the attributes requested by every entry is fetched.
+        """
+        self._requested[entry_id] = set(attributes)
+        if self.last_update is None or dt_util.utcnow() - self.last_update > max_age:
+            # Concurrent callers wait for the same request
+            if self._fetch is None or self._fetch.done():
+                self._fetch = self.hass.async_create_task(
+                    self._async_fetch(exclude=entry_id)
+                )
+            await asyncio.shield(self._fetch)
+
+        return self.printers.get(printer_name)
+
+    async def _async_fetch(self, exclude: str) -> dict[str, dict[str, Any]]:
+        """Fetch all queues of the server and push them to the listeners."""
+        self.requests += 1
+        response = await self.client.execute(
+            IppOperation.CUPS_GET_PRINTERS,
+            {
+                "operation-attributes-tag": {
+                    "requesting-user-name": "Home Assistant",
+                    "requested-attributes": sorted(
+                        {"printer-name"}.union(*self._requested.values())
+                    ),
+                }
+            },
+            path="/",
+        )
+        self.printers = {
+            attributes["printer-name"]: attributes
+            for attributes in response["printers"]
+            if "printer-name" in attributes
+        }
+        self.last_update = dt_util.utcnow()
+        _LOGGER.debug(
+            "Fetched %d printers from %s:%s",
+            len(self.printers),
+            self.client.host,
+            self.client.port,
+        )
+
+        for entry_id, (printer_name, listener) in list(self._listeners.items()):
+            if entry_id != exclude and printer_name in self.printers:
+                listener(self.printers[printer_name])
+
+        return self.printers
+
+
+def is_cups_queue(data: dict[str, Any]) -> bool:
+    """Return True if an entry points to a queue of a CUPS server."""
+    return (data.get(CONF_BASE_PATH) or "").startswith(("/printers/", "/classes/"))
+
+
+@callback
+def async_get_server(
+    hass: HomeAssistant, client: IPPPrinterServiceClient
+) -> CUPSServer:
+    """Return the shared server for the connection settings of a client."""
+    servers: dict[tuple[Any, ...], CUPSServer] = hass.data.setdefault(
+        DATA_SERVERS, {}
+    )
+    if (server := servers.get(client.connection_key)) is None:
+        server_client = IPPPrinterServiceClient(
+            hass,
+            {
+                CONF_HOST: client.host,
+                CONF_PORT: client.port,
+                CONF_SSL: client.tls,
+                CONF_VERIFY_SSL: client.verify_ssl,
+                CONF_USERNAME: client.username,
+                CONF_PASSWORD: client.password,
+                CONF_BASE_PATH: "/",
+            },
+        )
+        server = servers[client.connection_key] = CUPSServer(hass, server_client)
+    server.async_acquire()
+    return server
+
+
+async def async_release_server(hass: HomeAssistant, server: CUPSServer) -> None:
+    """Release a shared server, closing it once no entry uses it."""
+    if not server.async_release():
+        return
+
+    servers: dict[tuple[Any, ...], CUPSServer] = hass.data.get(DATA_SERVERS, {})
+    servers.pop(server.client.connection_key, None)
+    await server.async_close()
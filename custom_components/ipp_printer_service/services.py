@@ -1,245 +1,978 @@
+import asyncio
 import logging
-import tempfile
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import aclosing, asynccontextmanager
 from datetime import datetime
 from pathlib import Path
+from typing import Any
 
-import aiofiles
 from aiohttp import ClientError
-from pyipp import IPP
+from pyipp import IPPError
 from pyipp.enums import IppOperation
-from pyipp.exceptions import IPPError
+from yarl import URL
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import (
-    CONF_HOST,
-    CONF_PORT,
-    CONF_SSL,
-    CONF_VERIFY_SSL,
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
 )
-from homeassistant.core import HomeAssistant, ServiceCall
 from homeassistant.exceptions import HomeAssistantError
-from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers import entity_registry as er, template
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
-
-from .const import CONF_SIMULATION_MODE
+from homeassistant.helpers.network import get_url
+
+from .cache import DocumentCache
+from .capabilities import UnsupportedOptionError
+from .client import IPPPrinterServiceClient
+from .const import (
+    CONF_CHUNK_SIZE,
+    CONF_COMPRESSION,
+    CONF_SIMULATION_MODE,
+    DEFAULT_CHUNK_SIZE,
+)
+from .group import GroupDispatch, PrinterError
+from .preprocess import (
+    PAGES_PER_SHEET,
+    PreprocessOptions,
+    async_preprocess,
+    parse_page_ranges,
+)
+from .print_queue import (
+    PRIORITIES,
+    PRIORITY_NORMAL,
+    PrintJob,
+    async_iter_progress,
+    current_job,
+)
+from .render import async_get_renderer
+from .spool import async_path_exists, async_remove_files
+from .streaming import (
+    COMPRESSION_MIN_SIZE,
+    TransferStats,
+    async_iter_bytes,
+    async_iter_counted,
+    async_iter_file,
+    async_iter_gzip,
+    async_iter_response,
+    async_read_ahead,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
+# Number of batch documents whose source is opened ahead of the one being sent
+BATCH_PREFETCH = 4
+
+DEFAULT_BATCH_JOB_NAME = "Home Assistant Batch"
+DEFAULT_TEMPLATE_JOB_NAME = "Home Assistant Document"
+
 
 async def async_setup_services(hass: HomeAssistant):
     """Set up the IPP Printer Service services."""
 
-    async def async_print_pdf(call: ServiceCall):
+    async def async_print_pdf(call: ServiceCall) -> ServiceResponse:
         """Handle the print_pdf service call."""
-        entity_id = call.data.get("entity_id")
+        entity_ids = call.data.get("entity_id")
         file_path_template = call.data.get("file_path")
         is_local_path = call.data.get("is_local_path", False)
         copies = call.data.get("copies", 1)
+        job_name = call.data.get("job_name")
+        priority = call.data.get("priority", PRIORITY_NORMAL)
+        wait = call.data.get("wait", False)
+        job_attributes = {
+            name: value
+            for name in ("sides", "media")
+            if (value := call.data.get(name))
+        }
+        preprocess = PreprocessOptions(
+            page_ranges=call.data.get("page_ranges") or None,
+            pages_per_sheet=int(call.data.get("pages_per_sheet", 1)),
+            image_dpi=int(call.data.get("image_dpi") or 0) or None,
+            image_quality=int(call.data.get("image_quality") or 0) or None,
+        )
 
         if not isinstance(file_path_template, str):
             raise HomeAssistantError("File path must be a string template")
 
-        from homeassistant.helpers import template
-        from homeassistant.helpers.network import get_url
+        file_path = _render_file_path(hass, file_path_template, is_local_path)
 
-        tpl = template.Template(file_path_template, hass)
-        file_path = tpl.async_render(parse_result=False)
+        if isinstance(entity_ids, str):
+            entity_ids = [entity_ids]
+        if not entity_ids:
+            raise HomeAssistantError("Entity ID is required")
+        if priority not in PRIORITIES:
+            raise HomeAssistantError(f"Invalid priority: {priority}")
+        if preprocess.pages_per_sheet not in PAGES_PER_SHEET:
+            raise HomeAssistantError(
+                f"Invalid pages per sheet: {preprocess.pages_per_sheet}"
+            )
+        if preprocess.page_ranges:
+            try:
+                parse_page_ranges(preprocess.page_ranges)
+            except ValueError as err:
+                raise HomeAssistantError(f"Invalid page ranges: {err}") from err
+
+        members = [
+            (entity_id, async_get_config_entry(hass, entity_id))
+            for entity_id in dict.fromkeys(entity_ids)
+        ]
+        # Reject options the printers do not support before reading the document
+        members = _supporting_members(members, copies, job_attributes)
+        await _async_check_file_exists(hass, file_path)
+        job_name = job_name or _default_job_name(file_path)
+
+        if len(members) > 1:
+            return await _async_print_to_group(
+                hass,
+                members,
+                file_path,
+                copies,
+                job_name,
+                priority,
+                wait,
+                preprocess,
+                job_attributes,
+            )
+
+        entity_id, config_entry = members[0]
+        coordinator = config_entry.runtime_data
+
+        async def _async_run_job() -> int | None:
+            return await async_print_document(
+                hass,
+                config_entry,
+                entity_id,
+                file_path,
+                copies,
+                job_name,
+                preprocess,
+                job_attributes=job_attributes,
+            )
+
+        job = coordinator.queue.async_submit(file_path, _async_run_job, priority)
+
+        response: dict[str, Any] = {}
+        if wait:
+            response["job_id"] = await job.async_wait()
+
+        return {
+            "job_handle": job.handle,
+            "status": job.status,
+            "queue_depth": coordinator.queue.depth,
+            **response,
+        }
+
+    async def async_print_batch(call: ServiceCall) -> ServiceResponse:
+        """Handle the print_batch service call."""
+        entity_id = call.data.get("entity_id")
+        file_path_templates = call.data.get("file_paths")
+        is_local_path = call.data.get("is_local_path", False)
+        copies = call.data.get("copies", 1)
+        job_name = call.data.get("job_name") or DEFAULT_BATCH_JOB_NAME
+        priority = call.data.get("priority", PRIORITY_NORMAL)
+        wait = call.data.get("wait", True)
+
+        if isinstance(file_path_templates, str):
+            file_path_templates = [file_path_templates]
+        if not file_path_templates or not all(
+            isinstance(template, str) for template in file_path_templates
+        ):
+            raise HomeAssistantError("File paths must be a list of string templates")
 
         if not entity_id:
             raise HomeAssistantError("Entity ID is required")
-        if not file_path:
-            raise HomeAssistantError("File path is required")
+        if priority not in PRIORITIES:
+            raise HomeAssistantError(f"Invalid priority: {priority}")
+
+        # Resolve the target once for the whole batch
+        config_entry = async_get_config_entry(hass, entity_id)
+        config_entry.runtime_data.capabilities.validate(copies)
+        file_paths = [
+            _render_file_path(hass, template, is_local_path)
+            for template in file_path_templates
+        ]
+        for file_path in file_paths:
+            await _async_check_file_exists(hass, file_path)
+
+        coordinator = config_entry.runtime_data
+
+        async def _async_run_job() -> dict[str, Any]:
+            return await _async_print_batch(
+                hass, config_entry, entity_id, file_paths, copies, job_name
+            )
 
-        if is_local_path:
-            # Make sure it starts with / if not already
-            if not file_path.startswith("/"):
-                file_path = f"/{file_path}"
+        job = coordinator.queue.async_submit(
+            f"{job_name} ({len(file_paths)} documents)", _async_run_job, priority
+        )
 
-            # Use local loopback for safety and speed
-            # We assume standard port 8123 or try to fetch it
-            try:
-                base_url = get_url(
-                    hass, allow_external=False, allow_ip=True, allow_cloud=False
+        if not wait:
+            return {
+                "job_handle": job.handle,
+                "status": job.status,
+                "queue_depth": coordinator.queue.depth,
+            }
+
+        result = await job.async_wait()
+        return {"job_handle": job.handle, "status": job.status, **result}
+
+    async def async_print_template(call: ServiceCall) -> ServiceResponse:
+        """Handle the print_template service call."""
+        entity_id = call.data.get("entity_id")
+        source = call.data.get("template")
+        template_file = call.data.get("template_file")
+        variables = call.data.get("variables") or {}
+        copies = call.data.get("copies", 1)
+        job_name = call.data.get("job_name") or DEFAULT_TEMPLATE_JOB_NAME
+        priority = call.data.get("priority", PRIORITY_NORMAL)
+        wait = call.data.get("wait", False)
+        job_attributes = {
+            name: value
+            for name in ("sides", "media")
+            if (value := call.data.get(name))
+        }
+
+        if not entity_id:
+            raise HomeAssistantError("Entity ID is required")
+        if bool(source) == bool(template_file):
+            raise HomeAssistantError("Either a template or a template file is required")
+        if not isinstance(variables, dict):
+            raise HomeAssistantError("Variables must be a mapping")
+        if priority not in PRIORITIES:
+            raise HomeAssistantError(f"Invalid priority: {priority}")
+
+        config_entry = async_get_config_entry(hass, entity_id)
+        coordinator = config_entry.runtime_data
+        coordinator.capabilities.validate(copies, **job_attributes)
+
+        # Render before queueing, so template errors are raised to the caller
+        with coordinator.metrics.span("render"):
+            document = await async_get_renderer(hass).async_render(
+                source, template_file, variables
+            )
+        description = template_file or f"template {document.digest[:12]}"
+        chunk_size = (
+            config_entry.options.get(CONF_CHUNK_SIZE, DEFAULT_CHUNK_SIZE) * 1024
+        )
+
+        async def _async_run_job() -> int | None:
+            with coordinator.metrics.span("print"):
+                return await async_print_chunks(
+                    config_entry,
+                    entity_id,
+                    description,
+                    async_iter_bytes(document.pdf, chunk_size),
+                    copies,
+                    job_name,
+                    job_attributes,
                 )
-            except Exception:
-                # Fallback if get_url can't determine it easily (e.g. strict setup)
-                # But usually 127.0.0.1:8123 is a safe bet for internal calls if not behind weird proxy
-                base_url = "http://127.0.0.1:8123"
 
-            file_path = f"{base_url}{file_path}"
-            _LOGGER.debug("Converted local path to URL: %s", file_path)
+        job = coordinator.queue.async_submit(description, _async_run_job, priority)
+
+        response: dict[str, Any] = {}
+        if wait:
+            response["job_id"] = await job.async_wait()
+
+        return {
+            "job_handle": job.handle,
+            "status": job.status,
+            "queue_depth": coordinator.queue.depth,
+            "pages": document.pages,
+            "size": len(document.pdf),
+            "cached": document.cached,
+            **response,
+        }
+
+    hass.services.async_register(
+        "ipp_printer_service",
+        "print_pdf",
+        async_print_pdf,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        "ipp_printer_service",
+        "print_batch",
+        async_print_batch,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        "ipp_printer_service",
+        "print_template",
+        async_print_template,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+
+def _render_file_path(
+    hass: HomeAssistant, file_path_template: str, is_local_path: bool
+) -> str:
+    """Render a file path template and resolve local Home Assistant paths."""
+    tpl = template.Template(file_path_template, hass)
+    file_path = tpl.async_render(parse_result=False)
+
+    if not file_path:
+        raise HomeAssistantError("File path is required")
+
+    if is_local_path:
+        # Make sure it starts with / if not already
+        if not file_path.startswith("/"):
+            file_path = f"/{file_path}"
+
+        # Use local loopback for safety and speed
+        # We assume standard port 8123 or try to fetch it
+        try:
+            base_url = get_url(
+                hass, allow_external=False, allow_ip=True, allow_cloud=False
+            )
+        except Exception:
+            # Fallback if get_url can't determine it easily (e.g. strict setup)
+            # But usually 127.0.0.1:8123 is a safe bet for internal calls if not behind weird proxy
+            base_url = "http://127.0.0.1:8123"
 
-        # Handle URL download
-        is_url = file_path.startswith(("http://", "https://"))
-        msg_file_path = file_path  # For logging purposes
+        file_path = f"{base_url}{file_path}"
+        _LOGGER.debug("Converted local path to URL: %s", file_path)
 
-        if is_url:
-            session = async_get_clientsession(hass)
-            try:
-                async with session.get(file_path) as response:
-                    response.raise_for_status()
-                    content = await response.read()
-
-                    # Create a temporary file
-                    # We use delete=False because we need to close it before
-                    # passing to the rest of the logic which opens it again
-                    # and eventually deletes it
-                    with tempfile.NamedTemporaryFile(
-                        suffix=".pdf", delete=False
-                    ) as tmp:
-                        tmp.write(content)
-                        file_path = tmp.name
-
-                    _LOGGER.info(
-                        "Downloaded %s to temporary file %s", msg_file_path, file_path
-                    )
+    return file_path
 
-            except (ClientError, OSError) as err:
-                raise HomeAssistantError(
-                    f"Failed to download file from {msg_file_path}: {err}"
-                ) from err
-        elif not Path(file_path).exists():
-            raise HomeAssistantError(f"File not found: {file_path}")
 
-        registry = er.async_get(hass)
-        entry = registry.async_get(entity_id)
+def async_get_config_entry(hass: HomeAssistant, entity_id: str) -> ConfigEntry:
+    """Return the IPP Printer Service config entry an entity belongs to."""
+    registry = er.async_get(hass)
+    entry = registry.async_get(entity_id)
 
-        # Helper to clean up temp file if something goes wrong
-        def cleanup_temp_file():
-            if is_url:
-                try:
-                    path_obj = Path(file_path)
-                    if path_obj.exists():
-                        path_obj.unlink()
-                except OSError as cleanup_err:
-                    _LOGGER.warning(
-                        "Failed to remove temporary file %s: %s", file_path, cleanup_err
-                    )
+    if not entry:
+        raise HomeAssistantError(f"Entity not found: {entity_id}")
 
-        if not entry:
-            cleanup_temp_file()
-            raise HomeAssistantError(f"Entity not found: {entity_id}")
+    if not entry.config_entry_id:
+        raise HomeAssistantError(f"Entity {entity_id} is not linked to a config entry")
 
-        if not entry.config_entry_id:
-            cleanup_temp_file()
-            raise HomeAssistantError(
-                f"Entity {entity_id} is not linked to a config entry"
-            )
+    config_entry = hass.config_entries.async_get_entry(entry.config_entry_id)
+
+    if not config_entry:
+        raise HomeAssistantError(f"Config entry not found for {entity_id}")
 
-        config_entry = hass.config_entries.async_get_entry(entry.config_entry_id)
+    if config_entry.domain != "ipp_printer_service":
+        raise HomeAssistantError(
+            f"Entity {entity_id} is not an IPP Printer Service entity"
+        )
 
-        if not config_entry:
-            cleanup_temp_file()
-            raise HomeAssistantError(f"Config entry not found for {entity_id}")
+    return config_entry
+
+
+async def _async_check_file_exists(hass: HomeAssistant, file_path: str) -> None:
+    """Raise if a local document does not exist."""
+    if not _is_url(file_path) and not await async_path_exists(hass, file_path):
+        raise HomeAssistantError(f"File not found: {file_path}")
+
+
+def _is_url(file_path: str) -> bool:
+    """Return True if the document is downloaded over HTTP."""
+    return file_path.startswith(("http://", "https://"))
 
-        if config_entry.domain != "ipp_printer_service":
-            cleanup_temp_file()
-            raise HomeAssistantError(
-                f"Entity {entity_id} is not an IPP Printer Service entity"
-            )
+
+def _default_job_name(file_path: str) -> str:
+    """Return a job name derived from the document path or URL."""
+    name = URL(file_path).name if _is_url(file_path) else Path(file_path).name
+    return name or "Home Assistant"
+
+
+def _source_stage(file_path: str) -> str:
+    """Return the metrics stage of reading a document source."""
+    return "download" if _is_url(file_path) else "file_read"
+
+
+def _supporting_members(
+    members: list[tuple[str, ConfigEntry]],
+    copies: int,
+    job_attributes: dict[str, Any],
+) -> list[tuple[str, ConfigEntry]]:
+    """Return the printers supporting the options of a job.
+
+    Raises UnsupportedOptionError when none of them does.
+    """
+    supporting = []
+    error: UnsupportedOptionError | None = None
+    for entity_id, config_entry in members:
+        try:
+            config_entry.runtime_data.capabilities.validate(copies, **job_attributes)
+        except UnsupportedOptionError as err:
+            _LOGGER.debug("Skipping %s: %s", entity_id, err)
+            error = error or err
+        else:
+            supporting.append((entity_id, config_entry))
+    if not supporting and error is not None:
+        raise error
+    return supporting
+
+
+async def _async_remove_local_files(hass: HomeAssistant, *file_paths: str) -> None:
+    """Remove local documents once they were handed to the printer."""
+    # Local files are uploads handed over to us, clean them up
+    local_paths = [file_path for file_path in file_paths if not _is_url(file_path)]
+    if local_paths:
+        await async_remove_files(hass, *local_paths)
+
+
+async def async_print_document(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    entity_id: str,
+    file_path: str,
+    copies: int,
+    job_name: str,
+    preprocess: PreprocessOptions | None = None,
+    remove_file: bool = True,
+    job_attributes: dict[str, Any] | None = None,
+) -> int | None:
+    """Stream a document to the printer of a config entry.
+
+    Returns the job id assigned by the printer. Local files are removed
+    afterwards unless ``remove_file`` is False. ``job_attributes`` holds the
+    sides and media of the job.
+    """
+    chunk_size = config_entry.options.get(CONF_CHUNK_SIZE, DEFAULT_CHUNK_SIZE) * 1024
+    coordinator = config_entry.runtime_data
+    metrics = coordinator.metrics
+
+    try:
+        with metrics.span("print"):
+            async with _async_open_document(
+                hass, file_path, chunk_size, coordinator.cache
+            ) as chunks:
+                chunks = metrics.async_iter_timed(chunks, _source_stage(file_path))
+                if preprocess:
+                    async with async_preprocess(
+                        hass, coordinator.spool, chunks, preprocess, chunk_size
+                    ) as processed:
+                        return await async_print_chunks(
+                            config_entry,
+                            entity_id,
+                            file_path,
+                            processed,
+                            copies,
+                            job_name,
+                            job_attributes,
+                        )
+                return await async_print_chunks(
+                    config_entry,
+                    entity_id,
+                    file_path,
+                    chunks,
+                    copies,
+                    job_name,
+                    job_attributes,
+                )
+    finally:
+        if remove_file:
+            await _async_remove_local_files(hass, file_path)
+
+
+async def async_print_chunks(
+    config_entry: ConfigEntry,
+    entity_id: str,
+    description: str,
+    chunks: AsyncIterator[bytes],
+    copies: int,
+    job_name: str,
+    job_attributes: dict[str, Any] | None = None,
+) -> int | None:
+    """Send a document read from chunks as a Print-Job request.
+
+    ``description`` is the path, URL or upload name reported in logs and in
+    the last job. Returns the job id assigned by the printer.
+    """
+    coordinator = config_entry.runtime_data
+    job_attributes = job_attributes or {}
+    # Queue job this document is printed for, reported with the printer's job
+    job = current_job()
+    chunks = async_iter_progress(chunks)
+
+    try:
+        # Capabilities may have changed while the job was queued
+        coordinator.capabilities.validate(copies, **job_attributes)
 
         # Check for simulation mode
         if config_entry.options.get(CONF_SIMULATION_MODE, False):
+            size = await _async_drain(chunks)
+
             _LOGGER.info(
-                "Simulation mode active. Printing %d copies of %s simulated.",
+                "Simulation mode active. Printing %d copies of %s (%d bytes) simulated.",
                 copies,
-                msg_file_path,
+                description,
+                size,
             )
-            coordinator = config_entry.runtime_data
             coordinator.async_set_last_job(
+                coordinator.jobs.async_add(
+                    {
+                        "entity_id": entity_id,
+                        "file_path": description,  # Log the original path/URL
+                        "job_name": job_name,
+                        "copies": copies,
+                        "timestamp": str(datetime.now()),
+                        "status": "simulated",
+                        "state": "simulated",
+                        "job_handle": job.handle if job else None,
+                    }
+                )
+            )
+            return None
+
+        client = coordinator.client
+        _LOGGER.info(
+            "Printing %d copies of %s to %s:%s%s (SSL=%s)",
+            copies,
+            description,
+            client.host,
+            client.port,
+            client.base_path,
+            client.tls,
+        )
+
+        message = {
+            "operation-attributes-tag": {
+                "requesting-user-name": "Home Assistant",
+                "job-name": job_name,
+                "document-format": "application/pdf",
+                "copies": copies,
+            },
+        }
+        if job_attributes:
+            message["job-attributes-tag"] = dict(job_attributes)
+
+        transfer = TransferStats()
+        if (
+            config_entry.options.get(CONF_COMPRESSION, False)
+            and "gzip" in coordinator.capabilities.compression
+        ):
+            # Small documents are not worth the compression overhead
+            chunks, large = await async_read_ahead(chunks, COMPRESSION_MIN_SIZE)
+            if large:
+                transfer.compression = "gzip"
+                message["operation-attributes-tag"]["compression"] = "gzip"
+        if transfer.compression:
+            chunks = async_iter_gzip(coordinator.hass, chunks, transfer)
+        else:
+            chunks = async_iter_counted(chunks, transfer)
+
+        with coordinator.metrics.span("print_job"):
+            response = await client.send_stream(
+                IppOperation.PRINT_JOB, message, chunks
+            )
+        job_id = next(iter(response["jobs"]), {}).get("job-id")
+        if job is not None:
+            job.job_id = job_id
+        coordinator.metrics.increment("prints")
+        coordinator.metrics.increment("bytes_sent", transfer.sent)
+
+        _LOGGER.info(
+            "Successfully printed %d copies of %s to %s (job %s, %d bytes sent)",
+            copies,
+            description,
+            entity_id,
+            job_id,
+            transfer.sent,
+        )
+
+        # Update last job for real prints too
+        # The job is followed until the printer reports it finished
+        coordinator.async_set_last_job(
+            coordinator.jobs.async_add(
                 {
                     "entity_id": entity_id,
-                    "file_path": msg_file_path,  # Log the original path/URL
+                    "file_path": description,
+                    "job_name": job_name,
                     "copies": copies,
                     "timestamp": str(datetime.now()),
-                    "status": "simulated",
+                    "status": "success",
+                    "job_id": job_id,
+                    "job_handle": job.handle if job else None,
+                    **transfer.as_dict(),
                 }
             )
-            # Cleanup
-            try:
-                path_obj = Path(file_path)
-                if path_obj.exists():
-                    path_obj.unlink()
-            except Exception as e:
-                _LOGGER.warning("Failed to remove temporary file %s: %s", file_path, e)
-            return
-
-        # Create a fresh IPP client using config entry data
-        host = config_entry.data.get(CONF_HOST)
-        port = config_entry.data.get(CONF_PORT)
-        base_path = config_entry.data.get("base_path")
-        ssl = config_entry.data.get(CONF_SSL, False)
-        verify_ssl = config_entry.data.get(CONF_VERIFY_SSL, True)
-        username = config_entry.data.get("username")
-        password = config_entry.data.get("password")
-
-        session = async_get_clientsession(hass)
-
-        ipp = IPP(
-            host=host,
-            port=port,
-            base_path=base_path,
-            tls=ssl,
-            verify_ssl=verify_ssl,
-            session=session,
-            username=username,
-            password=password,
         )
-
-        try:
-            async with aiofiles.open(file_path, "rb") as f:
-                content = await f.read()
-
-            _LOGGER.info(
-                "Printing %d copies of %s to %s:%s%s (SSL=%s)",
+        return job_id
+
+    except HomeAssistantError:
+        coordinator.metrics.increment("print_failures")
+        raise
+    except IPPError as e:
+        coordinator.metrics.increment("print_failures")
+        _LOGGER.error("Failed to print %s: %s", description, e)
+        raise PrinterError(f"Failed to print: {e}") from e
+    except Exception as e:
+        # The document source failed, another printer would fail the same way
+        coordinator.metrics.increment("print_failures")
+        _LOGGER.error("Failed to read %s: %s", description, e)
+        raise HomeAssistantError(f"Failed to read the document: {e}") from e
+
+
+async def _async_print_to_group(
+    hass: HomeAssistant,
+    members: list[tuple[str, ConfigEntry]],
+    file_path: str,
+    copies: int,
+    job_name: str,
+    priority: str,
+    wait: bool,
+    preprocess: PreprocessOptions,
+    job_attributes: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Print a document on the best printer of a group.
+
+    The job is queued on the least loaded printer accepting jobs and moved
+    to the next one if that printer fails.
+    """
+
+    def _submit(entity_id: str, config_entry: ConfigEntry) -> PrintJob:
+        async def _async_run_job() -> int | None:
+            return await async_print_document(
+                hass,
+                config_entry,
+                entity_id,
+                file_path,
                 copies,
-                msg_file_path,
-                host,
-                port,
-                base_path,
-                ssl,
+                job_name,
+                preprocess,
+                remove_file=False,
+                job_attributes=job_attributes,
             )
 
-            message = {
-                "operation-attributes-tag": {
-                    "requesting-user-name": "Home Assistant",
-                    "job-name": "Attendance Doc",
-                    "document-format": "application/pdf",
-                    "copies": copies,
-                },
-                "data": content,
-            }
+        return config_entry.runtime_data.queue.async_submit(
+            file_path, _async_run_job, priority
+        )
 
-            await ipp.execute(IppOperation.PRINT_JOB, message)
-            _LOGGER.info(
-                "Successfully printed %d copies of %s to %s",
-                copies,
-                msg_file_path,
-                entity_id,
-            )
+    dispatch = GroupDispatch(members, _submit)
+    job = dispatch.async_submit()
 
-            # Update last job for real prints too
-            coordinator = config_entry.runtime_data
-            coordinator.async_set_last_job(
+    async def _async_wait() -> int | None:
+        try:
+            return await dispatch.async_wait()
+        finally:
+            await _async_remove_local_files(hass, file_path)
+
+    if wait:
+        job_id = await _async_wait()
+        job = dispatch.job or job
+        return {
+            "entity_id": dispatch.entity_id,
+            "job_handle": job.handle,
+            "status": job.status,
+            "job_id": job_id,
+            "attempts": dispatch.attempts,
+        }
+
+    async def _async_follow() -> None:
+        try:
+            await _async_wait()
+        except HomeAssistantError as err:
+            _LOGGER.error("Failed to print %s on any printer: %s", file_path, err)
+
+    hass.async_create_background_task(_async_follow(), f"print {job_name} on group")
+    return {
+        "entity_id": dispatch.entity_id,
+        "job_handle": job.handle,
+        "status": job.status,
+        "queue_depth": config_entry.runtime_data.queue.depth
+        if (config_entry := dispatch.config_entry)
+        else None,
+    }
+
+
+async def _async_print_batch(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    entity_id: str,
+    file_paths: list[str],
+    copies: int,
+    job_name: str,
+) -> dict[str, Any]:
+    """Print several documents, as one multi-document job when supported."""
+    chunk_size = config_entry.options.get(CONF_CHUNK_SIZE, DEFAULT_CHUNK_SIZE) * 1024
+    coordinator = config_entry.runtime_data
+    client = coordinator.client
+    simulate = config_entry.options.get(CONF_SIMULATION_MODE, False)
+    results: list[dict[str, Any]] = [
+        {"file_path": file_path, "status": "pending"} for file_path in file_paths
+    ]
+    job_id: int | None = None
+    mode = "unknown"
+    error: str | None = None
+    # Documents the printer received
+    sent = 0
+    job = current_job()
+
+    try:
+        if simulate:
+            mode = "simulated"
+        elif coordinator.capabilities.multiple_documents:
+            mode = "multi_document"
+        else:
+            mode = "pipelined"
+
+        _LOGGER.info(
+            "Printing batch %s of %d documents to %s (%s)",
+            job_name,
+            len(file_paths),
+            entity_id,
+            mode,
+        )
+
+        if mode == "multi_document":
+            response = await client.execute(
+                IppOperation.CREATE_JOB,
                 {
-                    "entity_id": entity_id,
-                    "file_path": msg_file_path,
-                    "copies": copies,
-                    "timestamp": str(datetime.now()),
-                    "status": "success",
-                }
+                    "operation-attributes-tag": {
+                        "requesting-user-name": "Home Assistant",
+                        "job-name": job_name,
+                        "copies": copies,
+                    },
+                },
             )
+            job_id = next(iter(response["jobs"]), {}).get("job-id")
+            if job_id is None:
+                raise HomeAssistantError("Printer did not return a job id")
+            if job is not None:
+                job.job_id = job_id
+
+        async with aclosing(
+            _async_iter_opened_documents(
+                hass, file_paths, chunk_size, coordinator.cache
+            )
+        ) as documents:
+            index = 0
+            async for chunks, error in documents:
+                result = results[index]
+                file_path = file_paths[index]
+                last = index == len(file_paths) - 1
+                index += 1
+
+                if error is not None:
+                    result.update(status="failed", error=str(error))
+                    if mode == "multi_document" and last:
+                        if sent:
+                            await _async_close_job(client, job_id)
+                        else:
+                            # Closing would release an empty job to the printer
+                            await _async_cancel_job(client, job_id)
+                    continue
+
+                if mode == "simulated":
+                    result.update(status="simulated", size=await _async_drain(chunks))
+                    continue
+
+                if mode == "multi_document":
+                    operation = IppOperation.SEND_DOCUMENT
+                    attributes = {
+                        "requesting-user-name": "Home Assistant",
+                        "job-id": job_id,
+                        "document-name": _default_job_name(file_path),
+                        "document-format": "application/pdf",
+                        "last-document": last,
+                    }
+                else:
+                    operation = IppOperation.PRINT_JOB
+                    attributes = {
+                        "requesting-user-name": "Home Assistant",
+                        "job-name": f"{job_name} - {_default_job_name(file_path)}",
+                        "document-format": "application/pdf",
+                        "copies": copies,
+                    }
 
-        except Exception as e:
-            _LOGGER.error("Failed to print %s: %s", msg_file_path, e)
-            raise HomeAssistantError(f"Failed to print: {e}") from e
-        finally:
-            # Cleanup the file
+                try:
+                    with coordinator.metrics.span("print_job"):
+                        response = await client.send_stream(
+                            operation,
+                            {"operation-attributes-tag": attributes},
+                            async_iter_progress(
+                                coordinator.metrics.async_iter_timed(
+                                    chunks, _source_stage(file_path)
+                                )
+                            ),
+                        )
+                except Exception as err:
+                    _LOGGER.error("Failed to print %s: %s", file_path, err)
+                    result.update(status="failed", error=str(err))
+                    if mode == "multi_document":
+                        # The job cannot be continued after a failed upload
+                        raise
+                    continue
+
+                sent += 1
+                result["status"] = "success"
+                if mode == "pipelined":
+                    result["job_id"] = next(iter(response["jobs"]), {}).get("job-id")
+                    coordinator.jobs.async_add(
+                        {
+                            "entity_id": entity_id,
+                            "file_path": file_path,
+                            "job_name": attributes["job-name"],
+                            "copies": copies,
+                            "timestamp": str(datetime.now()),
+                            "status": "success",
+                            "job_id": result["job_id"],
+                            "job_handle": job.handle if job else None,
+                        }
+                    )
+    except Exception as err:
+        if job_id is not None:
+            await _async_cancel_job(client, job_id)
+        for result in results:
+            if result["status"] == "pending":
+                result.update(status="skipped")
+        _LOGGER.error("Failed to print batch %s: %s", job_name, err)
+        error = str(err)
+    finally:
+        await _async_remove_local_files(hass, *file_paths)
+
+    printed = sum(result["status"] in ("success", "simulated") for result in results)
+    last_job = {
+        "entity_id": entity_id,
+        "file_path": job_name,
+        "documents": len(file_paths),
+        "printed": printed,
+        "copies": copies,
+        "timestamp": str(datetime.now()),
+        "status": "simulated"
+        if simulate
+        else "success"
+        if printed == len(file_paths)
+        else "failed",
+    }
+    if mode == "multi_document" and error is None and sent:
+        # Follow the single job holding all documents
+        last_job = coordinator.jobs.async_add(
+            {
+                **last_job,
+                "job_name": job_name,
+                "job_id": job_id,
+                "job_handle": job.handle if job else None,
+            }
+        )
+    coordinator.async_set_last_job(last_job)
+
+    response = {"mode": mode, "job_id": job_id, "documents": results}
+    if error is not None:
+        response["error"] = error
+    return response
+
+
+async def _async_close_job(client: IPPPrinterServiceClient, job_id: int) -> None:
+    """Close a multi-document job with an empty last document."""
+    await client.execute(
+        IppOperation.SEND_DOCUMENT,
+        {
+            "operation-attributes-tag": {
+                "requesting-user-name": "Home Assistant",
+                "job-id": job_id,
+                "last-document": True,
+            },
+        },
+    )
+
+
+async def _async_cancel_job(client: IPPPrinterServiceClient, job_id: int) -> None:
+    """Cancel a job, ignoring errors as it may already be gone."""
+    try:
+        await client.execute(
+            IppOperation.CANCEL_JOB,
+            {
+                "operation-attributes-tag": {
+                    "requesting-user-name": "Home Assistant",
+                    "job-id": job_id,
+                },
+            },
+        )
+    except Exception as err:  # pylint: disable=broad-except
+        _LOGGER.warning("Failed to cancel job %s: %s", job_id, err)
+
+
+async def _async_drain(chunks: AsyncIterator[bytes]) -> int:
+    """Pull a whole document without sending it, returning its size."""
+    # Still pull the whole document so broken sources are reported
+    size = 0
+    async for chunk in chunks:
+        size += len(chunk)
+    return size
+
+
+async def _async_iter_opened_documents(
+    hass: HomeAssistant,
+    file_paths: list[str],
+    chunk_size: int,
+    cache: DocumentCache | None,
+) -> AsyncIterator[tuple[AsyncIterator[bytes] | None, Exception | None]]:
+    """Yield the chunks of each document in order, opening sources ahead.
+
+    Up to BATCH_PREFETCH sources are opened concurrently while the current
+    document is sent, so downloads overlap with uploads without buffering
+    more than what flow control lets through.
+    """
+
+    async def _async_open(file_path: str) -> tuple[Any, AsyncIterator[bytes]]:
+        context = _async_open_document(hass, file_path, chunk_size, cache)
+        return context, await context.__aenter__()
+
+    paths = iter(file_paths)
+    pending: deque[asyncio.Task] = deque()
+
+    def _schedule() -> None:
+        while len(pending) < BATCH_PREFETCH and (file_path := next(paths, None)):
+            pending.append(hass.async_create_task(_async_open(file_path)))
+
+    _schedule()
+    try:
+        while pending:
+            task = pending.popleft()
+            _schedule()
             try:
-                path_obj = Path(file_path)
-                if path_obj.exists():
-                    path_obj.unlink()
-            except Exception as e:
-                _LOGGER.warning("Failed to remove temporary file %s: %s", file_path, e)
-
-    hass.services.async_register("ipp_printer_service", "print_pdf", async_print_pdf)
+                context, chunks = await task
+            except Exception as err:  # pylint: disable=broad-except
+                yield None, err
+                continue
+            try:
+                yield chunks, None
+            finally:
+                await context.__aexit__(None, None, None)
+    finally:
+        for task in pending:
+            task.cancel()
+        for result in await asyncio.gather(*pending, return_exceptions=True):
+            if isinstance(result, tuple):
+                await result[0].__aexit__(None, None, None)
+
+
+@asynccontextmanager
+async def _async_open_document(
+    hass: HomeAssistant,
+    file_path: str,
+    chunk_size: int,
+    cache: DocumentCache | None = None,
+) -> AsyncIterator[AsyncIterator[bytes]]:
+    """Open a document source and yield an iterator over its chunks."""
+    if not _is_url(file_path):
+        yield async_iter_file(file_path, chunk_size)
+        return
+
+    session = async_get_clientsession(hass)
+    if cache is not None:
+        async with cache.async_open(session, file_path, chunk_size) as chunks:
+            yield chunks
+        return
+
+    response = None
+    try:
+        response = await session.get(file_path)
+        response.raise_for_status()
+    except ClientError as err:
+        if response is not None:
+            response.release()
+        raise HomeAssistantError(
+            f"Failed to download file from {file_path}: {err}"
+        ) from err
+
+    try:
+        _LOGGER.debug("Streaming %s (%s bytes)", file_path, response.content_length)
+        yield async_iter_response(response, chunk_size)
+    finally:
+        response.release()
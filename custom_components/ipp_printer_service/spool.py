@@ -0,0 +1,322 @@
+"""Spool files for IPP Printer Service."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import timedelta
+import logging
+import os
+import shutil
+import time
+import uuid
+
+import aiofiles
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_SPOOLS = f"{DOMAIN}_spools"
+DATA_UPLOAD_SPOOL = f"{DOMAIN}_upload_spool"
+
+# Spooled files older than this are abandoned and removed
+SPOOL_TTL = timedelta(hours=24)
+REAP_INTERVAL = timedelta(minutes=10)
+# Quota of the uploads stored for a later print_pdf call
+UPLOAD_SPOOL_SIZE = 500 * 1024 * 1024
+
+
+class SpoolFullError(HomeAssistantError):
+    """Error raised when a spool has no room left for a document."""
+
+
+class Spool:
+    """Directory of temporary documents, written and removed off the event loop.
+
+    Every filesystem call runs in the executor or through aiofiles, so large
+    documents never stall the event loop. The spool keeps track of the size
+    of its files and rejects documents beyond ``max_size``, and a background
+    reaper removes files older than ``ttl`` that were never picked up.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        directory: str,
+        max_size: int | None = None,
+        ttl: timedelta = SPOOL_TTL,
+        on_change: CALLBACK_TYPE | None = None,
+    ) -> None:
+        """Initialize the spool."""
+        self.hass = hass
+        self.directory = directory
+        self.max_size = max_size
+        self.ttl = ttl
+        self.reaped = 0
+        self.rejected = 0
+        self._on_change = on_change
+        self._files: dict[str, int] = {}
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def size(self) -> int:
+        """Return the number of bytes spooled."""
+        return sum(self._files.values())
+
+    @property
+    def stats(self) -> dict[str, int | None]:
+        """Return the spool counters."""
+        return {
+            "files": len(self._files),
+            "size": self.size,
+            "max_size": self.max_size,
+            "reaped": self.reaped,
+            "rejected": self.rejected,
+        }
+
+    async def async_setup(self, clear: bool = True) -> None:
+        """Create the directory and recover the files left over by a crash.
+
+        Leftovers are removed when ``clear`` is set, and otherwise counted
+        against the quota until the reaper removes them.
+        """
+        self._files = await self.hass.async_add_executor_job(self._setup, clear)
+        self.hass.data.setdefault(DATA_SPOOLS, set()).add(self)
+        if self._files:
+            _LOGGER.info(
+                "Recovered %d spool files (%d bytes) in %s",
+                len(self._files),
+                self.size,
+                self.directory,
+            )
+        self._async_changed()
+
+    def _setup(self, clear: bool) -> dict[str, int]:
+        """Create the directory and return the files it holds."""
+        if clear and os.path.isdir(self.directory):
+            removed = len(os.listdir(self.directory))
+            shutil.rmtree(self.directory, ignore_errors=True)
+            if removed:
+                _LOGGER.info(
+                    "Removed %d leftover spool files from %s", removed, self.directory
+                )
+        os.makedirs(self.directory, exist_ok=True)
+        return {
+            entry.path: entry.stat().st_size
+            for entry in os.scandir(self.directory)
+            if entry.is_file()
+        }
+
+    @callback
+    def async_start(self) -> None:
+        """Start removing abandoned files periodically."""
+        self._task = self.hass.async_create_background_task(
+            self._async_reap_periodically(), f"{DOMAIN} spool reaper {self.directory}"
+        )
+
+    async def async_stop(self) -> None:
+        """Stop the reaper."""
+        self.hass.data.get(DATA_SPOOLS, set()).discard(self)
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    @callback
+    def async_check_room(self, size: int) -> None:
+        """Raise SpoolFullError if a document of size bytes does not fit."""
+        if self.max_size is not None and self.size + size > self.max_size:
+            self.rejected += 1
+            self._async_changed()
+            raise SpoolFullError(
+                f"Spool {self.directory} is full "
+                f"({self.size} of {self.max_size} bytes used)"
+            )
+
+    def path(self, name: str = "") -> str:
+        """Return a new unique path in the spool, ending with name."""
+        return os.path.join(
+            self.directory, f"{uuid.uuid4().hex}_{os.path.basename(name)}"
+        )
+
+    async def async_write(
+        self,
+        chunks: AsyncIterator[bytes],
+        name: str = "",
+        expected_size: int | None = None,
+    ) -> str:
+        """Write chunks to a new spool file and return its path.
+
+        Raises SpoolFullError, before writing anything when the expected size
+        is known, as soon as the document does not fit in the quota.
+        """
+        self.async_check_room(expected_size or 0)
+        path = self.path(name)
+        self._files[path] = 0
+        try:
+            async with aiofiles.open(path, "wb") as file:
+                async for chunk in chunks:
+                    self._files[path] += len(chunk)
+                    if self.max_size is not None and self.size > self.max_size:
+                        self.async_check_room(0)
+                    await file.write(chunk)
+        except BaseException:
+            await self.async_remove(path)
+            raise
+        self._async_changed()
+        return path
+
+    async def async_allocate(self, size: int, name: str = "") -> str:
+        """Create a spool file of size bytes, to be filled with async_write_at."""
+        self.async_check_room(size)
+        path = self.path(name)
+        self._files[path] = size
+        try:
+            await self.hass.async_add_executor_job(_allocate, path, size)
+        except BaseException:
+            await self.async_remove(path)
+            raise
+        self._async_changed()
+        return path
+
+    async def async_write_at(
+        self, path: str, offset: int, chunks: AsyncIterator[bytes]
+    ) -> int:
+        """Write chunks into an allocated file at offset, returning the size."""
+        written = 0
+        async with aiofiles.open(path, "r+b") as file:
+            await file.seek(offset)
+            async for chunk in chunks:
+                await file.write(chunk)
+                written += len(chunk)
+        return written
+
+    @callback
+    def async_track(self, path: str, size: int) -> None:
+        """Count a file written into the spool by someone else."""
+        self._files[path] = size
+        self._async_changed()
+
+    @callback
+    def async_forget(self, *paths: str) -> None:
+        """Stop counting files removed by someone else."""
+        if any([self._files.pop(path, None) is not None for path in paths]):
+            self._async_changed()
+
+    @asynccontextmanager
+    async def async_temporary(self, name: str = "") -> AsyncIterator[str]:
+        """Yield a new spool path and remove the file when done."""
+        path = self.path(name)
+        try:
+            yield path
+        finally:
+            await self.async_remove(path)
+
+    async def async_remove(self, *paths: str) -> None:
+        """Remove files if they exist."""
+        self.async_forget(*paths)
+        await self.hass.async_add_executor_job(remove_files, *paths)
+
+    async def async_clear(self) -> None:
+        """Remove the spool directory and everything in it."""
+        self._files.clear()
+        await self.hass.async_add_executor_job(shutil.rmtree, self.directory, True)
+        self._async_changed()
+
+    async def _async_reap_periodically(self) -> None:
+        """Remove abandoned files until cancelled."""
+        while True:
+            await asyncio.sleep(REAP_INTERVAL.total_seconds())
+            await self.async_reap()
+
+    async def async_reap(self) -> None:
+        """Remove the files older than the time to live."""
+        expired = await self.hass.async_add_executor_job(
+            self._expired, time.time() - self.ttl.total_seconds()
+        )
+        if not expired:
+            return
+        _LOGGER.info(
+            "Removing %d abandoned spool files from %s", len(expired), self.directory
+        )
+        self.reaped += len(expired)
+        await self.async_remove(*expired)
+
+    def _expired(self, deadline: float) -> list[str]:
+        """Return the files last modified before the deadline."""
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return []
+        return [
+            entry.path
+            for entry in entries
+            if entry.is_file() and entry.stat().st_mtime < deadline
+        ]
+
+    @callback
+    def _async_changed(self) -> None:
+        """Notify the listener of the spool metrics."""
+        if self._on_change is not None:
+            self._on_change()
+
+
+async def async_get_upload_spool(hass: HomeAssistant) -> Spool:
+    """Return the spool of uploads stored for a later print_pdf call."""
+    if (task := hass.data.get(DATA_UPLOAD_SPOOL)) is None:
+        task = hass.data[DATA_UPLOAD_SPOOL] = hass.async_create_task(
+            _async_create_upload_spool(hass)
+        )
+    return await task
+
+
+async def _async_create_upload_spool(hass: HomeAssistant) -> Spool:
+    """Create the upload spool, keeping uploads made before a restart."""
+    spool = Spool(hass, hass.config.path(DOMAIN, "uploads"), UPLOAD_SPOOL_SIZE)
+    # Earlier versions stored uploads in the publicly served www directory
+    await hass.async_add_executor_job(
+        shutil.rmtree, hass.config.path("www", "ipp_printer_service_temp"), True
+    )
+    await spool.async_setup(clear=False)
+    spool.async_start()
+
+    async def _async_stop(event: Event) -> None:
+        await spool.async_stop()
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_stop)
+    return spool
+
+
+async def async_remove_files(hass: HomeAssistant, *paths: str) -> None:
+    """Remove files, updating the spools they belong to."""
+    for spool in hass.data.get(DATA_SPOOLS, ()):
+        spool.async_forget(*paths)
+    await hass.async_add_executor_job(remove_files, *paths)
+
+
+def _allocate(path: str, size: int) -> None:
+    """Create a sparse file of size bytes."""
+    with open(path, "wb") as file:
+        file.truncate(size)
+
+
+async def async_path_exists(hass: HomeAssistant, path: str) -> bool:
+    """Return True if a local file exists, checking in the executor."""
+    return await hass.async_add_executor_job(os.path.exists, path)
+
+
+def remove_files(*paths: str) -> None:
+    """Remove files if they exist."""
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as err:
+            _LOGGER.warning("Failed to remove spool file %s: %s", path, err)
@@ -0,0 +1,392 @@
+"""Streaming helpers for sending documents to IPP printers."""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+import logging
+import random
+import struct
+from typing import Any
+import zlib
+
+import aiofiles
+from aiohttp import BasicAuth, BodyPartReader, ClientError, ClientResponse, ClientTimeout
+from pyipp import IPP
+from pyipp.enums import IppOperation, IppStatus, IppTag
+from pyipp.exceptions import (
+    IPPConnectionError,
+    IPPConnectionUpgradeRequired,
+    IPPError,
+    IPPParseError,
+    IPPResponseError,
+    IPPVersionNotSupportedError,
+)
+from pyipp.parser import parse_attribute
+from pyipp.serializer import construct_attribute
+from pyipp.tags import ATTRIBUTE_TAG_MAP
+from yarl import URL
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+
+from .metrics import Metrics
+
+_LOGGER = logging.getLogger(__name__)
+
+# Time allowed for the printer to answer once the whole document was sent.
+STREAM_READ_TIMEOUT = 300
+
+# Documents smaller than this are sent uncompressed
+COMPRESSION_MIN_SIZE = 256 * 1024
+COMPRESSION_LEVEL = 6
+
+# Attributes used by this integration that pyipp does not know the syntax of
+EXTENDED_ATTRIBUTE_TAGS = {
+    "compression": IppTag.KEYWORD,
+    "notify-events": IppTag.KEYWORD,
+    "notify-lease-duration": IppTag.INTEGER,
+    "notify-pull-method": IppTag.KEYWORD,
+    "notify-sequence-numbers": IppTag.INTEGER,
+    "notify-subscription-id": IppTag.INTEGER,
+    "notify-subscription-ids": IppTag.INTEGER,
+    "notify-wait": IppTag.BOOLEAN,
+    "sides": IppTag.KEYWORD,
+}
+
+# Attribute groups of a request, in the order they are encoded
+REQUEST_GROUPS = {
+    "operation-attributes-tag": IppTag.OPERATION,
+    "job-attributes-tag": IppTag.JOB,
+    "printer-attributes-tag": IppTag.PRINTER,
+    "subscription-attributes-tag": IppTag.SUBSCRIPTION,
+}
+
+# Keys of the parsed response for each attribute group
+RESPONSE_GROUPS = {
+    IppTag.OPERATION: "operation-attributes",
+    IppTag.JOB: "jobs",
+    IppTag.PRINTER: "printers",
+    IppTag.UNSUPPORTED_GROUP: "unsupported-attributes",
+    IppTag.SUBSCRIPTION: "subscriptions",
+    IppTag.EVENT_NOTIFICATION: "events",
+}
+
+
+class DocumentSourceError(HomeAssistantError):
+    """Error raised when the document source failed while it was streamed.
+
+    The printer is not at fault, so the job is not retried on another one.
+    """
+
+
+async def async_iter_file(path: str, chunk_size: int) -> AsyncIterator[bytes]:
+    """Yield the content of a local file in chunks."""
+    async with aiofiles.open(path, "rb") as file:
+        while chunk := await file.read(chunk_size):
+            yield chunk
+
+
+async def async_iter_bytes(data: bytes, chunk_size: int) -> AsyncIterator[bytes]:
+    """Yield a document held in memory in chunks, without copying it."""
+    view = memoryview(data)
+    for offset in range(0, len(data), chunk_size):
+        yield view[offset : offset + chunk_size]
+
+
+async def async_iter_response(
+    response: ClientResponse, chunk_size: int
+) -> AsyncIterator[bytes]:
+    """Yield the body of an HTTP response in chunks."""
+    async for chunk in response.content.iter_chunked(chunk_size):
+        yield chunk
+
+
+async def async_iter_body_part(
+    part: BodyPartReader, chunk_size: int
+) -> AsyncIterator[bytes]:
+    """Yield the content of a multipart upload in chunks."""
+    while chunk := await part.read_chunk(chunk_size):
+        yield chunk
+
+
+@dataclass
+class TransferStats:
+    """Sizes of a document before and after compression."""
+
+    compression: str | None = None
+    size: int = 0
+    sent: int = 0
+
+    @property
+    def ratio(self) -> float | None:
+        """Return how many times smaller the document was sent."""
+        return round(self.size / self.sent, 2) if self.sent else None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the sizes for a job record."""
+        return {
+            "compression": self.compression,
+            "size": self.size,
+            "bytes_sent": self.sent,
+            "compression_ratio": self.ratio,
+        }
+
+
+async def async_read_ahead(
+    chunks: AsyncIterator[bytes], size: int
+) -> tuple[AsyncIterator[bytes], bool]:
+    """Buffer up to size bytes of a stream to find out if it is that large.
+
+    Returns an iterator over the whole stream and True if it holds at least
+    size bytes.
+    """
+    head: list[bytes] = []
+    buffered = 0
+    exhausted = False
+    while buffered < size:
+        if (chunk := await anext(chunks, None)) is None:
+            exhausted = True
+            break
+        head.append(chunk)
+        buffered += len(chunk)
+
+    async def _replay() -> AsyncIterator[bytes]:
+        while head:
+            yield head.pop(0)
+        if not exhausted:
+            async for chunk in chunks:
+                yield chunk
+
+    return _replay(), not exhausted
+
+
+async def async_iter_counted(
+    chunks: AsyncIterator[bytes], stats: TransferStats
+) -> AsyncIterator[bytes]:
+    """Yield chunks unchanged while counting them."""
+    async for chunk in chunks:
+        stats.size += len(chunk)
+        stats.sent += len(chunk)
+        yield chunk
+
+
+async def async_iter_gzip(
+    hass: HomeAssistant, chunks: AsyncIterator[bytes], stats: TransferStats
+) -> AsyncIterator[bytes]:
+    """Yield chunks compressed with gzip, compressing in the executor."""
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        stats.size += len(chunk)
+        if data := await hass.async_add_executor_job(compressor.compress, chunk):
+            stats.sent += len(data)
+            yield data
+    data = compressor.flush()
+    stats.sent += len(data)
+    yield data
+
+
+def encode_request(ipp: IPP, operation: IppOperation, message: dict[str, Any]) -> bytes:
+    """Encode the IPP attribute header of a request without any document data.
+
+    Unlike pyipp's serializer this also encodes subscription attributes and
+    the attributes listed in EXTENDED_ATTRIBUTE_TAGS.
+    """
+    message = ipp._message(operation, message)  # pylint: disable=protected-access
+
+    if (request_id := message.get("request-id")) is None:
+        request_id = random.randint(10000, 99999)
+
+    encoded = struct.pack(">bb", *message["version"])
+    encoded += struct.pack(">h", operation.value)
+    encoded += struct.pack(">i", request_id)
+
+    for group, group_tag in REQUEST_GROUPS.items():
+        if not isinstance(attributes := message.get(group), dict):
+            continue
+        encoded += struct.pack(">b", group_tag.value)
+        for name, value in attributes.items():
+            tag = ATTRIBUTE_TAG_MAP.get(name) or EXTENDED_ATTRIBUTE_TAGS.get(name)
+            encoded += construct_attribute(name, value, tag)
+
+    encoded += struct.pack(">b", IppTag.END.value)
+    return encoded
+
+
+def _encode_request_timed(
+    ipp: IPP,
+    operation: IppOperation,
+    message: dict[str, Any],
+    metrics: Metrics | None,
+) -> bytes:
+    """Encode a request, recording the time it took when metrics are given."""
+    if metrics is None:
+        return encode_request(ipp, operation, message)
+    with metrics.span("ipp_encode"):
+        return encode_request(ipp, operation, message)
+
+
+def parse_ipp_response(raw: bytes) -> dict[str, Any]:
+    """Parse an IPP response into its attribute groups.
+
+    The result has the same keys as pyipp's parser, plus ``subscriptions``
+    and ``events`` for subscription and event notification groups.
+    """
+    try:
+        parsed: dict[str, Any] = {
+            "version": struct.unpack_from(">bb", raw, 0),
+            "status-code": struct.unpack_from(">h", raw, 2)[0],
+            "request-id": struct.unpack_from(">i", raw, 4)[0],
+            **{key: [] for key in RESPONSE_GROUPS.values()},
+        }
+        offset = 8
+        current: dict[str, Any] | None = None
+        previous_name = ""
+
+        while (tag := raw[offset]) != IppTag.END.value:
+            if tag < IppTag.UNSUPPORTED_VALUE.value:
+                # Delimiter tag starting a new attribute group
+                current = {}
+                parsed.setdefault(RESPONSE_GROUPS.get(tag, f"group-{tag}"), []).append(
+                    current
+                )
+                previous_name = ""
+                offset += 1
+                continue
+
+            attribute, offset = parse_attribute(raw, offset, previous_name)
+            if current is None:
+                continue
+            if name := attribute["name"]:
+                current[name] = attribute.get("value")
+                previous_name = name
+            elif previous_name:
+                value = current[previous_name]
+                if not isinstance(value, list):
+                    current[previous_name] = value = [value]
+                value.append(attribute.get("value"))
+    except Exception as err:  # pylint: disable=broad-except
+        raise IPPParseError from err
+
+    parsed["operation-attributes"] = next(iter(parsed["operation-attributes"]), {})
+
+    if parsed["status-code"] == IppStatus.ERROR_VERSION_NOT_SUPPORTED:
+        raise IPPVersionNotSupportedError("IPP version not supported by server")
+
+    if parsed["status-code"] not in range(0x200):
+        raise IPPError(
+            "Unexpected printer status code",
+            {"status-code": parsed["status-code"]},
+        )
+
+    return parsed
+
+
+async def _async_post(ipp: IPP, data: Any, timeout: ClientTimeout) -> bytes:
+    """Post a request body to the printer and return the raw IPP response."""
+    url = URL.build(
+        scheme="https" if ipp.tls else "http",
+        host=ipp.host,
+        port=ipp.port,
+        path=ipp.base_path,
+    )
+    auth = None
+    if ipp.username and ipp.password:
+        auth = BasicAuth(ipp.username, ipp.password)
+
+    headers = {
+        "User-Agent": ipp.user_agent,
+        "Content-Type": "application/ipp",
+        "Accept": "application/ipp, text/plain, */*",
+    }
+
+    try:
+        async with ipp.session.post(
+            url,
+            data=data,
+            auth=auth,
+            headers=headers,
+            ssl=ipp.verify_ssl,
+            timeout=timeout,
+        ) as response:
+            if response.status == 426:
+                raise IPPConnectionUpgradeRequired(
+                    "Connection upgrade required while communicating with IPP server.",
+                    {"upgrade": response.headers.get("Upgrade")},
+                )
+
+            if (response.status // 100) in [4, 5]:
+                content = await response.read()
+                raise IPPResponseError(
+                    f"HTTP {response.status}",
+                    {
+                        "content-type": response.headers.get("Content-Type"),
+                        "message": content.decode("utf8", errors="replace"),
+                        "status-code": response.status,
+                    },
+                )
+
+            return await response.read()
+    except (ClientError, TimeoutError) as err:
+        raise IPPConnectionError(
+            f"Error occurred while communicating with IPP server: {err}"
+        ) from err
+
+
+async def async_execute(
+    ipp: IPP,
+    operation: IppOperation,
+    message: dict[str, Any],
+    timeout: float | None = None,
+    metrics: Metrics | None = None,
+) -> dict[str, Any]:
+    """Send an IPP request that may use extended attributes or groups."""
+    raw = await _async_post(
+        ipp,
+        _encode_request_timed(ipp, operation, message, metrics),
+        ClientTimeout(total=timeout or ipp.request_timeout),
+    )
+    return parse_ipp_response(raw)
+
+
+async def async_send_stream(
+    ipp: IPP,
+    operation: IppOperation,
+    message: dict[str, Any],
+    chunks: AsyncIterator[bytes],
+    metrics: Metrics | None = None,
+) -> dict[str, Any]:
+    """Send an IPP request whose document data is pulled from an async iterator.
+
+    The request body is the encoded attribute header followed by the chunks
+    as they arrive, sent with chunked transfer encoding, so memory use is
+    bounded by the chunk size rather than by the document size. Errors of
+    the chunks are raised as DocumentSourceError.
+    """
+    header = _encode_request_timed(ipp, operation, message, metrics)
+    source_error: Exception | None = None
+
+    async def _body() -> AsyncIterator[bytes]:
+        nonlocal source_error
+        yield header
+        try:
+            async for chunk in chunks:
+                yield chunk
+        except Exception as err:
+            # aiohttp reports it as a connection error, remember the real one
+            source_error = err
+            raise
+
+    timeout = ClientTimeout(
+        total=None, sock_connect=ipp.request_timeout, sock_read=STREAM_READ_TIMEOUT
+    )
+    try:
+        raw = await _async_post(ipp, _body(), timeout)
+    except Exception:
+        if source_error is None:
+            raise
+        raise DocumentSourceError(
+            f"Failed to read the document: {source_error}"
+        ) from source_error
+    _LOGGER.debug("Streamed %s request to %s%s", operation.name, ipp.host, ipp.base_path)
+    return parse_ipp_response(raw)
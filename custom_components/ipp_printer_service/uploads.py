@@ -0,0 +1,217 @@
+"""Resumable chunked uploads for IPP Printer Service."""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from datetime import timedelta
+import logging
+import math
+import time
+from typing import Any
+import uuid
+import zlib
+
+from homeassistant.config_entries import ConfigEntry, ConfigEntryState
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_UPLOADS = f"{DOMAIN}_uploads"
+
+DEFAULT_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+MIN_UPLOAD_CHUNK_SIZE = 256 * 1024
+MAX_UPLOAD_CHUNK_SIZE = 64 * 1024 * 1024
+# Uploads without any activity for this long are abandoned
+UPLOAD_TTL = timedelta(hours=1)
+
+
+class ChunkError(HomeAssistantError):
+    """Error raised when a chunk does not match its index or checksum."""
+
+
+@dataclass
+class UploadSession:
+    """Upload of a document sent in chunks, in any order and with retries.
+
+    Chunks are written straight to their offset in a file allocated in the
+    printer's spool, so the document is complete once every chunk arrived
+    and never needs to be copied or re-read before printing.
+    """
+
+    upload_id: str
+    user_id: str | None
+    config_entry: ConfigEntry
+    entity_id: str
+    filename: str
+    copies: int
+    job_name: str
+    path: str
+    size: int
+    chunk_size: int
+    received: set[int] = field(default_factory=set)
+    writing: set[int] = field(default_factory=set)
+    updated: float = field(default_factory=time.monotonic)
+
+    @property
+    def chunks(self) -> int:
+        """Return the number of chunks of the document."""
+        return max(1, math.ceil(self.size / self.chunk_size))
+
+    @property
+    def complete(self) -> bool:
+        """Return True once every chunk was received."""
+        return len(self.received) == self.chunks
+
+    def chunk_length(self, index: int) -> int:
+        """Return the size of a chunk."""
+        return min(self.chunk_size, self.size - index * self.chunk_size)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state of the upload."""
+        return {
+            "upload_id": self.upload_id,
+            "entity_id": self.entity_id,
+            "filename": self.filename,
+            "size": self.size,
+            "chunk_size": self.chunk_size,
+            "chunks": self.chunks,
+            "received": sorted(self.received),
+        }
+
+
+@callback
+def async_get_sessions(hass: HomeAssistant) -> dict[str, UploadSession]:
+    """Return the upload sessions, after dropping the abandoned ones."""
+    sessions: dict[str, UploadSession] = hass.data.setdefault(DATA_UPLOADS, {})
+    deadline = time.monotonic() - UPLOAD_TTL.total_seconds()
+    for session in list(sessions.values()):
+        if (
+            session.updated < deadline
+            or session.config_entry.state is not ConfigEntryState.LOADED
+        ):
+            _LOGGER.debug("Dropping abandoned upload of %s", session.filename)
+            del sessions[session.upload_id]
+            if session.config_entry.state is ConfigEntryState.LOADED:
+                hass.async_create_task(
+                    session.config_entry.runtime_data.spool.async_remove(session.path)
+                )
+    return sessions
+
+
+async def async_create_session(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    user_id: str | None,
+    entity_id: str,
+    filename: str,
+    size: int,
+    copies: int,
+    job_name: str,
+    chunk_size: int = DEFAULT_UPLOAD_CHUNK_SIZE,
+) -> UploadSession:
+    """Start an upload, allocating its file in the printer's spool.
+
+    Raises SpoolFullError when the document does not fit in the spool.
+    """
+    sessions = async_get_sessions(hass)
+    path = await config_entry.runtime_data.spool.async_allocate(size, filename)
+    session = UploadSession(
+        upload_id=uuid.uuid4().hex,
+        user_id=user_id,
+        config_entry=config_entry,
+        entity_id=entity_id,
+        filename=filename,
+        copies=copies,
+        job_name=job_name,
+        path=path,
+        size=size,
+        chunk_size=min(max(chunk_size, MIN_UPLOAD_CHUNK_SIZE), MAX_UPLOAD_CHUNK_SIZE),
+    )
+    sessions[session.upload_id] = session
+    _LOGGER.debug(
+        "Started upload %s of %s (%d bytes in %d chunks)",
+        session.upload_id,
+        filename,
+        size,
+        session.chunks,
+    )
+    return session
+
+
+@callback
+def async_get_session(
+    hass: HomeAssistant, upload_id: str, user_id: str | None
+) -> UploadSession | None:
+    """Return an upload session of a user."""
+    session = async_get_sessions(hass).get(upload_id)
+    if session is None or session.user_id != user_id:
+        return None
+    session.updated = time.monotonic()
+    return session
+
+
+async def async_write_chunk(
+    session: UploadSession,
+    index: int,
+    chunks: AsyncIterator[bytes],
+    checksum: str,
+) -> None:
+    """Write a chunk at its offset, verifying its length and CRC-32 checksum.
+
+    A chunk that fails verification is not marked received and can simply be
+    sent again.
+    """
+    if not 0 <= index < session.chunks:
+        raise ChunkError(f"Chunk {index} out of range (0-{session.chunks - 1})")
+    if index in session.writing:
+        raise ChunkError(f"Chunk {index} is already being written")
+
+    expected = session.chunk_length(index)
+    crc = 0
+    length = 0
+
+    async def _async_verified() -> AsyncIterator[bytes]:
+        nonlocal crc, length
+        async for data in chunks:
+            length += len(data)
+            if length > expected:
+                raise ChunkError(f"Chunk {index} is larger than {expected} bytes")
+            crc = zlib.crc32(data, crc)
+            yield data
+
+    session.writing.add(index)
+    session.received.discard(index)
+    try:
+        await session.config_entry.runtime_data.spool.async_write_at(
+            session.path, index * session.chunk_size, _async_verified()
+        )
+    finally:
+        session.writing.discard(index)
+        session.updated = time.monotonic()
+
+    if length != expected:
+        raise ChunkError(f"Chunk {index} has {length} bytes, expected {expected}")
+    if f"{crc:08x}" != checksum.lower():
+        raise ChunkError(f"Checksum mismatch for chunk {index}")
+    session.received.add(index)
+
+
+async def async_remove_session(hass: HomeAssistant, session: UploadSession) -> None:
+    """Abort an upload and remove its file."""
+    async_get_sessions(hass).pop(session.upload_id, None)
+    await session.config_entry.runtime_data.spool.async_remove(session.path)
+
+
+@callback
+def async_pop_complete_session(
+    hass: HomeAssistant, session: UploadSession
+) -> None:
+    """Forget a complete upload whose file is handed over to the print queue."""
+    if not session.complete:
+        missing = sorted(set(range(session.chunks)) - session.received)
+        raise ChunkError(f"Upload is missing chunks {missing[:10]}")
+    async_get_sessions(hass).pop(session.upload_id, None)
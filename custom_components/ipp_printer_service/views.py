@@ -1,13 +1,36 @@
+import asyncio
 import logging
-import os
-import uuid
-from aiohttp import web
+
+from aiohttp import BodyPartReader, web
 
 from homeassistant.components.http import HomeAssistantView
-from homeassistant.core import HomeAssistant
+from homeassistant.config_entries import ConfigEntry, ConfigEntryState
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import CONF_CHUNK_SIZE, CONF_METRICS, DEFAULT_CHUNK_SIZE, DOMAIN
+from .metrics import render_prometheus
+from .print_queue import PRIORITY_HIGH, PrintJob
+from .resilience import STATE_CLOSED
+from .services import async_get_config_entry, async_print_chunks, async_print_document
+from .spool import Spool, SpoolFullError, async_get_upload_spool
+from .streaming import async_iter_body_part
+from .uploads import (
+    DEFAULT_UPLOAD_CHUNK_SIZE,
+    ChunkError,
+    UploadSession,
+    async_create_session,
+    async_get_session,
+    async_pop_complete_session,
+    async_remove_session,
+    async_write_chunk,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
+DATA_METRICS_VIEW = f"{DOMAIN}_metrics_view"
+
+
 class IPPPrintUploadView(HomeAssistantView):
     """View to handle file uploads for IPP printing."""
 
@@ -16,40 +39,368 @@ class IPPPrintUploadView(HomeAssistantView):
     requires_auth = True
 
     async def post(self, request: web.Request) -> web.Response:
-        """Handle file upload."""
+        """Handle file upload.
+
+        Without query parameters the file is stored and its path returned for
+        a later print_pdf call. With ``entity_id`` (and optionally ``copies``
+        and ``job_name``) it is printed right away: the upload is streamed
+        into the print request when the printer's queue is idle, and spooled
+        to disk and queued otherwise.
+
+        Uploads that don't fit in the spool quota are rejected with 507,
+        before the body is read when its length is known. Copies the printer
+        does not support are rejected with 400 before the body is read, and
+        uploads to a full print queue with 503.
+        """
+        hass = request.app["hass"]
+        entity_id = request.query.get("entity_id")
+        try:
+            config_entry = (
+                async_get_config_entry(hass, entity_id) if entity_id else None
+            )
+            copies = int(request.query.get("copies", 1))
+            if config_entry is not None:
+                # Fail before the document is uploaded
+                config_entry.runtime_data.capabilities.validate(copies)
+        except (HomeAssistantError, ValueError) as e:
+            return web.Response(status=400, text=str(e))
+
         try:
+            spool = (
+                config_entry.runtime_data.spool
+                if config_entry is not None
+                else await async_get_upload_spool(hass)
+            )
+            spool.async_check_room(request.content_length or 0)
+
             reader = await request.multipart()
             file = await reader.next()
-            
-            if not file:
+
+            if not isinstance(file, BodyPartReader):
                 return web.Response(status=400, text="No file uploaded")
 
             filename = file.filename
-            if not filename.lower().endswith(".pdf"):
-                 return web.Response(status=400, text="Only PDF files are allowed")
-
-            # Create a temporary directory if it doesn't exist
-            temp_dir = request.app["hass"].config.path("www", "ipp_printer_service_temp")
-            if not os.path.exists(temp_dir):
-                os.makedirs(temp_dir)
-
-            # Generate a unique filename
-            unique_filename = f"{uuid.uuid4()}_{filename}"
-            file_path = os.path.join(temp_dir, unique_filename)
-
-            # Write the file
-            import aiofiles
-            size = 0
-            async with aiofiles.open(file_path, "wb") as f:
-                while True:
-                    chunk = await file.read_chunk()
-                    if not chunk:
-                        break
-                    await f.write(chunk)
-                    size += len(chunk)
-
-            return web.json_response({"file_path": file_path})
+            if not filename or not filename.lower().endswith(".pdf"):
+                return web.Response(status=400, text="Only PDF files are allowed")
 
+            if config_entry is None:
+                file_path = await _async_spool(spool, file, filename)
+                return web.json_response({"file_path": file_path})
+
+            metrics = config_entry.runtime_data.metrics
+            metrics.increment("uploads")
+            with metrics.span("upload"):
+                return await _async_print_upload(
+                    hass,
+                    config_entry,
+                    spool,
+                    entity_id,
+                    file,
+                    filename,
+                    copies,
+                    request.query.get("job_name") or filename,
+                )
+
+        except SpoolFullError as e:
+            if config_entry is not None:
+                config_entry.runtime_data.metrics.increment("uploads_rejected")
+            return web.Response(status=507, text=str(e))
         except Exception as e:
             _LOGGER.error(f"Error uploading file: {e}")
             return web.Response(status=500, text=str(e))
+
+
+async def _async_print_upload(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    spool: Spool,
+    entity_id: str,
+    file: BodyPartReader,
+    filename: str,
+    copies: int,
+    job_name: str,
+) -> web.Response:
+    """Print an upload, streaming it to the printer unless the queue is busy."""
+    queue = config_entry.runtime_data.queue
+
+    if queue.depth or queue.active >= queue.workers:
+        # Don't hold the upload open while waiting, print it from disk later
+        with config_entry.runtime_data.metrics.span("spool_write"):
+            file_path = await _async_spool(spool, file, filename)
+
+        async def _async_run_spooled() -> int | None:
+            return await async_print_document(
+                hass, config_entry, entity_id, file_path, copies, job_name
+            )
+
+        try:
+            job = queue.async_submit(filename, _async_run_spooled)
+        except HomeAssistantError as e:
+            await spool.async_remove(file_path)
+            return web.Response(status=503, text=str(e))
+
+        return web.json_response(
+            {
+                "mode": "spooled",
+                "job_handle": job.handle,
+                "status": job.status,
+                "queue_depth": queue.depth,
+            }
+        )
+
+    chunk_size = config_entry.options.get(CONF_CHUNK_SIZE, DEFAULT_CHUNK_SIZE) * 1024
+
+    async def _async_run_direct() -> int | None:
+        return await async_print_chunks(
+            config_entry,
+            entity_id,
+            filename,
+            async_iter_body_part(file, chunk_size),
+            copies,
+            job_name,
+        )
+
+    # The client is waiting with the upload open, don't let other jobs pass
+    try:
+        job = queue.async_submit(filename, _async_run_direct, PRIORITY_HIGH)
+    except HomeAssistantError as e:
+        return web.Response(status=503, text=str(e))
+    try:
+        job_id = await job.async_wait()
+    except asyncio.CancelledError:
+        # The client disconnected, the rest of the upload will never arrive
+        queue.async_cancel(job.handle)
+        raise
+
+    return web.json_response(
+        {
+            "mode": "direct",
+            "job_handle": job.handle,
+            "status": job.status,
+            "job_id": job_id,
+        }
+    )
+
+
+async def _async_spool(spool: Spool, file: BodyPartReader, filename: str) -> str:
+    """Write an upload to a spool and return its path."""
+    return await spool.async_write(
+        async_iter_body_part(file, DEFAULT_CHUNK_SIZE * 1024), filename
+    )
+
+
+def _user_id(request: web.Request) -> str | None:
+    """Return the id of the user making a request."""
+    user = request.get("hass_user")
+    return user.id if user is not None else None
+
+
+class IPPUploadSessionsView(HomeAssistantView):
+    """View starting resumable chunked uploads.
+
+    The client posts the document's ``filename`` and ``size`` (and optionally
+    ``entity_id``, ``copies``, ``job_name`` and ``chunk_size``), sends each
+    chunk with a PUT to ``/uploads/<upload_id>/chunks/<index>`` carrying its
+    CRC-32 in the ``X-Chunk-CRC32`` header, in any order and in parallel, and
+    prints the document with a POST to ``/uploads/<upload_id>/commit``. A GET
+    on ``/uploads/<upload_id>`` lists the chunks received so far, so an
+    interrupted upload resumes with the missing chunks only.
+    """
+
+    url = "/api/ipp_printer_service/uploads"
+    name = "api:ipp_printer_service:uploads"
+    requires_auth = True
+
+    async def post(self, request: web.Request) -> web.Response:
+        """Start an upload."""
+        hass = request.app["hass"]
+        try:
+            data = await request.json()
+            entity_id = data["entity_id"]
+            filename = str(data["filename"])
+            size = int(data["size"])
+            copies = int(data.get("copies", 1))
+            chunk_size = int(data.get("chunk_size", DEFAULT_UPLOAD_CHUNK_SIZE))
+            config_entry = async_get_config_entry(hass, entity_id)
+            config_entry.runtime_data.capabilities.validate(copies)
+        except (HomeAssistantError, KeyError, TypeError, ValueError) as e:
+            return web.Response(status=400, text=str(e))
+
+        if not filename.lower().endswith(".pdf"):
+            return web.Response(status=400, text="Only PDF files are allowed")
+        if size <= 0 or copies < 1:
+            return web.Response(status=400, text="Invalid size or copies")
+
+        try:
+            session = await async_create_session(
+                hass,
+                config_entry,
+                _user_id(request),
+                entity_id,
+                filename,
+                size,
+                copies,
+                data.get("job_name") or filename,
+                chunk_size,
+            )
+        except SpoolFullError as e:
+            config_entry.runtime_data.metrics.increment("uploads_rejected")
+            return web.Response(status=507, text=str(e))
+
+        return web.json_response(session.as_dict(), status=201)
+
+
+class IPPUploadSessionView(HomeAssistantView):
+    """View reporting the progress of an upload, or aborting it."""
+
+    url = "/api/ipp_printer_service/uploads/{upload_id}"
+    name = "api:ipp_printer_service:upload_session"
+    requires_auth = True
+
+    async def get(self, request: web.Request, upload_id: str) -> web.Response:
+        """Return the chunks received so far."""
+        hass = request.app["hass"]
+        if (session := async_get_session(hass, upload_id, _user_id(request))) is None:
+            return web.Response(status=404, text="Upload not found")
+        return web.json_response(session.as_dict())
+
+    async def delete(self, request: web.Request, upload_id: str) -> web.Response:
+        """Abort an upload."""
+        hass = request.app["hass"]
+        if (session := async_get_session(hass, upload_id, _user_id(request))) is None:
+            return web.Response(status=404, text="Upload not found")
+        await async_remove_session(hass, session)
+        return web.Response(status=204)
+
+
+class IPPUploadChunkView(HomeAssistantView):
+    """View receiving one chunk of an upload."""
+
+    url = "/api/ipp_printer_service/uploads/{upload_id}/chunks/{index}"
+    name = "api:ipp_printer_service:upload_chunk"
+    requires_auth = True
+
+    async def put(
+        self, request: web.Request, upload_id: str, index: str
+    ) -> web.Response:
+        """Write a chunk, verifying it against its checksum."""
+        hass = request.app["hass"]
+        if (session := async_get_session(hass, upload_id, _user_id(request))) is None:
+            return web.Response(status=404, text="Upload not found")
+        if not (checksum := request.headers.get("X-Chunk-CRC32")):
+            return web.Response(status=400, text="Missing X-Chunk-CRC32 header")
+
+        try:
+            await async_write_chunk(
+                session,
+                int(index),
+                request.content.iter_chunked(DEFAULT_CHUNK_SIZE * 1024),
+                checksum,
+            )
+        except (ChunkError, ValueError) as e:
+            return web.Response(status=422, text=str(e))
+
+        return web.json_response(
+            {"received": len(session.received), "chunks": session.chunks}
+        )
+
+
+class IPPUploadCommitView(HomeAssistantView):
+    """View printing a complete upload."""
+
+    url = "/api/ipp_printer_service/uploads/{upload_id}/commit"
+    name = "api:ipp_printer_service:upload_commit"
+    requires_auth = True
+
+    async def post(self, request: web.Request, upload_id: str) -> web.Response:
+        """Queue the assembled document for printing."""
+        hass = request.app["hass"]
+        if (session := async_get_session(hass, upload_id, _user_id(request))) is None:
+            return web.Response(status=404, text="Upload not found")
+
+        try:
+            async_pop_complete_session(hass, session)
+        except ChunkError as e:
+            return web.Response(status=409, text=str(e))
+
+        try:
+            job = _async_queue_session(hass, session)
+        except HomeAssistantError as e:
+            await session.config_entry.runtime_data.spool.async_remove(session.path)
+            return web.Response(status=503, text=str(e))
+
+        session.config_entry.runtime_data.metrics.increment("uploads")
+        return web.json_response(
+            {
+                "mode": "spooled",
+                "job_handle": job.handle,
+                "status": job.status,
+                "queue_depth": session.config_entry.runtime_data.queue.depth,
+            }
+        )
+
+
+@callback
+def _async_queue_session(hass: HomeAssistant, session: UploadSession) -> PrintJob:
+    """Queue the document of a complete upload, removed once printed."""
+
+    async def _async_run() -> int | None:
+        return await async_print_document(
+            hass,
+            session.config_entry,
+            session.entity_id,
+            session.path,
+            session.copies,
+            session.job_name,
+        )
+
+    return session.config_entry.runtime_data.queue.async_submit(
+        session.filename, _async_run
+    )
+
+
+class IPPMetricsView(HomeAssistantView):
+    """View exposing the print metrics in the Prometheus text format."""
+
+    url = "/api/ipp_printer_service/metrics"
+    name = "api:ipp_printer_service:metrics"
+    requires_auth = True
+
+    async def get(self, request: web.Request) -> web.Response:
+        """Return the metrics of the printers with the metrics option enabled."""
+        hass = request.app["hass"]
+        printers = []
+        for entry in hass.config_entries.async_entries(DOMAIN):
+            if entry.state is not ConfigEntryState.LOADED or not entry.options.get(
+                CONF_METRICS, False
+            ):
+                continue
+            coordinator = entry.runtime_data
+            printers.append(
+                (
+                    {"entry_id": entry.entry_id, "printer": entry.title},
+                    coordinator.metrics,
+                    {
+                        "up": int(coordinator.last_update_success),
+                        "queue_depth": coordinator.queue.depth,
+                        "tracked_jobs": coordinator.jobs.tracked,
+                        "spool_bytes": coordinator.spool.size,
+                        "circuit_open": int(
+                            coordinator.client.breaker.state != STATE_CLOSED
+                        ),
+                    },
+                )
+            )
+        return web.Response(
+            body=render_prometheus(printers).encode(),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+        )
+
+
+@callback
+def async_register_metrics_view(hass: HomeAssistant) -> None:
+    """Register the metrics view, once, when an entry enables it."""
+    if hass.data.get(DATA_METRICS_VIEW):
+        return
+    hass.data[DATA_METRICS_VIEW] = True
+    hass.http.register_view(IPPMetricsView())
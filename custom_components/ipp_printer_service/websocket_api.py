@@ -0,0 +1,185 @@
+"""WebSocket API for IPP Printer Service."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from pyipp import IPPError
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+
+from .jobs import EVENT_JOB_STATE_CHANGED, HISTORY_SIZE, TERMINAL_STATES
+from .print_queue import PrintJob
+from .services import async_get_config_entry
+
+# Number of history records returned by jobs/list unless asked otherwise
+DEFAULT_LIST_LIMIT = 20
+
+
+@callback
+def async_register_websocket_commands(hass: HomeAssistant) -> None:
+    """Register the job commands."""
+    websocket_api.async_register_command(hass, ws_list_jobs)
+    websocket_api.async_register_command(hass, ws_subscribe_jobs)
+    websocket_api.async_register_command(hass, ws_cancel_job)
+
+
+@callback
+def _async_get_entry(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> ConfigEntry | None:
+    """Return the entry of the message's entity, or send an error."""
+    try:
+        return async_get_config_entry(hass, msg["entity_id"])
+    except HomeAssistantError as err:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, str(err))
+        return None
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "ipp_printer_service/jobs/list",
+        vol.Required("entity_id"): cv.entity_id,
+        vol.Optional("limit", default=DEFAULT_LIST_LIMIT): vol.All(
+            vol.Coerce(int), vol.Range(min=0, max=HISTORY_SIZE)
+        ),
+    }
+)
+@callback
+def ws_list_jobs(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """List the queued jobs and the most recent jobs sent to the printer."""
+    if (config_entry := _async_get_entry(hass, connection, msg)) is None:
+        return
+    coordinator = config_entry.runtime_data
+    history = list(coordinator.jobs.history)
+    connection.send_result(
+        msg["id"],
+        {
+            "queue": [job.as_dict() for job in coordinator.queue.jobs.values()],
+            "history": history[len(history) - msg["limit"] :],
+        },
+    )
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "ipp_printer_service/jobs/subscribe",
+        vol.Required("entity_id"): cv.entity_id,
+        vol.Optional("job_handle"): str,
+    }
+)
+@callback
+def ws_subscribe_jobs(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """Send the progress of queued jobs and the state changes of printer jobs.
+
+    A "job" event is sent whenever a queued job changes status and, at most
+    every PROGRESS_INTERVAL, while it is uploaded. A "state" event is sent
+    when the printer reports a new state for a job. Events can be limited
+    to a single job with ``job_handle``.
+    """
+    if (config_entry := _async_get_entry(hass, connection, msg)) is None:
+        return
+    coordinator = config_entry.runtime_data
+    handle = msg.get("job_handle")
+
+    @callback
+    def _async_send_job(job: PrintJob) -> None:
+        if handle is None or job.handle == handle:
+            connection.send_message(
+                websocket_api.event_message(
+                    msg["id"], {"type": "job", "job": job.as_dict()}
+                )
+            )
+
+    @callback
+    def _async_send_state(event: Event) -> None:
+        if event.data["entry_id"] != config_entry.entry_id or (
+            handle is not None and event.data.get("job_handle") != handle
+        ):
+            return
+        connection.send_message(
+            websocket_api.event_message(msg["id"], {"type": "state", **event.data})
+        )
+
+    remove_listener = coordinator.queue.async_add_listener(_async_send_job)
+    remove_bus_listener = hass.bus.async_listen(
+        EVENT_JOB_STATE_CHANGED, _async_send_state
+    )
+
+    @callback
+    def _async_unsubscribe() -> None:
+        remove_listener()
+        remove_bus_listener()
+
+    connection.subscriptions[msg["id"]] = _async_unsubscribe
+    connection.send_result(msg["id"])
+
+    # Start with the jobs already in the queue
+    for job in list(coordinator.queue.jobs.values()):
+        _async_send_job(job)
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "ipp_printer_service/jobs/cancel",
+        vol.Required("entity_id"): cv.entity_id,
+        vol.Exclusive("job_handle", "job"): str,
+        vol.Exclusive("job_id", "job"): vol.Coerce(int),
+    }
+)
+@websocket_api.async_response
+async def ws_cancel_job(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """Cancel a job, in the queue if it is still there, else on the printer."""
+    if (config_entry := _async_get_entry(hass, connection, msg)) is None:
+        return
+    coordinator = config_entry.runtime_data
+    handle = msg.get("job_handle")
+
+    if handle is not None and coordinator.queue.async_cancel(handle):
+        connection.send_result(msg["id"], {"cancelled": "queue", "job_ids": []})
+        return
+
+    if handle is not None:
+        # The queue job was sent already, cancel what it left on the printer
+        job_ids = [
+            record["job_id"]
+            for record in coordinator.jobs.history
+            if record.get("job_handle") == handle
+            and record.get("job_id") is not None
+            and record["state"] not in TERMINAL_STATES
+        ]
+    elif "job_id" in msg:
+        job_ids = [msg["job_id"]]
+    else:
+        connection.send_error(
+            msg["id"], websocket_api.ERR_INVALID_FORMAT, "A job handle or id is required"
+        )
+        return
+    if not job_ids:
+        connection.send_error(
+            msg["id"], websocket_api.ERR_NOT_FOUND, f"No active job for {handle}"
+        )
+        return
+
+    for job_id in job_ids:
+        try:
+            await coordinator.jobs.async_cancel(job_id)
+        except IPPError as err:
+            connection.send_error(
+                msg["id"],
+                websocket_api.ERR_HOME_ASSISTANT_ERROR,
+                f"Failed to cancel job {job_id}: {err}",
+            )
+            return
+    connection.send_result(msg["id"], {"cancelled": "printer", "job_ids": job_ids})
@@ -0,0 +1,487 @@
+"""Layout of simple text documents as PDF for IPP Printer Service.
+
+Documents are written in a line based layout language, usually produced by
+a template::
+
+    @page a4 landscape
+    # Attendance
+    @align right
+    Printed on 2024-05-01
+    @align left
+    | Name | Present |
+    |---|---|
+    | Alice | yes |
+    ---
+    - a bullet point
+    @image /config/www/logo.png 40
+    ===
+
+Lines starting with ``#``, ``##`` and ``###`` are headings, ``- `` starts
+a bullet, lines starting with ``|`` are table rows (the row before a
+``|---|`` line is the header), ``---`` draws a rule, ``===`` starts a new
+page and empty lines add space. Other lines are paragraphs, wrapped to the
+page width. Directives start with ``@``: ``@page <size> [landscape]``,
+``@margin <mm>``, ``@size <points>``, ``@align left|center|right`` and
+``@image <path> [width in mm]``.
+
+Runs in a worker process and is loaded under its own top-level name, like
+the preprocessing, so it only depends on the standard library and Pillow.
+Text uses the standard Helvetica fonts, characters outside of Windows-1252
+are printed as ``?``.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import io
+import re
+from typing import Any
+import zlib
+
+MM = 72 / 25.4
+
+PAGE_SIZES = {
+    "a3": (841.89, 1190.55),
+    "a4": (595.28, 841.89),
+    "a5": (419.53, 595.28),
+    "a6": (297.64, 419.53),
+    "legal": (612.0, 1008.0),
+    "letter": (612.0, 792.0),
+}
+DEFAULT_PAGE_SIZE = "a4"
+DEFAULT_MARGIN = 15 * MM
+DEFAULT_FONT_SIZE = 11.0
+LINE_HEIGHT = 1.3
+HEADING_SIZES = {1: 2.0, 2: 1.5, 3: 1.2}
+CELL_PADDING = 3.0
+BULLET_INDENT = 14.0
+
+FONT_REGULAR = "F1"
+FONT_BOLD = "F2"
+FONT_NAMES = {FONT_REGULAR: "Helvetica", FONT_BOLD: "Helvetica-Bold"}
+
+# Glyph widths of the printable ASCII characters, in 1/1000 of the font size
+_WIDTHS = {
+    FONT_REGULAR: (
+        278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333,
+        278, 278, 556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278,
+        584, 584, 584, 556, 1015, 667, 667, 722, 722, 667, 611, 778, 722, 278,
+        500, 667, 556, 833, 722, 778, 667, 778, 722, 667, 611, 722, 667, 944,
+        667, 667, 611, 278, 278, 278, 469, 556, 333, 556, 556, 500, 556, 556,
+        278, 556, 556, 222, 222, 500, 222, 833, 556, 556, 556, 556, 333, 500,
+        278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+    ),
+    FONT_BOLD: (
+        278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333,
+        278, 278, 556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333,
+        584, 584, 584, 611, 975, 722, 722, 722, 722, 667, 611, 778, 722, 278,
+        556, 722, 611, 833, 722, 778, 667, 778, 722, 667, 611, 722, 667, 944,
+        667, 667, 611, 333, 278, 333, 584, 556, 333, 556, 611, 556, 611, 556,
+        333, 611, 611, 278, 278, 556, 278, 889, 611, 611, 611, 611, 389, 556,
+        333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+    ),
+}
+# Width of the characters beyond ASCII, close enough for accented letters
+_DEFAULT_WIDTH = 556
+
+_IMAGE_DIRECTIVE = re.compile(r"^@image\s+(\S+)", re.MULTILINE)
+
+
+def image_paths(text: str) -> list[str]:
+    """Return the paths of the images a document shows."""
+    return list(dict.fromkeys(_IMAGE_DIRECTIVE.findall(text)))
+
+
+def text_width(text: str, font: str, size: float) -> float:
+    """Return the width of a text in points."""
+    widths = _WIDTHS[font]
+    return (
+        sum(
+            widths[code - 32] if 32 <= code < 127 else _DEFAULT_WIDTH
+            for code in map(ord, text)
+        )
+        * size
+        / 1000
+    )
+
+
+def wrap(text: str, font: str, size: float, width: float) -> list[str]:
+    """Split a text into lines fitting a width, breaking long words."""
+    lines: list[str] = []
+    line = ""
+    for word in text.split():
+        candidate = f"{line} {word}" if line else word
+        if text_width(candidate, font, size) <= width:
+            line = candidate
+            continue
+        if line:
+            lines.append(line)
+        while text_width(word, font, size) > width and len(word) > 1:
+            # Break words longer than a whole line
+            cut = len(word) - 1
+            while cut > 1 and text_width(word[:cut], font, size) > width:
+                cut -= 1
+            lines.append(word[:cut])
+            word = word[cut:]
+        line = word
+    if line or not lines:
+        lines.append(line)
+    return lines
+
+
+def _escape(text: str) -> bytes:
+    """Encode a text as the content of a PDF string."""
+    data = text.encode("cp1252", errors="replace")
+    return data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+@dataclass
+class _Page:
+    """Content of a page being laid out."""
+
+    size: tuple[float, float]
+    content: bytearray = field(default_factory=bytearray)
+    images: dict[str, int] = field(default_factory=dict)
+
+
+class _Layout:
+    """Place the elements of a document on pages."""
+
+    def __init__(self, assets: dict[str, bytes]) -> None:
+        """Initialize the layout."""
+        self.assets = assets
+        self.page_size = PAGE_SIZES[DEFAULT_PAGE_SIZE]
+        self.margin = DEFAULT_MARGIN
+        self.font_size = DEFAULT_FONT_SIZE
+        self.align = "left"
+        self.pages: list[_Page] = []
+        # Image name, width, height and JPEG data, in order of first use
+        self.images: dict[str, tuple[str, int, int, bytes]] = {}
+        self.y = 0.0
+
+    @property
+    def width(self) -> float:
+        """Return the width available for content."""
+        return self.page_size[0] - 2 * self.margin
+
+    @property
+    def page(self) -> _Page:
+        """Return the current page, starting the first one when needed."""
+        if not self.pages:
+            self.new_page()
+        return self.pages[-1]
+
+    def new_page(self) -> None:
+        """Start a new page."""
+        self.pages.append(_Page(self.page_size))
+        self.y = self.page_size[1] - self.margin
+
+    def reserve(self, height: float) -> None:
+        """Start a new page unless the current one has room for height."""
+        page = self.page
+        if self.y - height < self.margin and page.content:
+            self.new_page()
+
+    def text(self, line: str, font: str, size: float, x: float | None = None) -> None:
+        """Draw a line of text at the cursor and move the cursor down."""
+        leading = size * LINE_HEIGHT
+        self.reserve(leading)
+        if x is None:
+            x = self.margin
+            if self.align != "left":
+                free = self.width - text_width(line, font, size)
+                x += free if self.align == "right" else free / 2
+        self.y -= leading
+        baseline = self.y + (leading - size) / 2 + size * 0.2
+        self.page.content += b"BT /%s %.2f Tf %.2f %.2f Td (%s) Tj ET\n" % (
+            font.encode(),
+            size,
+            x,
+            baseline,
+            _escape(line),
+        )
+
+    def paragraph(
+        self, text: str, font: str, size: float, indent: float = 0.0
+    ) -> None:
+        """Draw a text wrapped to the page width."""
+        for line in wrap(text, font, size, self.width - indent):
+            self.text(line, font, size, self.margin + indent if indent else None)
+
+    def rule(self) -> None:
+        """Draw a horizontal line across the page."""
+        self.reserve(self.font_size)
+        self.y -= self.font_size / 2
+        self.page.content += b"0.5 w %.2f %.2f m %.2f %.2f l S\n" % (
+            self.margin,
+            self.y,
+            self.margin + self.width,
+            self.y,
+        )
+        self.y -= self.font_size / 2
+
+    def table(self, rows: list[tuple[list[str], bool]]) -> None:
+        """Draw rows of cells with a grid, header rows in bold."""
+        columns = max(len(cells) for cells, _ in rows)
+        column_width = self.width / columns
+        size = self.font_size
+        leading = size * LINE_HEIGHT
+        for cells, header in rows:
+            font = FONT_BOLD if header else FONT_REGULAR
+            wrapped = [
+                wrap(cell, font, size, column_width - 2 * CELL_PADDING)
+                for cell in cells + [""] * (columns - len(cells))
+            ]
+            height = max(len(lines) for lines in wrapped) * leading + CELL_PADDING
+            self.reserve(height)
+            top = self.y
+            for column, lines in enumerate(wrapped):
+                x = self.margin + column * column_width
+                self.page.content += b"0.5 w %.2f %.2f %.2f %.2f re S\n" % (
+                    x,
+                    top - height,
+                    column_width,
+                    height,
+                )
+                self.y = top - CELL_PADDING / 2
+                for line in lines:
+                    self.text(line, font, size, x + CELL_PADDING)
+            self.y = top - height
+
+    def image(self, path: str, width_mm: float | None) -> None:
+        """Draw an image at the cursor, scaled to a width."""
+        if (data := self.assets.get(path)) is None:
+            self.paragraph(f"[missing image {path}]", FONT_REGULAR, self.font_size)
+            return
+        if path not in self.images:
+            self.images[path] = (f"Im{len(self.images) + 1}", *_jpeg(data))
+        name, pixels_wide, pixels_high, _ = self.images[path]
+        width = min(width_mm * MM if width_mm else pixels_wide * 0.75, self.width)
+        height = width * pixels_high / pixels_wide
+        self.reserve(height)
+        x = self.margin
+        if self.align != "left":
+            free = self.width - width
+            x += free if self.align == "right" else free / 2
+        self.y -= height
+        page = self.page
+        page.images[name] = 0
+        page.content += b"q %.2f 0 0 %.2f %.2f %.2f cm /%s Do Q\n" % (
+            width,
+            height,
+            x,
+            self.y,
+            name.encode(),
+        )
+
+    def directive(self, name: str, arguments: list[str]) -> None:
+        """Apply an @ directive."""
+        if name == "page" and arguments:
+            size = PAGE_SIZES.get(arguments[0].lower(), self.page_size)
+            if "landscape" in (argument.lower() for argument in arguments[1:]):
+                size = (max(size), min(size))
+            self.page_size = size
+            if self.pages and self.page.content:
+                self.new_page()
+            elif self.pages:
+                self.page.size = size
+                self.y = self.page_size[1] - self.margin
+        elif name == "margin" and arguments:
+            self.margin = max(0.0, float(arguments[0])) * MM
+        elif name == "size" and arguments:
+            self.font_size = min(max(float(arguments[0]), 4.0), 96.0)
+        elif name == "align" and arguments:
+            if (align := arguments[0].lower()) in ("left", "center", "right"):
+                self.align = align
+        elif name == "image" and arguments:
+            self.image(
+                arguments[0], float(arguments[1]) if len(arguments) > 1 else None
+            )
+
+
+def _jpeg(data: bytes) -> tuple[int, int, bytes]:
+    """Return the size and JPEG data of an image, converting it if needed."""
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        if image.format == "JPEG" and image.mode in ("RGB", "L"):
+            return image.width, image.height, data
+        if image.mode in ("RGBA", "LA", "P"):
+            # Flatten transparency onto white paper
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        elif image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        output = io.BytesIO()
+        image.save(output, "JPEG", quality=90)
+        return image.width, image.height, output.getvalue()
+
+
+def _cells(line: str) -> list[str]:
+    """Return the cells of a table row."""
+    return [cell.strip() for cell in line.strip().strip("|").split("|")]
+
+
+def _is_separator(line: str) -> bool:
+    """Return True for a table header separator like ``|---|:--:|``."""
+    return bool(re.fullmatch(r"\|?(\s*:?-+:?\s*\|)+\s*:?-*:?\s*", line.strip()))
+
+
+def layout_pdf(text: str, assets: dict[str, bytes]) -> dict[str, Any]:
+    """Lay out a document and return the PDF and its number of pages.
+
+    ``assets`` holds the content of the images the document shows.
+    """
+    layout = _Layout(assets)
+    lines = text.splitlines()
+    index = 0
+    while index < len(lines):
+        line = lines[index].rstrip()
+        index += 1
+        stripped = line.strip()
+
+        if stripped.startswith("|"):
+            rows: list[tuple[list[str], bool]] = []
+            index -= 1
+            while index < len(lines) and lines[index].strip().startswith("|"):
+                row = lines[index]
+                index += 1
+                if _is_separator(row):
+                    if rows:
+                        rows[-1] = (rows[-1][0], True)
+                    continue
+                rows.append((_cells(row), False))
+            if rows:
+                layout.table(rows)
+        elif not stripped:
+            layout.reserve(0)
+            layout.y -= layout.font_size * LINE_HEIGHT / 2
+        elif stripped == "===":
+            layout.new_page()
+        elif re.fullmatch(r"-{3,}", stripped):
+            layout.rule()
+        elif stripped.startswith("@"):
+            name, *arguments = stripped[1:].split()
+            try:
+                layout.directive(name.lower(), arguments)
+            except ValueError:
+                layout.paragraph(stripped, FONT_REGULAR, layout.font_size)
+        elif match := re.match(r"(#{1,3})\s+(.*)", stripped):
+            size = layout.font_size * HEADING_SIZES[len(match.group(1))]
+            layout.paragraph(match.group(2), FONT_BOLD, size)
+        elif stripped.startswith(("- ", "* ")):
+            size = layout.font_size
+            first, *rest = wrap(
+                stripped[2:], FONT_REGULAR, size, layout.width - BULLET_INDENT
+            )
+            top = layout.y
+            layout.text(first, FONT_REGULAR, size, layout.margin + BULLET_INDENT)
+            if layout.y < top:
+                # Draw the bullet on the line just written, even on a new page
+                layout.y += size * LINE_HEIGHT
+                layout.text("•", FONT_REGULAR, size, layout.margin + 4)
+            for line in rest:
+                layout.text(line, FONT_REGULAR, size, layout.margin + BULLET_INDENT)
+        else:
+            layout.paragraph(stripped, FONT_REGULAR, layout.font_size)
+
+    layout.page  # noqa: B018  # an empty document still has a page
+    return {"pdf": _write_pdf(layout), "pages": len(layout.pages)}
+
+
+def _write_pdf(layout: _Layout) -> bytes:
+    """Serialize the laid out pages as a PDF file."""
+    objects: list[bytes] = []
+
+    def _add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    def _stream(dictionary: bytes, data: bytes) -> bytes:
+        return b"<< %s /Length %d >>\nstream\n%s\nendstream" % (
+            dictionary,
+            len(data),
+            data,
+        )
+
+    catalog = _add(b"")
+    pages = _add(b"")
+    fonts = {
+        name: _add(
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /%s "
+            b"/Encoding /WinAnsiEncoding >>" % base_font.encode()
+        )
+        for name, base_font in FONT_NAMES.items()
+    }
+    images = {
+        name: _add(
+            _stream(
+                b"/Type /XObject /Subtype /Image /Width %d /Height %d "
+                b"/ColorSpace /%s /BitsPerComponent 8 /Filter /DCTDecode"
+                % (
+                    width,
+                    height,
+                    b"DeviceGray" if _is_gray(data) else b"DeviceRGB",
+                ),
+                data,
+            )
+        )
+        for name, width, height, data in layout.images.values()
+    }
+    font_resources = b" ".join(
+        b"/%s %d 0 R" % (name.encode(), number) for name, number in fonts.items()
+    )
+
+    kids = []
+    for page in layout.pages:
+        content = _add(
+            _stream(b"/Filter /FlateDecode", zlib.compress(bytes(page.content)))
+        )
+        image_resources = b" ".join(
+            b"/%s %d 0 R" % (name.encode(), images[name]) for name in page.images
+        )
+        kids.append(
+            _add(
+                b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %.2f %.2f] "
+                b"/Resources << /Font << %s >> /XObject << %s >> >> "
+                b"/Contents %d 0 R >>"
+                % (
+                    pages,
+                    *page.size,
+                    font_resources,
+                    image_resources,
+                    content,
+                )
+            )
+        )
+
+    objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages
+    objects[pages - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % kid for kid in kids),
+        len(kids),
+    )
+
+    output = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        catalog,
+        xref,
+    )
+    return bytes(output)
+
+
+def _is_gray(data: bytes) -> bool:
+    """Return True if JPEG data holds a single color component."""
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        return image.mode == "L"
@@ -0,0 +1,186 @@
+"""PDF preprocessing run in the worker processes of IPP Printer Service.
+
+Loaded under its own top-level name rather than as part of the integration,
+so worker processes import it without importing Home Assistant. It only
+depends on pypdf and Pillow.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import math
+import os
+from typing import Any
+
+# Supported pages per sheet and their (columns, rows) on the sheet
+PAGES_PER_SHEET = {1: (1, 1), 2: (2, 1), 4: (2, 2), 6: (3, 2), 9: (3, 3), 16: (4, 4)}
+DEFAULT_IMAGE_QUALITY = 85
+
+# Images with these keys carry transparency that recompression would drop
+_MASK_KEYS = ("/SMask", "/Mask", "/ImageMask")
+
+
+@dataclass(frozen=True)
+class PreprocessOptions:
+    """Preprocessing applied to a PDF before it is sent to the printer."""
+
+    page_ranges: str | None = None
+    pages_per_sheet: int = 1
+    image_dpi: int | None = None
+    image_quality: int | None = None
+
+    def __bool__(self) -> bool:
+        """Return True if any stage is enabled."""
+        return bool(
+            self.page_ranges
+            or self.pages_per_sheet > 1
+            or self.image_dpi
+            or self.image_quality
+        )
+
+
+def parse_page_ranges(page_ranges: str) -> list[tuple[int, int | None]]:
+    """Parse page ranges like ``1-3,5,8-`` into 1-based inclusive ranges.
+
+    Raises ValueError for malformed ranges.
+    """
+    ranges: list[tuple[int, int | None]] = []
+    for part in page_ranges.replace(" ", "").split(","):
+        if not part:
+            continue
+        first, separator, last = part.partition("-")
+        start = int(first) if first else 1
+        end = (int(last) if last else None) if separator else start
+        if start < 1 or (end is not None and end < start):
+            raise ValueError(f"Invalid page range: {part}")
+        ranges.append((start, end))
+    if not ranges:
+        raise ValueError("No pages selected")
+    return ranges
+
+
+def preprocess_pdf(
+    source: str, destination: str, options: PreprocessOptions
+) -> dict[str, Any]:
+    """Apply the preprocessing stages to a PDF file and write the result."""
+    # pylint: disable-next=import-outside-toplevel
+    from pypdf import PageObject, PdfReader, PdfWriter, Transformation
+
+    reader = PdfReader(source)
+    page_count = len(reader.pages)
+    indexes = list(range(page_count))
+    if options.page_ranges:
+        indexes = [
+            index
+            for start, end in parse_page_ranges(options.page_ranges)
+            for index in range(start - 1, min(end or page_count, page_count))
+        ]
+        if not indexes:
+            raise ValueError(f"No pages in {options.page_ranges} ({page_count} pages)")
+
+    writer = PdfWriter()
+    for index in indexes:
+        writer.add_page(reader.pages[index])
+
+    images = 0
+    if options.image_dpi or options.image_quality:
+        images = _recompress_images(writer, options)
+
+    if options.pages_per_sheet > 1:
+        sheets = PdfWriter()
+        columns, rows = PAGES_PER_SHEET[options.pages_per_sheet]
+        first = writer.pages[0]
+        first.transfer_rotation_to_content()
+        width, height = float(first.mediabox.width), float(first.mediabox.height)
+        # Lay the grid out so that cells keep the orientation of the pages
+        if (columns > rows) == (height > width):
+            width, height = height, width
+        cell_width, cell_height = width / columns, height / rows
+
+        pages = list(writer.pages)
+        for offset in range(0, len(pages), options.pages_per_sheet):
+            sheet = PageObject.create_blank_page(width=width, height=height)
+            for position, page in enumerate(
+                pages[offset : offset + options.pages_per_sheet]
+            ):
+                page.transfer_rotation_to_content()
+                page_width = float(page.mediabox.width)
+                page_height = float(page.mediabox.height)
+                scale = min(cell_width / page_width, cell_height / page_height)
+                column, row = position % columns, position // columns
+                # Center each page in its cell, filling rows from the top
+                x = column * cell_width + (cell_width - page_width * scale) / 2
+                y = (
+                    height
+                    - (row + 1) * cell_height
+                    + (cell_height - page_height * scale) / 2
+                )
+                sheet.merge_transformed_page(
+                    page,
+                    Transformation()
+                    .translate(-float(page.mediabox.left), -float(page.mediabox.bottom))
+                    .scale(scale, scale)
+                    .translate(x, y),
+                )
+            sheets.add_page(sheet)
+        writer = sheets
+
+    for page in writer.pages:
+        page.compress_content_streams()
+    writer.compress_identical_objects(remove_duplicates=True, remove_unreferenced=True)
+
+    with open(destination, "wb") as file:
+        writer.write(file)
+
+    return {
+        "pages": page_count,
+        "selected_pages": len(indexes),
+        "sheets": len(writer.pages),
+        "images_recompressed": images,
+        "size": os.path.getsize(source),
+        "processed_size": os.path.getsize(destination),
+    }
+
+
+def _recompress_images(writer: Any, options: PreprocessOptions) -> int:
+    """Downsample and JPEG-recompress the images of a document."""
+    # pylint: disable-next=import-outside-toplevel
+    from PIL import Image
+
+    quality = options.image_quality or DEFAULT_IMAGE_QUALITY
+    done: set[int] = set()
+    count = 0
+    for page in writer.pages:
+        longest_side = max(float(page.mediabox.width), float(page.mediabox.height))
+        for image_file in page.images:
+            reference = image_file.indirect_reference
+            if reference is None or reference.idnum in done:
+                continue
+            done.add(reference.idnum)
+            image = image_file.image
+            if (
+                image is None
+                or image.mode not in ("RGB", "L", "CMYK")
+                or any(key in reference.get_object() for key in _MASK_KEYS)
+            ):
+                continue
+
+            resized = False
+            if options.image_dpi:
+                # An image never needs more pixels than covering the whole page
+                limit = math.ceil(longest_side / 72 * options.image_dpi)
+                if (ratio := limit / max(image.size)) < 1:
+                    image = image.resize(
+                        (
+                            max(1, round(image.width * ratio)),
+                            max(1, round(image.height * ratio)),
+                        ),
+                        Image.Resampling.LANCZOS,
+                    )
+                    resized = True
+            if not resized and not options.image_quality:
+                continue
+
+            image_file.replace(image, quality=quality)
+            count += 1
+    return count
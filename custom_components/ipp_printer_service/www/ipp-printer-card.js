@@ -1,3 +1,31 @@
+// Files larger than this are uploaded in chunks that survive a dropped connection
+const CHUNKED_UPLOAD_THRESHOLD = 8 * 1024 * 1024;
+const UPLOAD_PARALLEL_CHUNKS = 3;
+const UPLOAD_CHUNK_RETRIES = 5;
+
+// Printer job states after which a job is no longer followed
+const TERMINAL_JOB_STATES = ["canceled", "aborted", "completed", "unknown", "simulated"];
+
+const CRC32_TABLE = (() => {
+  const table = new Uint32Array(256);
+  for (let n = 0; n < 256; n++) {
+    let c = n;
+    for (let k = 0; k < 8; k++) {
+      c = c & 1 ? 0xedb88320 ^ (c >>> 1) : c >>> 1;
+    }
+    table[n] = c >>> 0;
+  }
+  return table;
+})();
+
+function crc32(bytes) {
+  let crc = 0xffffffff;
+  for (let i = 0; i < bytes.length; i++) {
+    crc = CRC32_TABLE[(crc ^ bytes[i]) & 0xff] ^ (crc >>> 8);
+  }
+  return ((crc ^ 0xffffffff) >>> 0).toString(16).padStart(8, "0");
+}
+
 class IPPPrinterCard extends HTMLElement {
   set hass(hass) {
     this._hass = hass;
@@ -7,12 +35,14 @@ class IPPPrinterCard extends HTMLElement {
           <div class="card-content">
             <input type="file" id="file-upload" accept=".pdf" style="display: block; margin-bottom: 16px;" />
             <mwc-button id="print-btn" raised>Print PDF</mwc-button>
+            <mwc-button id="cancel-btn" style="display: none;">Cancel</mwc-button>
             <div id="status" style="margin-top: 16px;"></div>
           </div>
         </ha-card>
       `;
       this.content = this.querySelector(".card-content");
       this.querySelector("#print-btn").addEventListener("click", this._printFile.bind(this));
+      this.querySelector("#cancel-btn").addEventListener("click", this._cancelJob.bind(this));
     }
   }
 
@@ -33,40 +63,246 @@ class IPPPrinterCard extends HTMLElement {
       return;
     }
 
-    statusDiv.innerText = "Uploading...";
+    statusDiv.innerText = "Printing...";
 
-    const formData = new FormData();
-    formData.append("file", file);
+    // Follow the job from the queue to the printer instead of polling sensors
+    const job = await this._follow(file);
 
     try {
-      const response = await fetch("/api/ipp_printer_service/upload", {
-        method: "POST",
-        body: formData,
-        headers: {
-          "Authorization": `Bearer ${this._hass.auth.data.access_token}`
+      const data = file.size > CHUNKED_UPLOAD_THRESHOLD
+        ? await this._uploadChunked(file, statusDiv)
+        : await this._uploadDirect(file);
+      fileInput.value = ""; // Clear input
+
+      if (this._job !== job) {
+        // The job already finished, its last update is shown
+        return;
+      }
+      job.handle = data.job_handle;
+      if (data.mode === "spooled") {
+        this.querySelector("#cancel-btn").style.display = "";
+        statusDiv.innerText = `Print job queued (${data.queue_depth} waiting).`;
+      } else if (data.job_id) {
+        job.jobId = data.job_id;
+        statusDiv.innerText = `Print job ${data.job_id} sent, waiting for the printer...`;
+      } else {
+        statusDiv.innerText = "Print job sent successfully!";
+        this._unfollow(job);
+      }
+      if (!job.unsubscribe) {
+        // Without updates there is nothing left to wait for
+        this._unfollow(job);
+      }
+
+    } catch (error) {
+      statusDiv.innerText = `Error: ${error.message}`;
+      console.error(error);
+      this._unfollow(job);
+    }
+  }
+
+  async _follow(file) {
+    this._unfollow();
+    const job = { file, handle: null, jobId: null, unsubscribe: null };
+    this._job = job;
+    try {
+      job.unsubscribe = await this._hass.connection.subscribeMessage(
+        (event) => this._handleJobEvent(job, event),
+        { type: "ipp_printer_service/jobs/subscribe", entity_id: this.config.entity }
+      );
+    } catch (error) {
+      // Older versions of the integration have no progress updates
+      console.warn("Cannot follow print job progress", error);
+    }
+    if (this._job !== job) {
+      this._unfollow(job);
+    }
+    return job;
+  }
+
+  _unfollow(job = this._job) {
+    if (!job) return;
+    if (job.unsubscribe) {
+      job.unsubscribe();
+      job.unsubscribe = null;
+    }
+    if (this._job === job) {
+      this._job = null;
+      this.querySelector("#cancel-btn").style.display = "none";
+    }
+  }
+
+  _handleJobEvent(job, event) {
+    if (this._job !== job) return;
+    const statusDiv = this.querySelector("#status");
+    const cancelButton = this.querySelector("#cancel-btn");
+
+    if (event.type === "job") {
+      const queued = event.job;
+      // A direct upload only learns its handle once printed, match it by name
+      if (job.handle ? queued.job_handle !== job.handle : queued.file_path !== job.file.name) {
+        return;
+      }
+      job.handle = queued.job_handle;
+      if (queued.job_id) job.jobId = queued.job_id;
+
+      if (queued.status === "queued") {
+        cancelButton.style.display = "";
+        statusDiv.innerText = "Print job queued.";
+      } else if (queued.status === "printing") {
+        cancelButton.style.display = "";
+        const percent = Math.min(100, Math.floor((queued.bytes_sent * 100) / job.file.size));
+        statusDiv.innerText = `Sending to printer... ${percent}%`;
+      } else if (queued.status === "done") {
+        statusDiv.innerText = job.jobId
+          ? `Print job ${job.jobId} sent, waiting for the printer...`
+          : "Print job sent successfully!";
+        if (!job.jobId) this._unfollow(job);
+      } else {
+        statusDiv.innerText = queued.status === "cancelled"
+          ? "Print job cancelled."
+          : `Error: ${queued.error}`;
+        this._unfollow(job);
+      }
+    } else if (event.type === "state") {
+      if (event.job_handle ? event.job_handle !== job.handle : event.job_id !== job.jobId) {
+        return;
+      }
+      const message = event.message ? ` (${event.message})` : "";
+      statusDiv.innerText = `Print job ${event.job_id}: ${event.state}${message}`;
+      if (TERMINAL_JOB_STATES.includes(event.state)) {
+        if (event.state === "completed") {
+          statusDiv.innerText = `Print job ${event.job_id} printed successfully!`;
         }
+        this._unfollow(job);
+      }
+    }
+  }
+
+  async _cancelJob() {
+    const job = this._job;
+    if (!job || !job.handle) return;
+    try {
+      await this._hass.callWS({
+        type: "ipp_printer_service/jobs/cancel",
+        entity_id: this.config.entity,
+        job_handle: job.handle,
       });
+      this.querySelector("#status").innerText = "Cancelling print job...";
+    } catch (error) {
+      this.querySelector("#status").innerText = `Error: ${error.message}`;
+    }
+  }
 
-      if (!response.ok) {
-        throw new Error(await response.text());
+  async _fetch(url, options = {}) {
+    const response = await fetch(url, {
+      ...options,
+      headers: {
+        ...options.headers,
+        "Authorization": `Bearer ${this._hass.auth.data.access_token}`
       }
+    });
+    if (!response.ok) {
+      const error = new Error(await response.text());
+      error.status = response.status;
+      throw error;
+    }
+    return response;
+  }
 
-      const data = await response.json();
-      const filePath = data.file_path;
+  async _uploadDirect(file) {
+    const formData = new FormData();
+    formData.append("file", file);
 
-      statusDiv.innerText = "Printing...";
+    // The upload is streamed straight to the printer, or queued if it is busy
+    const params = new URLSearchParams({ entity_id: this.config.entity });
+    const response = await this._fetch(`/api/ipp_printer_service/upload?${params}`, {
+      method: "POST",
+      body: formData,
+    });
+    return response.json();
+  }
 
-      await this._hass.callService("ipp_printer_service", "print_pdf", {
-        entity_id: this.config.entity,
-        file_path: filePath
+  async _uploadChunked(file, statusDiv) {
+    // Remember the upload so printing the same file again resumes it
+    const key = `ipp-printer-card:${this.config.entity}:${file.name}:${file.size}:${file.lastModified}`;
+    let session = null;
+    const uploadId = localStorage.getItem(key);
+    if (uploadId) {
+      try {
+        session = await (await this._fetch(`/api/ipp_printer_service/uploads/${uploadId}`)).json();
+      } catch (error) {
+        session = null;
+      }
+    }
+    if (!session) {
+      const response = await this._fetch("/api/ipp_printer_service/uploads", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({
+          entity_id: this.config.entity,
+          filename: file.name,
+          size: file.size,
+        }),
       });
+      session = await response.json();
+      localStorage.setItem(key, session.upload_id);
+    }
 
-      statusDiv.innerText = "Print job sent successfully!";
-      fileInput.value = ""; // Clear input
+    const url = `/api/ipp_printer_service/uploads/${session.upload_id}`;
+    const pending = [...Array(session.chunks).keys()].filter(
+      (index) => !session.received.includes(index)
+    );
+    let done = session.chunks - pending.length;
+    const report = () => {
+      statusDiv.innerText = `Uploading... ${Math.floor((done * 100) / session.chunks)}%`;
+    };
+    report();
 
+    const sendChunks = async () => {
+      while (pending.length) {
+        const index = pending.shift();
+        const start = index * session.chunk_size;
+        const chunk = new Uint8Array(
+          await file.slice(start, start + session.chunk_size).arrayBuffer()
+        );
+        const checksum = crc32(chunk);
+        for (let attempt = 0; ; attempt++) {
+          try {
+            await this._fetch(`${url}/chunks/${index}`, {
+              method: "PUT",
+              body: chunk,
+              headers: {
+                "Content-Type": "application/octet-stream",
+                "X-Chunk-CRC32": checksum,
+              },
+            });
+            break;
+          } catch (error) {
+            if (error.status === 404 || attempt >= UPLOAD_CHUNK_RETRIES) {
+              throw error;
+            }
+            await new Promise((resolve) => setTimeout(resolve, 1000 * 2 ** attempt));
+          }
+        }
+        done++;
+        report();
+      }
+    };
+
+    try {
+      await Promise.all(Array.from({ length: UPLOAD_PARALLEL_CHUNKS }, sendChunks));
+      const response = await this._fetch(`${url}/commit`, { method: "POST" });
+      localStorage.removeItem(key);
+      return response.json();
     } catch (error) {
-      statusDiv.innerText = `Error: ${error.message}`;
-      console.error(error);
+      if (error.status === 404) {
+        // The upload expired, start over next time
+        localStorage.removeItem(key);
+      } else {
+        error.message = `${error.message} (print again to resume the upload)`;
+      }
+      throw error;
     }
   }
 
@@ -0,0 +1 @@
+"""Tests for the IPP Printer Service integration."""
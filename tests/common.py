@@ -0,0 +1,57 @@
+"""Helpers shared by the IPP Printer Service tests and benchmarks."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.const import CONF_HOST, CONF_PORT, CONF_SSL, CONF_VERIFY_SSL
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+
+from benchmarks.fake_ipp_server import FakeIPPServer
+from custom_components.ipp_printer_service.const import (
+    CONF_BASE_PATH,
+    CONF_PRINTER_NAME,
+    DOMAIN,
+)
+
+
+async def async_setup_printer(
+    hass: HomeAssistant,
+    server: FakeIPPServer,
+    printer: str,
+    options: dict[str, Any] | None = None,
+    setup: bool = True,
+) -> MockConfigEntry:
+    """Add an entry for a queue of the fake server, set up unless told not to."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title=printer,
+        data={
+            CONF_HOST: server.host,
+            CONF_PORT: server.port,
+            CONF_SSL: False,
+            CONF_VERIFY_SSL: False,
+            CONF_PRINTER_NAME: printer,
+            CONF_BASE_PATH: f"/printers/{printer}",
+        },
+        options=options or {},
+    )
+    entry.add_to_hass(hass)
+    if setup:
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+    return entry
+
+
+def get_entity_id(hass: HomeAssistant, entry: MockConfigEntry) -> str:
+    """Return the id of the printer sensor of an entry."""
+    return next(
+        entity.entity_id
+        for entity in er.async_entries_for_config_entry(
+            er.async_get(hass), entry.entry_id
+        )
+        if entity.domain == "sensor"
+    )
@@ -0,0 +1,123 @@
+"""Fixtures for IPP Printer Service tests."""
+
+from __future__ import annotations
+
+import asyncio
+import builtins
+from collections.abc import AsyncIterator, Callable, Iterator
+from contextlib import AbstractContextManager, ExitStack, contextmanager
+import functools
+import io
+import mimetypes
+import os
+from pathlib import Path
+import shutil
+import time
+import traceback
+from unittest.mock import patch
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.core import HomeAssistant
+
+from benchmarks.fake_ipp_server import FakeIPPServer
+
+from .common import async_setup_printer, get_entity_id
+
+# Calls that block the thread they run in, they must never run on the loop
+BLOCKING_CALLS = [
+    (builtins, "open"),
+    (io, "open"),
+    (os, "stat"),
+    (os, "listdir"),
+    (os, "scandir"),
+    (os, "makedirs"),
+    (os, "remove"),
+    (os, "unlink"),
+    (os, "rename"),
+    (os, "replace"),
+    (os, "truncate"),
+    (os, "fsync"),
+    (shutil, "rmtree"),
+    (shutil, "copyfileobj"),
+    (time, "sleep"),
+]
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations: None) -> None:
+    """Enable loading the integration in every test."""
+
+
+@pytest.fixture
+async def fake_server() -> AsyncIterator[FakeIPPServer]:
+    """Return a running fake CUPS server with a single queue."""
+    async with FakeIPPServer() as server:
+        yield server
+
+
+@pytest.fixture
+async def config_entry(
+    hass: HomeAssistant, fake_server: FakeIPPServer, tmp_path: Path
+) -> MockConfigEntry:
+    """Return a set up entry for the queue of the fake server."""
+    hass.config.allowlist_external_dirs = {str(tmp_path)}
+    return await async_setup_printer(hass, fake_server, fake_server.queue_names[0])
+
+
+@pytest.fixture
+def entity_id(hass: HomeAssistant, config_entry: MockConfigEntry) -> str:
+    """Return the id of the printer sensor of the entry."""
+    return get_entity_id(hass, config_entry)
+
+
+@pytest.fixture
+def assert_no_blocking_io() -> Callable[[], AbstractContextManager[None]]:
+    """Return a context manager failing when blocking calls run on the loop.
+
+    The calls in BLOCKING_CALLS are wrapped to record where they were made
+    from when the calling thread runs an event loop, calls made from the
+    executor pass through. Calls are recorded rather than raised, so code
+    catching broad exceptions can't hide them.
+    """
+    # Loading the MIME types reads files, aiohttp does it on first use
+    mimetypes.init()
+
+    @contextmanager
+    def _assert_no_blocking_io() -> Iterator[None]:
+        calls: list[tuple[str, traceback.StackSummary]] = []
+
+        def _guard(name: str, func: Callable) -> Callable:
+            @functools.wraps(func)
+            def _wrapper(*args, **kwargs):
+                try:
+                    asyncio.get_running_loop()
+                except RuntimeError:
+                    pass
+                else:
+                    # Source lines are read once the calls are unpatched
+                    stack = traceback.StackSummary.extract(
+                        traceback.walk_stack(None), limit=8, lookup_lines=False
+                    )
+                    calls.append((f"{name}{args!r}", stack))
+                return func(*args, **kwargs)
+
+            return _wrapper
+
+        with ExitStack() as stack:
+            for module, name in BLOCKING_CALLS:
+                func = getattr(module, name)
+                stack.enter_context(
+                    patch.object(
+                        module, name, _guard(f"{module.__name__}.{name}", func)
+                    )
+                )
+            yield
+
+        assert not calls, "\n".join(
+            f"{call} on the event loop:\n{''.join(stack.format())}"
+            for call, stack in calls
+        )
+
+    return _assert_no_blocking_io
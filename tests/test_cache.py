@@ -0,0 +1,118 @@
+"""Tests for the document cache of IPP Printer Service."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+from aiohttp import ClientSession, web
+import pytest
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+
+from custom_components.ipp_printer_service.cache import DocumentCache
+
+DOCUMENT_SIZE = 64 * 1024
+CHUNK_SIZE = 16 * 1024
+
+
+class FakeDocumentServer:
+    """Web server answering conditional requests for fixed documents."""
+
+    def __init__(self) -> None:
+        """Initialize the server."""
+        self.documents = {
+            name: name.encode() * (DOCUMENT_SIZE // len(name))
+            for name in ("first.pdf", "second.pdf")
+        }
+        # Revalidations wait for this event before being answered
+        self.revalidated = asyncio.Event()
+        self.revalidated.set()
+        self.revalidating = asyncio.Event()
+        self.url = ""
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """Answer with the document, or 304 when it was not modified."""
+        name = request.match_info["name"]
+        if request.headers.get("If-None-Match") == f'"{name}"' or name == "gone.pdf":
+            self.revalidating.set()
+            await self.revalidated.wait()
+            return web.Response(status=304)
+        return web.Response(body=self.documents[name], headers={"ETag": f'"{name}"'})
+
+
+@pytest.fixture
+async def document_server() -> AsyncIterator[FakeDocumentServer]:
+    """Return a running document server."""
+    server = FakeDocumentServer()
+    app = web.Application()
+    app.router.add_get("/{name}", server.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]  # noqa: SLF001
+    server.url = f"http://127.0.0.1:{port}"
+    yield server
+    await runner.cleanup()
+
+
+@pytest.fixture
+async def session() -> AsyncIterator[ClientSession]:
+    """Return a client session."""
+    async with ClientSession() as session:
+        yield session
+
+
+async def _async_read(
+    cache: DocumentCache, session: ClientSession, url: str
+) -> bytes:
+    """Read a URL through the cache."""
+    async with cache.async_open(session, url, CHUNK_SIZE) as chunks:
+        return b"".join([chunk async for chunk in chunks])
+
+
+async def test_hit_survives_eviction(
+    hass: HomeAssistant,
+    document_server: FakeDocumentServer,
+    session: ClientSession,
+    tmp_path: Path,
+) -> None:
+    """Test a document evicted while it is revalidated is still sent from disk."""
+    # Room for a single document
+    cache = DocumentCache(hass, str(tmp_path), DOCUMENT_SIZE)
+    first = f"{document_server.url}/first.pdf"
+    second = f"{document_server.url}/second.pdf"
+    await _async_read(cache, session, first)
+
+    document_server.revalidated.clear()
+    hit = hass.async_create_task(_async_read(cache, session, first))
+    await document_server.revalidating.wait()
+    # Storing the second document evicts the first one
+    await _async_read(cache, session, second)
+    assert cache.stats["entries"] == 1
+    document_server.revalidated.set()
+
+    assert await hit == document_server.documents["first.pdf"]
+    assert cache.hits == 1
+    # The file of the first document is removed once it was sent
+    assert cache.stats["files"] == 1
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+async def test_not_modified_without_entry(
+    hass: HomeAssistant,
+    document_server: FakeDocumentServer,
+    session: ClientSession,
+    tmp_path: Path,
+) -> None:
+    """Test a 304 for a URL that is not cached fails instead of printing nothing."""
+    cache = DocumentCache(hass, str(tmp_path), DOCUMENT_SIZE)
+
+    with pytest.raises(HomeAssistantError, match="not cached"):
+        await _async_read(cache, session, f"{document_server.url}/gone.pdf")
+
+    assert cache.misses == 0
+    assert cache.stats["entries"] == 0
@@ -0,0 +1,126 @@
+"""Tests that printing, spooling and uploading never block the event loop."""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator, Callable
+from contextlib import AbstractContextManager
+from datetime import timedelta
+from pathlib import Path
+
+from aiohttp import FormData
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.typing import ClientSessionGenerator
+
+from homeassistant.core import HomeAssistant
+
+from benchmarks.fake_ipp_server import FakeIPPServer
+from custom_components.ipp_printer_service.const import DOMAIN
+from custom_components.ipp_printer_service.spool import Spool
+
+BlockingCheck = Callable[[], AbstractContextManager[None]]
+
+DOCUMENT_SIZE = 2 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+
+def _document() -> bytes:
+    """Return a document larger than a few chunks."""
+    return b"%PDF-1.4\n" + bytes(DOCUMENT_SIZE)
+
+
+async def _chunks(data: bytes) -> AsyncIterator[bytes]:
+    """Yield data in chunks."""
+    for offset in range(0, len(data), CHUNK_SIZE):
+        yield data[offset : offset + CHUNK_SIZE]
+
+
+async def test_spool(
+    hass: HomeAssistant, tmp_path: Path, assert_no_blocking_io: BlockingCheck
+) -> None:
+    """Test every spool operation runs its file access off the loop."""
+    directory = tmp_path / "spool"
+    directory.mkdir()
+    (directory / "leftover.pdf").write_bytes(b"%PDF-1.4\n")
+    spool = Spool(hass, str(directory), max_size=4 * DOCUMENT_SIZE, ttl=timedelta(0))
+    data = _document()
+
+    with assert_no_blocking_io():
+        await spool.async_setup()
+        spool.async_start()
+        written = await spool.async_write(_chunks(data), "written.pdf", len(data))
+        allocated = await spool.async_allocate(len(data), "allocated.pdf")
+        assert await spool.async_write_at(allocated, 0, _chunks(data)) == len(data)
+        async with spool.async_temporary("temporary.pdf") as temporary:
+            assert temporary.startswith(str(directory))
+        await spool.async_remove(written)
+        await spool.async_reap()
+        await spool.async_clear()
+        await spool.async_stop()
+
+    assert spool.size == 0
+    assert not directory.exists()
+
+
+async def test_print_pdf(
+    hass: HomeAssistant,
+    config_entry: MockConfigEntry,
+    entity_id: str,
+    fake_server: FakeIPPServer,
+    tmp_path: Path,
+    assert_no_blocking_io: BlockingCheck,
+) -> None:
+    """Test the print_pdf service reads and sends a local document off the loop."""
+    path = tmp_path / "document.pdf"
+    path.write_bytes(_document())
+
+    with assert_no_blocking_io():
+        response = await hass.services.async_call(
+            DOMAIN,
+            "print_pdf",
+            {"entity_id": entity_id, "file_path": str(path), "wait": True},
+            blocking=True,
+            return_response=True,
+        )
+        await hass.async_block_till_done()
+
+    assert response["job_id"] == 1
+    assert fake_server.bytes_received >= DOCUMENT_SIZE
+
+
+async def test_upload_view(
+    hass: HomeAssistant,
+    hass_client: ClientSessionGenerator,
+    config_entry: MockConfigEntry,
+    entity_id: str,
+    fake_server: FakeIPPServer,
+    assert_no_blocking_io: BlockingCheck,
+) -> None:
+    """Test uploads are stored and printed without blocking the loop."""
+    client = await hass_client()
+    data = _document()
+
+    def _form() -> FormData:
+        form = FormData()
+        form.add_field(
+            "file", data, filename="upload.pdf", content_type="application/pdf"
+        )
+        return form
+
+    with assert_no_blocking_io():
+        # Stored in the upload spool for a later print_pdf call
+        response = await client.post("/api/ipp_printer_service/upload", data=_form())
+        assert response.status == 200
+        stored = (await response.json())["file_path"]
+
+        # Streamed straight into the print request
+        response = await client.post(
+            f"/api/ipp_printer_service/upload?entity_id={entity_id}", data=_form()
+        )
+        assert response.status == 200
+        result = await response.json()
+        await hass.async_block_till_done()
+
+    assert Path(stored).stat().st_size == len(data)
+    assert result["mode"] == "direct"
+    assert result["job_id"] == 1
+    assert fake_server.bytes_received >= DOCUMENT_SIZE
@@ -0,0 +1,60 @@
+"""Tests for printing on a group of printers."""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+
+from benchmarks.fake_ipp_server import FakeIPPServer
+from custom_components.ipp_printer_service.const import DOMAIN
+from custom_components.ipp_printer_service.group import PrinterError
+
+from .common import async_setup_printer, get_entity_id
+
+
+@pytest.fixture
+async def fake_server() -> AsyncIterator[FakeIPPServer]:
+    """Return a running fake CUPS server with two queues."""
+    async with FakeIPPServer(printers=2) as server:
+        yield server
+
+
+async def test_source_error_not_retried(
+    hass: HomeAssistant, fake_server: FakeIPPServer, tmp_path: Path
+) -> None:
+    """Test a document failing mid-stream is not sent to the other printer."""
+    hass.config.allowlist_external_dirs = {str(tmp_path)}
+    entity_ids = [
+        get_entity_id(hass, await async_setup_printer(hass, fake_server, name))
+        for name in fake_server.queue_names
+    ]
+    path = tmp_path / "document.pdf"
+    path.write_bytes(b"%PDF-1.4\n")
+
+    async def _failing_file(path: str, chunk_size: int) -> AsyncIterator[bytes]:
+        yield b"%PDF-1.4\n" + bytes(chunk_size)
+        raise OSError("Input/output error")
+
+    with (
+        patch(
+            "custom_components.ipp_printer_service.services.async_iter_file",
+            _failing_file,
+        ),
+        pytest.raises(HomeAssistantError, match="Input/output error") as err,
+    ):
+        await hass.services.async_call(
+            DOMAIN,
+            "print_pdf",
+            {"entity_id": entity_ids, "file_path": str(path), "wait": True},
+            blocking=True,
+            return_response=True,
+        )
+
+    assert not isinstance(err.value, PrinterError)
+    assert fake_server.requests["PRINT_JOB"] == 1
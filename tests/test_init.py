@@ -0,0 +1,43 @@
+"""Tests for setting up IPP Printer Service entries."""
+
+from __future__ import annotations
+
+from unittest.mock import patch
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant
+
+from benchmarks.fake_ipp_server import FakeIPPServer
+from custom_components.ipp_printer_service.coordinator import (
+    IPPPrinterServiceCoordinator,
+)
+
+from .common import async_setup_printer
+
+
+async def test_setup_failure_closes_coordinator(
+    hass: HomeAssistant, fake_server: FakeIPPServer
+) -> None:
+    """Test a failure after the coordinator was built closes it."""
+    with (
+        patch.object(
+            hass.config_entries,
+            "async_forward_entry_setups",
+            side_effect=RuntimeError("platform setup failed"),
+        ),
+        patch.object(
+            IPPPrinterServiceCoordinator,
+            "async_close",
+            autospec=True,
+            side_effect=IPPPrinterServiceCoordinator.async_close,
+        ) as async_close,
+    ):
+        entry = await async_setup_printer(
+            hass, fake_server, fake_server.queue_names[0], setup=False
+        )
+        assert not await hass.config_entries.async_setup(entry.entry_id)
+
+    assert entry.state is ConfigEntryState.SETUP_ERROR
+    async_close.assert_awaited_once()
+    coordinator = async_close.await_args.args[0]
+    assert coordinator.client.closed
@@ -0,0 +1,190 @@
+"""Tests for the circuit breakers of IPP Printer Service."""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+from unittest.mock import Mock
+
+from pyipp import IPPConnectionError, IPPError
+from pyipp.enums import IppOperation
+import pytest
+
+from homeassistant.core import HomeAssistant
+
+from benchmarks.fake_ipp_server import FakeIPPServer
+from custom_components.ipp_printer_service.resilience import (
+    FAILURE_THRESHOLD,
+    MAX_OPEN_DURATION,
+    OPEN_DURATION,
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    async_call,
+)
+from custom_components.ipp_printer_service.streaming import DocumentSourceError
+
+from .common import async_setup_printer
+
+NO_RETRY = RetryPolicy(attempts=1)
+
+
+def _open_breaker() -> CircuitBreaker:
+    """Return a breaker opened by consecutive failures."""
+    breaker = CircuitBreaker("printer.local", 631)
+    for _ in range(FAILURE_THRESHOLD):
+        breaker.async_record_failure(IPPConnectionError("timeout"))
+    return breaker
+
+
+def _elapse(breaker: CircuitBreaker) -> None:
+    """Make the open duration of a breaker elapse."""
+    breaker.opened_at -= breaker.open_duration
+
+
+async def _fail(err: Exception) -> None:
+    """Raise an error as a request would."""
+    raise err
+
+
+def test_opens_after_threshold() -> None:
+    """Test consecutive failures open the breaker and requests fail fast."""
+    breaker = CircuitBreaker("printer.local", 631)
+    listener = Mock()
+    breaker.async_add_listener(listener)
+
+    for _ in range(FAILURE_THRESHOLD - 1):
+        breaker.async_record_failure(IPPConnectionError("timeout"))
+    assert breaker.state == STATE_CLOSED
+    breaker.async_before_request()
+
+    breaker.async_record_failure(IPPConnectionError("timeout"))
+    assert breaker.state == STATE_OPEN
+    assert breaker.trips == 1
+    assert breaker.last_error == "timeout"
+    listener.assert_called_once()
+    with pytest.raises(CircuitOpenError):
+        breaker.async_before_request()
+    assert breaker.rejected == 1
+
+
+def test_success_resets_failures() -> None:
+    """Test an answer resets the count of consecutive failures."""
+    breaker = CircuitBreaker("printer.local", 631)
+    for _ in range(FAILURE_THRESHOLD - 1):
+        breaker.async_record_failure(IPPConnectionError("timeout"))
+    breaker.async_record_success()
+    breaker.async_record_failure(IPPConnectionError("timeout"))
+
+    assert breaker.state == STATE_CLOSED
+    assert breaker.failures == 1
+
+
+def test_probe_closes() -> None:
+    """Test a single probe is let through and closes the breaker on success."""
+    breaker = _open_breaker()
+    _elapse(breaker)
+
+    breaker.async_before_request()
+    assert breaker.state == STATE_HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.async_before_request()
+
+    breaker.async_record_success()
+    assert breaker.state == STATE_CLOSED
+    assert breaker.open_duration == OPEN_DURATION
+    breaker.async_before_request()
+
+
+def test_failed_probe_reopens() -> None:
+    """Test a failed probe opens the breaker for twice as long, up to a limit."""
+    breaker = _open_breaker()
+    durations = []
+    while breaker.open_duration < MAX_OPEN_DURATION:
+        _elapse(breaker)
+        breaker.async_before_request()
+        breaker.async_record_failure(IPPConnectionError("timeout"))
+        assert breaker.state == STATE_OPEN
+        durations.append(breaker.open_duration)
+
+    assert durations[0] == 2 * OPEN_DURATION
+    assert durations[-1] == MAX_OPEN_DURATION
+    assert breaker.trips == 1
+
+
+def test_released_probe() -> None:
+    """Test a probe ending without an answer lets another one through."""
+    breaker = _open_breaker()
+    _elapse(breaker)
+    breaker.async_before_request()
+
+    breaker.async_release_probe()
+    assert breaker.state == STATE_HALF_OPEN
+    breaker.async_before_request()
+
+
+@pytest.mark.parametrize(
+    ("err", "failures"),
+    [
+        (IPPConnectionError("timeout"), 2),
+        (IPPError("busy", {"status-code": 0x0507}), 0),
+        (DocumentSourceError("Failed to read the document"), 1),
+    ],
+)
+async def test_call_classifies_errors(err: Exception, failures: int) -> None:
+    """Test only connection errors count as failures of the host."""
+    breaker = CircuitBreaker("printer.local", 631)
+    breaker.async_record_failure(IPPConnectionError("timeout"))
+
+    with pytest.raises(type(err)):
+        await async_call(breaker, lambda: _fail(err), policy=NO_RETRY)
+
+    assert breaker.failures == failures
+
+
+async def test_call_source_error_releases_probe() -> None:
+    """Test a probe failing because of the document source does not reopen."""
+    breaker = _open_breaker()
+    _elapse(breaker)
+
+    with pytest.raises(DocumentSourceError):
+        await async_call(
+            breaker,
+            lambda: _fail(DocumentSourceError("Failed to read the document")),
+            policy=NO_RETRY,
+        )
+
+    assert breaker.state == STATE_HALF_OPEN
+    assert breaker.open_duration == OPEN_DURATION
+    breaker.async_before_request()
+
+
+async def test_source_errors_keep_breaker_closed(
+    hass: HomeAssistant, fake_server: FakeIPPServer
+) -> None:
+    """Test documents failing mid-stream do not open the printer's breaker."""
+    entry = await async_setup_printer(hass, fake_server, fake_server.queue_names[0])
+    client = entry.runtime_data.client
+
+    async def _failing_source() -> AsyncIterator[bytes]:
+        yield b"%PDF-1.4\n" + bytes(64 * 1024)
+        raise OSError("Input/output error")
+
+    for _ in range(FAILURE_THRESHOLD + 1):
+        with pytest.raises(DocumentSourceError):
+            await client.send_stream(
+                IppOperation.PRINT_JOB,
+                {
+                    "operation-attributes-tag": {
+                        "requesting-user-name": "Home Assistant",
+                        "job-name": "test",
+                        "document-format": "application/pdf",
+                    },
+                },
+                _failing_source(),
+            )
+
+    assert client.breaker.state == STATE_CLOSED
+    assert client.breaker.failures == 0
@@ -0,0 +1,45 @@
+"""Tests for the shared polling of CUPS servers."""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+
+from benchmarks.fake_ipp_server import FakeIPPServer
+
+from .common import async_setup_printer
+
+
+@pytest.fixture
+async def fake_server() -> AsyncIterator[FakeIPPServer]:
+    """Return a running fake CUPS server with two queues."""
+    async with FakeIPPServer(printers=2) as server:
+        yield server
+
+
+async def test_entries_of_same_queue(
+    hass: HomeAssistant, fake_server: FakeIPPServer
+) -> None:
+    """Test unloading one of two entries of a queue keeps the other updated."""
+    first, second = [
+        await async_setup_printer(hass, fake_server, fake_server.queue_names[0])
+        for _ in range(2)
+    ]
+    other = await async_setup_printer(hass, fake_server, fake_server.queue_names[1])
+    server = other.runtime_data.server
+    assert first.runtime_data.server is server
+    assert second.runtime_data.server is server
+
+    assert await hass.config_entries.async_unload(first.entry_id)
+    await hass.async_block_till_done()
+
+    # A poll of another queue updates the remaining entry of the first queue
+    pushes = second.runtime_data.pushes
+    server.last_update = None
+    await other.runtime_data.async_refresh()
+
+    assert second.runtime_data.pushes == pushes + 1
+    assert second.runtime_data.data.printer is not None
@@ -0,0 +1,56 @@
+"""Tests for the print services of IPP Printer Service."""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+
+from benchmarks.fake_ipp_server import FakeIPPServer
+from custom_components.ipp_printer_service.const import DOMAIN
+
+
+async def test_batch_without_documents_cancels_job(
+    hass: HomeAssistant,
+    config_entry: MockConfigEntry,
+    entity_id: str,
+    fake_server: FakeIPPServer,
+    tmp_path: Path,
+) -> None:
+    """Test a multi-document job none of whose documents opened is cancelled."""
+    path = tmp_path / "document.pdf"
+    path.write_bytes(b"%PDF-1.4\n")
+
+    @asynccontextmanager
+    async def _failing_document(*args: Any) -> AsyncIterator[AsyncIterator[bytes]]:
+        raise HomeAssistantError("Failed to download file")
+        yield  # pylint: disable=unreachable
+
+    with patch(
+        "custom_components.ipp_printer_service.services._async_open_document",
+        _failing_document,
+    ):
+        response = await hass.services.async_call(
+            DOMAIN,
+            "print_batch",
+            {"entity_id": entity_id, "file_paths": [str(path)]},
+            blocking=True,
+            return_response=True,
+        )
+
+    assert response["mode"] == "multi_document"
+    assert response["documents"][0]["status"] == "failed"
+    job = fake_server.jobs[response["job_id"]]
+    assert job.cancelled
+    assert job.documents == 0
+    assert fake_server.requests["SEND_DOCUMENT"] == 0
+    jobs = config_entry.runtime_data.jobs
+    assert jobs.tracked == 0
+    assert not jobs.history
@@ -0,0 +1,89 @@
+"""Tests for the upload views of IPP Printer Service."""
+
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import Mock, patch
+
+from aiohttp import BodyPartReader, FormData
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.typing import ClientSessionGenerator
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+
+from custom_components.ipp_printer_service.print_queue import (
+    STATUS_CANCELLED,
+    PrintJob,
+)
+from custom_components.ipp_printer_service.views import _async_print_upload
+
+
+async def test_upload_queue_full(
+    hass: HomeAssistant,
+    hass_client: ClientSessionGenerator,
+    config_entry: MockConfigEntry,
+    entity_id: str,
+) -> None:
+    """Test an upload to a full print queue is answered with 503."""
+    client = await hass_client()
+    form = FormData()
+    form.add_field(
+        "file", b"%PDF-1.4\n", filename="upload.pdf", content_type="application/pdf"
+    )
+
+    with patch.object(
+        config_entry.runtime_data.queue,
+        "async_submit",
+        side_effect=HomeAssistantError("Print queue is full"),
+    ):
+        response = await client.post(
+            f"/api/ipp_printer_service/upload?entity_id={entity_id}", data=form
+        )
+
+    assert response.status == 503
+    assert await response.text() == "Print queue is full"
+
+
+async def test_upload_disconnect_cancels_job(
+    hass: HomeAssistant, config_entry: MockConfigEntry, entity_id: str
+) -> None:
+    """Test a direct upload whose client went away is cancelled in the queue."""
+    coordinator = config_entry.runtime_data
+    jobs: list[PrintJob] = []
+    coordinator.queue.async_add_listener(jobs.append)
+    started = asyncio.Event()
+
+    async def _read_chunk(size: int) -> bytes:
+        if not started.is_set():
+            started.set()
+            return b"%PDF-1.4\n"
+        # The rest of the upload never arrives
+        await asyncio.Event().wait()
+        return b""
+
+    file = Mock(spec=BodyPartReader)
+    file.read_chunk = _read_chunk
+    task = hass.async_create_task(
+        _async_print_upload(
+            hass,
+            config_entry,
+            coordinator.spool,
+            entity_id,
+            file,
+            "upload.pdf",
+            1,
+            "upload.pdf",
+        )
+    )
+    await started.wait()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    job = jobs[0]
+    with pytest.raises(HomeAssistantError, match="cancelled"):
+        await job.async_wait()
+    assert job.status == STATUS_CANCELLED
+    assert coordinator.client.breaker.failures == 0